@@ -0,0 +1,28 @@
+"""add_last_heartbeat_to_chargers
+
+Revision ID: 3c9d1f5a7b21
+Revises: ef0e08525802
+Create Date: 2026-10-18 09:12:40.114502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d1f5a7b21'
+down_revision: Union[str, Sequence[str], None] = 'ef0e08525802'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chargers', sa.Column('last_heartbeat', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chargers', 'last_heartbeat')
@@ -0,0 +1,28 @@
+"""add_charger_keyset_indexes
+
+Revision ID: 5f1a2b3c4d60
+Revises: 7e2b4c8d9a10
+Create Date: 2026-10-18 13:05:21.448170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1a2b3c4d60'
+down_revision: Union[str, Sequence[str], None] = '7e2b4c8d9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chargers_owner_id_id', 'chargers', ['owner_id', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chargers_owner_id_id', table_name='chargers')
@@ -0,0 +1,40 @@
+"""add_meter_samples
+
+Revision ID: 7e2b4c8d9a10
+Revises: 3c9d1f5a7b21
+Create Date: 2026-10-18 10:03:17.528841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b4c8d9a10'
+down_revision: Union[str, Sequence[str], None] = '3c9d1f5a7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Partitionovaná tabulka (RANGE podle sampled_at). Měsíční partitions
+    # zakládá aplikace (MeterSampleService.ensure_partitions), DEFAULT partition
+    # zachytí vzorky, pro které partition ještě neexistuje (při založení partition
+    # se do ní vzorky z DEFAULT přesunou).
+    op.create_table('meter_samples',
+    sa.Column('transaction_id', sa.Integer(), nullable=False),
+    sa.Column('sampled_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('meter_wh', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['transaction_id'], ['charge_logs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('transaction_id', 'sampled_at'),
+    postgresql_partition_by='RANGE (sampled_at)'
+    )
+    op.execute("CREATE TABLE meter_samples_default PARTITION OF meter_samples DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('meter_samples')
@@ -0,0 +1,31 @@
+"""add_charger_location_index
+
+Revision ID: 9a4c6e2f1b37
+Revises: 5f1a2b3c4d60
+Create Date: 2026-10-18 14:22:08.731904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c6e2f1b37'
+down_revision: Union[str, Sequence[str], None] = '5f1a2b3c4d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_chargers_active_lat_lon', 'chargers', ['latitude', 'longitude'],
+        postgresql_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chargers_active_lat_lon', table_name='chargers', postgresql_where=sa.text('is_active'))
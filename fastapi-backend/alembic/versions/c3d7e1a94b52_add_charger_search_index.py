@@ -0,0 +1,51 @@
+"""add_charger_search_index
+
+Revision ID: c3d7e1a94b52
+Revises: 9a4c6e2f1b37
+Create Date: 2026-10-18 16:05:41.218377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d7e1a94b52'
+down_revision: Union[str, Sequence[str], None] = '9a4c6e2f1b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # unaccent() ani concat_ws() nejsou IMMUTABLE -> do indexu jen přes vlastní funkce
+    # (slovník uvedený explicitně, aby nezávisely na search_path)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(value text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, value) $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION charger_search_text(name text, city text, street text, postal_code text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT f_unaccent(lower(
+            coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || coalesce(street, '') || ' ' || coalesce(postal_code, '')
+        )) $$
+    """)
+    op.execute("""
+        CREATE INDEX ix_chargers_search_trgm ON chargers
+        USING gin (charger_search_text(name, city, street, postal_code) gin_trgm_ops)
+        WHERE is_active
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chargers_search_trgm', table_name='chargers', postgresql_where=sa.text('is_active'))
+    op.execute("DROP FUNCTION IF EXISTS charger_search_text(text, text, text, text)")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
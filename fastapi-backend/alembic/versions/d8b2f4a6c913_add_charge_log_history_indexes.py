@@ -0,0 +1,34 @@
+"""add_charge_log_history_indexes
+
+Revision ID: d8b2f4a6c913
+Revises: c3d7e1a94b52
+Create Date: 2026-10-18 17:12:30.504196
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b2f4a6c913'
+down_revision: Union[str, Sequence[str], None] = 'c3d7e1a94b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_charge_logs_user_id_start_time', 'charge_logs', ['user_id', 'start_time', 'id'])
+    op.create_index('ix_charge_logs_charger_id_start_time', 'charge_logs', ['charger_id', 'start_time', 'id'])
+    op.create_index('ix_charge_logs_start_time_id', 'charge_logs', ['start_time', 'id'])
+    op.create_index('ix_charge_logs_status_last_update', 'charge_logs', ['status', 'last_update'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_charge_logs_status_last_update', table_name='charge_logs')
+    op.drop_index('ix_charge_logs_start_time_id', table_name='charge_logs')
+    op.drop_index('ix_charge_logs_charger_id_start_time', table_name='charge_logs')
+    op.drop_index('ix_charge_logs_user_id_start_time', table_name='charge_logs')
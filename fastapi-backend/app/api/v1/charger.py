@@ -1,33 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from typing import Annotated, Awaitable, Callable
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import StringConstraints
 from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio import Redis
 
 # Sloučené importy
-from app.api.v1.deps import get_db, get_redis, get_current_user, get_charger_service, get_current_user_optional
+from app.api.v1.deps import get_db, get_redis, get_current_user, get_charger_service, get_current_user_optional, get_cluster_service
 from app.models.charger import (
     ChargerCreate,
     ChargerExistenceCheck, 
     ChargerRead, 
     ChargerUpdate, 
     ChargerTechnicalStatus, 
-    ChargerAuthorizeRequest
+    ChargerAuthorizeRequest,
+    ChargerNearbyRead,
+    ChargerCluster,
+    ChargerSummary,
+    ChargerFilter
 )
 from app.models.enums import UserRole
 from app.db.schema import User 
 from app.services.charger_service import ChargerService
+from app.services.cluster_service import ClusterService
+from app.services.charger_list_cache import (
+    get_cached_charger_list,
+    store_charger_list,
+    etag_matches
+)
+from app.services.status_stream import StreamFilter, status_broadcaster
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.core.config import config
+from app.core.responses import ModelListResponse, dump_model_list
 
 router = APIRouter()
 
+def _after_id_from_cursor(cursor: str | None) -> int | None:
+    """Keyset stránkování: kurzor nese id poslední nabíječky předchozí stránky."""
+    if not cursor:
+        return None
+    try:
+        return int(decode_cursor(cursor)["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _cached_list_response(
+    redis: Redis,
+    variant: str,
+    load: Callable[[], Awaitable[tuple[bytes, str | None]]],
+    if_none_match: str | None
+) -> Response:
+    """
+    Veřejný seznam s verzovanou cache a ETagem (viz charger_list_cache).
+    Když se od posledního dotazu nic nezměnilo, nejde se do DB a klient
+    s platným If-None-Match dostane 304 bez těla.
+    load() vrací (serializované tělo, kurzor další stránky).
+    """
+    version, cached = await get_cached_charger_list(redis, variant)
+
+    if cached:
+        etag, body, next_cursor = cached["etag"], cached["body"], cached["next_cursor"] or None
+    else:
+        body, next_cursor = await load()
+        etag = await store_charger_list(redis, variant, version, body, next_cursor)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def _public_charger_list(
+    service: ChargerService,
+    redis: Redis,
+    limit: int,
+    after_id: int | None,
+    filters: ChargerFilter,
+    if_none_match: str | None
+) -> Response:
+    async def load():
+        chargers = await service.list_chargers(show_all=False, limit=limit, after_id=after_id, filters=filters)
+        next_cursor = encode_cursor({"id": chargers[-1].id}) if len(chargers) == limit else None
+        return dump_model_list(ChargerRead, chargers), next_cursor
+
+    variant = f"public:{limit}:{after_id or 0}"
+    if not filters.is_empty():
+        variant += f":{filters.cache_key()}"
+    return await _cached_list_response(redis, variant, load, if_none_match)
+
 # --- GET CHARGERS (Public / Private) ---
 @router.get("", response_model=list[ChargerRead])
 async def get_chargers(
     mine: bool = False, # ?mine=true (přepínač)
     show_all: bool = False, # ?show_all=true (zobrazí i smazané)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None, # Kurzor z hlavičky X-Next-Cursor předchozí stránky
+    if_none_match: str | None = Header(default=None),
+    filters: ChargerFilter = Depends(), # ?available=true&connector_type=CCS&min_power_w=50000&max_price=12
     service: ChargerService = Depends(get_charger_service),
+    redis: Redis = Depends(get_redis),
     # ZMĚNA ZDE: Použijeme optional verzi. 
     # Pokud uživatel nemá token, current_user bude None, ale nevyhodí to chybu 401.
     current_user: User | None = Depends(get_current_user_optional) 
 ):
+    after_id = _after_id_from_cursor(cursor)
+
     # Logika pro filtrování "jen moje"
     if mine:
         # Pokud chce uživatel "svoje" nabíječky, ale není přihlášený -> CHYBA
@@ -36,14 +116,177 @@ async def get_chargers(
                 status_code=status.HTTP_401_UNAUTHORIZED, 
                 detail="Authentication required for 'mine' filter"
             )
-        return await service.list_chargers(owner_id=current_user.id, show_all=show_all)
-    
-    # Veřejný seznam všech nabíječek (dostupný i pro current_user=None)
-    # Admin vidí vše (pokud chce), ostatní vidí jen aktivní
-    is_admin = (current_user is not None) and (current_user.role == UserRole.admin)
-    effective_show_all = show_all and is_admin
-    
-    return await service.list_chargers(show_all=effective_show_all)
+        chargers = await service.list_chargers(owner_id=current_user.id, show_all=show_all, limit=limit, after_id=after_id, filters=filters)
+    else:
+        # Veřejný seznam všech nabíječek (dostupný i pro current_user=None)
+        # Admin vidí vše (pokud chce), ostatní vidí jen aktivní
+        is_admin = (current_user is not None) and (current_user.role == UserRole.admin)
+        effective_show_all = show_all and is_admin
+
+        if not effective_show_all and redis is not None:
+            return await _public_charger_list(service, redis, limit, after_id, filters, if_none_match)
+
+        chargers = await service.list_chargers(show_all=effective_show_all, limit=limit, after_id=after_id, filters=filters)
+
+    # Plná stránka -> může existovat další, pošleme kurzor (tělo zůstává seznam)
+    headers = {}
+    if len(chargers) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": chargers[-1].id})
+
+    return ModelListResponse(ChargerRead, chargers, headers=headers)
+
+
+# --- CHARGER SUMMARY FOR MAP (Public) ---
+# Musí být před /{charger_id}
+@router.get("/summary", response_model=list[ChargerSummary])
+async def get_charger_summaries(
+    limit: int = Query(500, ge=1, le=2000),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    service: ChargerService = Depends(get_charger_service),
+    redis: Redis = Depends(get_redis)
+):
+    """
+    Kompaktní seznam aktivních nabíječek pro špendlíky na mapě:
+    poloha, status, počet volných konektorů, max. výkon a min. cena.
+    """
+    after_id = _after_id_from_cursor(cursor)
+
+    async def load():
+        summaries = await service.list_charger_summaries(limit=limit, after_id=after_id)
+        next_cursor = encode_cursor({"id": summaries[-1]["id"]}) if len(summaries) == limit else None
+        return dump_model_list(ChargerSummary, summaries), next_cursor
+
+    if redis is not None:
+        return await _cached_list_response(redis, f"summary:{limit}:{after_id or 0}", load, if_none_match)
+
+    body, next_cursor = await load()
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# --- SEARCH (Public) ---
+# Musí být před /{charger_id}
+@router.get("/search", response_model=list[ChargerRead])
+async def search_chargers(
+    # Délka se kontroluje až po oříznutí mezer ("  " by jinak bylo LIKE '%%' = vše)
+    q: Annotated[str, StringConstraints(strip_whitespace=True, min_length=2, max_length=100), Query()],
+    limit: int = Query(20, ge=1, le=50),
+    cursor: str | None = None,
+    service: ChargerService = Depends(get_charger_service)
+):
+    """
+    Hledání podle názvu, města, ulice a PSČ (bez ohledu na diakritiku), seřazené podle relevance.
+    Další stránka přes kurzor z hlavičky X-Next-Cursor.
+    """
+    # Výsledky řazené podle relevance nemají stabilní klíč pro keyset -> kurzor nese offset
+    offset = 0
+    if cursor:
+        try:
+            offset = int(decode_cursor(cursor)["offset"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    chargers = await service.search_chargers(q, limit=limit, offset=offset)
+
+    headers = {}
+    if len(chargers) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"offset": offset + limit})
+    return ModelListResponse(ChargerRead, chargers, headers=headers)
+
+
+# --- NEARBY CHARGERS (Public) ---
+# Musí být před /{charger_id}, jinak by se "nearby" bralo jako ID
+@router.get("/nearby", response_model=list[ChargerNearbyRead])
+async def get_nearby_chargers(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(5000, gt=0, le=100_000), # Poloměr v metrech
+    limit: int = Query(10, ge=1, le=100),
+    service: ChargerService = Depends(get_charger_service)
+):
+    """
+    Nejbližší nabíječky k zadanému bodu (seřazené podle vzdálenosti), včetně živého stavu konektorů.
+    """
+    chargers = await service.find_nearby(lat=lat, lon=lon, radius_m=radius, limit=limit)
+    return ModelListResponse(ChargerNearbyRead, chargers)
+
+
+def _parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """'min_lon,min_lat,max_lon,max_lat' -> tuple, jinak 400."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'min_lon,min_lat,max_lon,max_lat'")
+
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=400, detail="Invalid bbox")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+# --- MAP CLUSTERS (Public) ---
+@router.get("/clusters", response_model=list[ChargerCluster])
+async def get_charger_clusters(
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    service: ClusterService = Depends(get_cluster_service)
+):
+    """
+    Předpočítané shluky nabíječek pro výřez mapy (místo celého seznamu nabíječek).
+    """
+    min_lon, min_lat, max_lon, max_lat = _parse_bbox(bbox)
+
+    try:
+        return await service.get_clusters(min_lon, min_lat, max_lon, max_lat, zoom)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# --- LIVE STATUS STREAM (Public, Server-Sent Events) ---
+@router.get("/stream")
+async def stream_charger_status(
+    request: Request,
+    charger_ids: str | None = Query(None, description="Čárkou oddělená ID nabíječek"),
+    bbox: str | None = Query(None, description="min_lon,min_lat,max_lon,max_lat")
+):
+    """
+    Živé změny stavů (status konektoru, nabíječka online/offline) jako SSE stream.
+    Nahrazuje periodické dotazování GET /chargers.
+    """
+    stream_filter = StreamFilter()
+    if charger_ids:
+        try:
+            stream_filter.charger_ids = {int(v) for v in charger_ids.split(",")}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="charger_ids must be comma separated integers")
+    if bbox:
+        stream_filter.bbox = _parse_bbox(bbox)
+
+    subscription = status_broadcaster.subscribe(stream_filter)
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    data = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=config.status_stream_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    # Komentář udrží spojení přes proxy a odhalí odpojeného klienta
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: status\ndata: {data}\n\n"
+        finally:
+            status_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # --- CREATE CHARGER (Protected: Owner or Admin) ---
@@ -96,8 +339,8 @@ async def update_charger(
     service: ChargerService = Depends(get_charger_service),
     current_user: User = Depends(get_current_user)
 ):
-    # 1. Načteme existující nabíječku
-    charger = await service.get_charger(charger_id)
+    # 1. Načteme existující nabíječku (jen kvůli vlastníkovi, bez živého stavu)
+    charger = await service.get_charger(charger_id, enrich=False)
     if not charger:
         raise HTTPException(status_code=404, detail="Charger not found")
 
@@ -123,8 +366,8 @@ async def delete_charger(
     service: ChargerService = Depends(get_charger_service),
     current_user: User = Depends(get_current_user)
 ):
-    # 1. Načteme existující nabíječku
-    charger = await service.get_charger(charger_id)
+    # 1. Načteme existující nabíječku (jen kvůli vlastníkovi, bez živého stavu)
+    charger = await service.get_charger(charger_id, enrich=False)
     if not charger:
         raise HTTPException(status_code=404, detail="Charger not found")
 
@@ -40,18 +40,15 @@ async def update_connector(
         raise HTTPException(status_code=404, detail="Connector not found")
 
     # 2. Kontrola oprávnění (Vlastník nabíječky nebo Admin)
-    # Díky selectinload v service můžeme přistoupit k .charger.owner_id
+    # Díky joinedload v service můžeme přistoupit k .charger.owner_id
     is_owner = connector_orm.charger.owner_id == current_user.id
     is_admin = current_user.role == UserRole.admin
 
     if not is_owner and not is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    # 3. Update
-    updated = await service.update_connector(connector_id, connector_update)
-    
-    # 4. Vrácení výsledku i se statusem z Redisu
-    return await service.get_connector_with_status(connector_id)
+    # 3. Update (už načtený konektor, bez dalšího dotazu) - vrací i status z Redisu
+    return await service.update_connector(connector_id, connector_update, connector=connector_orm)
 
 @router.get("/ocpp/{identity}/{ocpp_connector_id}", response_model=ConnectorRead)
 async def get_connector_by_ocpp_data(
@@ -8,11 +8,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio import Redis
 
 from app.db.schema import AsyncSessionLocal, User
+from app.db.redis_pool import get_redis_client
 from app.core.config import config
 
 from app.services.charger_service import ChargerService
 from app.services.connector_service import ConnectorService
 from app.services.transaction_service import TransactionService
+from app.services.cluster_service import ClusterService
 
 # 1. STRIKTNÍ SCHÉMA (pro zamčené endpointy)
 # Říká swaggeru: "Token získáš na této URL".
@@ -35,15 +37,9 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 async def get_redis() -> AsyncGenerator[redis.Redis, None]:
-    r = redis.Redis(
-        host=config.redis_host, 
-        port=config.redis_port, 
-        decode_responses=True
-    )
-    try:
-        yield r
-    finally:
-        await r.close()
+    # Sdílený klient nad aplikačním poolem (viz app/db/redis_pool.py).
+    # Nezavíráme ho - spojení se po každém příkazu vrací do poolu.
+    yield get_redis_client()
 
 # --- AUTENTIZACE ---
 
@@ -146,6 +142,14 @@ def get_charger_service(
     return ChargerService(session=db, redis=redis)
 
 def get_transaction_service(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ) -> TransactionService:
-    return TransactionService(session=db)
\ No newline at end of file
+    return TransactionService(session=db, redis=redis)
+
+
+def get_cluster_service(
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+) -> ClusterService:
+    return ClusterService(session=db, redis=redis)
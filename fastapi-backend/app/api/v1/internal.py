@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio import Redis
 from datetime import datetime, timezone
@@ -17,12 +17,21 @@ from app.models.charge_log import (
     TransactionMeterValueRequest
 )
 from app.models.connector import ConnectorStatusUpdate
+from app.models.charge_log import ChargeLogRead
+from app.models.internal import (
+    InternalBatchRequest,
+    InternalBatchResponse,
+    InternalEventResult
+)
 from app.services.charger_service import ChargerService
 from app.services.connector_service import ConnectorService
 from app.services.transaction_service import TransactionService
 from app.api.v1.deps import get_connector_service
 from app.api.v1.deps import get_charger_service
 from app.api.v1.deps import get_transaction_service
+from app.db.redis_pool import get_pool_stats
+from app.services.idempotency import run_idempotent
+from app.core.config import config
 
 # Zamkneme celý router na API Key
 router = APIRouter(
@@ -139,37 +148,135 @@ async def update_connector_status(
 @router.post("/transaction/start")
 async def start_transaction(
     data: TransactionStartRequest,
+    idempotency_key: str | None = Header(default=None, max_length=255),
+    redis: Redis = Depends(deps.get_redis),
     service: TransactionService = Depends(get_transaction_service)
 ):
-    # Service nyní vrací slovník {"transaction_id": 123, "max_power": 22}
-    result = await service.start_transaction(data)
-    
-    return {
-        "transactionId": result["transaction_id"], # Pro zachování kompatibility s Node.js
-        "max_power": result["max_power"]           # Nové pole pro nastavení profilu
-    }
+    async def handler():
+        # Service nyní vrací slovník {"transaction_id": 123, "max_power": 22}
+        result = await service.start_transaction(data)
+        return {
+            "transactionId": result["transaction_id"], # Pro zachování kompatibility s Node.js
+            "max_power": result["max_power"]           # Nové pole pro nastavení profilu
+        }
+
+    # Retry gateway se stejným klíčem nevytvoří druhý ChargeLog
+    return await run_idempotent(redis, "transaction:start", idempotency_key, handler, request=data)
 
 @router.post("/transaction/stop")
 async def stop_transaction(
     data: TransactionStopRequest,
+    idempotency_key: str | None = Header(default=None, max_length=255),
+    redis: Redis = Depends(deps.get_redis),
     service: TransactionService = Depends(get_transaction_service)
 ):
-    return await service.stop_transaction(data)
+    async def handler():
+        log = await service.stop_transaction(data)
+        return ChargeLogRead.model_validate(log).model_dump(mode="json")
+
+    return await run_idempotent(redis, "transaction:stop", idempotency_key, handler, request=data)
 
 @router.post("/transaction/meter-values")
 async def process_meter_values(
     data: TransactionMeterValueRequest,
+    idempotency_key: str | None = Header(default=None, max_length=255),
+    redis: Redis = Depends(deps.get_redis),
     service: TransactionService = Depends(get_transaction_service)
 ):
-    await service.process_meter_value(data)
-    return {"status": "Accepted"}
+    async def handler():
+        await service.process_meter_value(data)
+        return {"status": "Accepted"}
+
+    return await run_idempotent(redis, "transaction:meter-values", idempotency_key, handler, request=data)
+
+@router.post("/batch", response_model=InternalBatchResponse)
+async def process_batch(
+    batch: InternalBatchRequest,
+    db: AsyncSession = Depends(deps.get_db),
+    redis: Redis = Depends(deps.get_redis),
+    charger_service: ChargerService = Depends(get_charger_service),
+    connector_service: ConnectorService = Depends(get_connector_service),
+    transaction_service: TransactionService = Depends(get_transaction_service)
+):
+    """
+    Dávkové zpracování OCPP událostí (heartbeat, status, meter_value, start, stop).
+    Jeden request = jedna DB session, jeden Redis klient a jedna kontrola API klíče.
+    Události se zpracují v pořadí; chyba jedné události neovlivní ostatní.
+    Transakční události s idempotency_key se zpracují nejvýš jednou, stejně
+    (a se stejnými klíči) jako přes samostatné endpointy.
+    """
+    results = []
+
+    for index, event in enumerate(batch.events):
+        try:
+            if event.type == "heartbeat":
+                await charger_service.update_heartbeat(event.ocpp_id)
+                result = {"currentTime": datetime.now(timezone.utc).isoformat()}
+
+            elif event.type == "status":
+                connector = await connector_service.process_status_notification(event)
+                if connector:
+                    result = {"status": "updated", "connector_id": connector.id}
+                else:
+                    result = {"status": "ignored", "reason": "Charger not found"}
+
+            elif event.type == "meter_value":
+                async def handler():
+                    await transaction_service.process_meter_value(event)
+                    return {"status": "Accepted"}
+
+                result = await run_idempotent(redis, "transaction:meter-values", event.idempotency_key, handler, request=event)
+
+            elif event.type == "start":
+                async def handler():
+                    started = await transaction_service.start_transaction(event)
+                    return {
+                        "transactionId": started["transaction_id"],
+                        "max_power": started["max_power"]
+                    }
+
+                result = await run_idempotent(redis, "transaction:start", event.idempotency_key, handler, request=event)
+
+            else:  # stop
+                async def handler():
+                    log = await transaction_service.stop_transaction(event)
+                    return ChargeLogRead.model_validate(log).model_dump(mode="json")
+
+                result = await run_idempotent(redis, "transaction:stop", event.idempotency_key, handler, request=event)
+
+            results.append(InternalEventResult(index=index, type=event.type, ok=True, result=result))
+
+        except Exception as e:
+            # Session po chybě uvedeme do čistého stavu pro další události
+            await db.rollback()
+
+            # Stejně jako samostatné endpointy: HTTPException -> její kód, cokoliv jiného -> 500
+            if isinstance(e, HTTPException):
+                status_code, error = e.status_code, str(e.detail)
+            else:
+                status_code, error = 500, "Internal error"
+                print(f"💥 Batch event #{index} ({event.type}) failed: {e}")
+
+            results.append(InternalEventResult(
+                index=index, type=event.type, ok=False, status_code=status_code, error=error
+            ))
+
+    return InternalBatchResponse(results=results)
+
+@router.get("/redis/pool-stats")
+async def redis_pool_stats():
+    """
+    Statistiky sdíleného Redis connection poolu (tohoto workeru) pro monitoring.
+    """
+    return get_pool_stats()
 
 @router.post("/transaction/prune")
 async def prune_stale_transactions(
     service: TransactionService = Depends(get_transaction_service)
 ):
     """
-    Úklid sirotků volaný CRONem (který musí mít API Key).
+    Ruční úklid sirotků (API Key). Běžně ho provádí plánovač uvnitř aplikace
+    (viz jobs.prune_stale_transactions_job), externí CRON už není potřeba.
     """
-    count = await service.close_stale_transactions(max_age_minutes=15)
+    count = await service.close_stale_transactions(max_age_minutes=config.stale_transaction_max_age_minutes)
     return {"message": f"Cleaned {count} stale transactions"}
\ No newline at end of file
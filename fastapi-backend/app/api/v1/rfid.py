@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import Redis
 
 from app.api.v1 import deps
 from app.models.rfid import RFIDCardCreate, RFIDCardRead, RFIDCardUpdate
@@ -9,8 +10,11 @@ from app.models.enums import UserRole
 
 router = APIRouter()
 
-def get_rfid_service(db: AsyncSession = Depends(deps.get_db)) -> RFIDService:
-    return RFIDService(session=db)
+def get_rfid_service(
+    db: AsyncSession = Depends(deps.get_db),
+    redis: Redis = Depends(deps.get_redis)
+) -> RFIDService:
+    return RFIDService(session=db, redis=redis)
 
 # --- LIST CARDS ---
 @router.get("/", response_model=list[RFIDCardRead])
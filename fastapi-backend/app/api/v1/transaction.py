@@ -1,18 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.api.v1.deps import get_transaction_service, get_current_user
 from app.services.transaction_service import TransactionService
-from app.models.charge_log import ChargeLogRead # Budeme potřebovat Read model
+from app.models.charge_log import ChargeLogRead, ChargeLogFilter # Budeme potřebovat Read model
+from app.models.meter_sample import MeterSampleRead
 from app.db.schema import User
 from app.models.enums import UserRole
+from app.core.responses import ModelListResponse
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 
 router = APIRouter()
 
+def _after_from_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    """Keyset stránkování: kurzor nese (start_time, id) posledního záznamu předchozí stránky."""
+    if not cursor:
+        return None
+    try:
+        values = decode_cursor(cursor)
+        return datetime.fromisoformat(values["start_time"]), int(values["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _history_page(logs: list, limit: int) -> ModelListResponse:
+    # Plná stránka -> může existovat další, pošleme kurzor (tělo zůstává seznam)
+    headers = {}
+    if len(logs) == limit:
+        last = logs[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"start_time": last.start_time.isoformat(), "id": last.id})
+    return ModelListResponse(ChargeLogRead, logs, headers=headers)
+
 @router.get("/", response_model=list[ChargeLogRead])
 async def get_my_transactions(
-    skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None, # Kurzor z hlavičky X-Next-Cursor předchozí stránky
     charger_id: int | None = None,
     as_owner: bool = False,
+    filters: ChargeLogFilter = Depends(), # ?status=completed&start_from=...&start_to=...
     service: TransactionService = Depends(get_transaction_service),
     current_user: User = Depends(get_current_user)
 ):
@@ -22,28 +45,35 @@ async def get_my_transactions(
     - Owner může vidět logy svých nabíječek (as_owner=True).
     - Uživatel vidí jen své.
     """
+    after = _after_from_cursor(cursor)
+
     if current_user.role == UserRole.admin:
-        return await service.get_transactions(skip=skip, limit=limit, charger_id=charger_id)
-    
-    if current_user.role == UserRole.owner and as_owner:
-        return await service.get_transactions(owner_id=current_user.id, charger_id=charger_id, skip=skip, limit=limit)
+        logs = await service.get_transactions(limit=limit, charger_id=charger_id, after=after, filters=filters)
+    elif current_user.role == UserRole.owner and as_owner:
+        logs = await service.get_transactions(owner_id=current_user.id, charger_id=charger_id, limit=limit, after=after, filters=filters)
+    else:
+        logs = await service.get_transactions(user_id=current_user.id, charger_id=charger_id, limit=limit, after=after, filters=filters)
 
-    return await service.get_transactions(user_id=current_user.id, charger_id=charger_id, skip=skip, limit=limit)
+    return _history_page(logs, limit)
 
 @router.get("/usage", response_model=list[ChargeLogRead])
 async def get_charger_usage(
     charger_id: int | None = None,
-    skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    filters: ChargeLogFilter = Depends(),
     service: TransactionService = Depends(get_transaction_service),
     current_user: User = Depends(get_current_user)
 ):
     """
     Zobrazí historii využití nabíječek (pro Ownera nebo Admina).
     """
+    after = _after_from_cursor(cursor)
+
     # 1. Admin vidí vše (mohu filtrovat podle charger_id)
     if current_user.role == UserRole.admin:
-        return await service.get_transactions(charger_id=charger_id, skip=skip, limit=limit)
+        logs = await service.get_transactions(charger_id=charger_id, limit=limit, after=after, filters=filters)
+        return _history_page(logs, limit)
 
     # 2. Owner vidí historii SWÝCH nabíječek
     if current_user.role == UserRole.owner:
@@ -51,7 +81,8 @@ async def get_charger_usage(
         # Service.get_transactions s owner_id filtrem zajistí,
         # že se vrátí logy jen z nabíječek, které patří tomuto ownerovi.
         # Takže i když pošle cizí charger_id, vrátí to prázdný list (protože join Charger on owner_id).
-        return await service.get_transactions(owner_id=current_user.id, charger_id=charger_id, skip=skip, limit=limit)
+        logs = await service.get_transactions(owner_id=current_user.id, charger_id=charger_id, limit=limit, after=after, filters=filters)
+        return _history_page(logs, limit)
 
     # 3. Běžný uživatel nemá přístup k "usage" nabíječek (vidí jen své transakce v get_my_transactions)
     raise HTTPException(status_code=403, detail="Not authorized to view charger usage")
@@ -71,4 +102,25 @@ async def get_transaction_detail(
     if tx.user_id != current_user.id and not is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
         
-    return tx
\ No newline at end of file
+    return tx
+
+@router.get("/{transaction_id}/meter-samples", response_model=list[MeterSampleRead])
+async def get_transaction_meter_samples(
+    transaction_id: int,
+    service: TransactionService = Depends(get_transaction_service),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Průběh nabíjení (stav elektroměru v čase) - pro graf a kontrolu vyúčtování.
+    """
+    tx = await service.get_transaction(transaction_id)
+    if not tx:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+
+    # Kontrola oprávnění (stejná jako u detailu)
+    is_admin = current_user.role == UserRole.admin
+    if tx.user_id != current_user.id and not is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    samples = await service.get_meter_samples(tx)
+    return ModelListResponse(MeterSampleRead, samples)
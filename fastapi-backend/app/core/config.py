@@ -17,6 +17,52 @@ class Config(BaseSettings):
     # Redis
     redis_host: str
     redis_port: int = 6379
+    # Sdílený connection pool (jeden na worker)
+    redis_max_connections: int = 100
+    redis_pool_timeout: float = 5.0           # Jak dlouho čekat na volné spojení z poolu (s)
+    redis_socket_timeout: float = 5.0         # Timeout pro čtení/zápis (s)
+    redis_socket_connect_timeout: float = 2.0 # Timeout pro navázání TCP spojení (s)
+    redis_health_check_interval: int = 30     # Ping nečinných spojení před použitím (s)
+
+    # Heartbeaty (write-behind)
+    # True = Heartbeat zapisuje jen do Redisu, do DB se last_heartbeat propisuje dávkově
+    heartbeat_write_behind: bool = True
+    heartbeat_flush_interval_seconds: int = 15
+
+    # Časová řada elektroměru (meter_samples)
+    meter_sample_flush_interval_seconds: int = 5
+    meter_sample_flush_batch_size: int = 5000   # Max. řádků v jednom INSERTu
+    # 0 = každý MeterValues hned zapisuje do charge_logs,
+    # N > 0 = do DB se každých N sekund propíše jen poslední hodnota transakce
+    meter_value_coalesce_seconds: int = 0
+
+    # In-process cache ocpp_id -> nabíječka (invalidace přes Redis pub/sub)
+    charger_lookup_cache_size: int = 10000
+    charger_lookup_cache_ttl_seconds: int = 60
+
+    # Redis cache autorizace RFID karet
+    rfid_auth_cache_ttl_seconds: int = 300
+    rfid_auth_negative_ttl_seconds: int = 60   # Neznámé karty
+
+    # Úklid "sirotků" (běžící transakce bez kontaktu)
+    stale_transaction_max_age_minutes: int = 15
+    stale_transaction_prune_interval_seconds: int = 60
+    stale_transaction_prune_batch_size: int = 5000
+
+    # Shluky nabíječek pro mapu (cache po dlaždicích, maže se při změně nabíječky)
+    cluster_tile_ttl_seconds: int = 600   # Pojistka, např. pro nově objevené konektory
+    cluster_available_ttl_seconds: int = 30   # Počty dostupných; zachytí i vypršení heartbeatu
+
+    # Cache veřejného seznamu nabíječek (ETag, viz charger_list_cache)
+    charger_list_cache_ttl_seconds: int = 30   # Zachytí i přechod do offline (vypršení heartbeatu)
+
+    # Živý stream stavů (GET /chargers/stream, SSE)
+    status_stream_queue_size: int = 100          # Max. nedoručených událostí na klienta
+    status_stream_keepalive_seconds: int = 15
+
+    # Idempotence interních transakčních endpointů (hlavička Idempotency-Key)
+    idempotency_ttl_seconds: int = 3600   # Jak dlouho se pamatuje odpověď
+    idempotency_lock_seconds: int = 30    # Max. doba zpracování původního requestu
 
     # Bezpečnost
     api_key: str
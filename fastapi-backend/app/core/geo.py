@@ -0,0 +1,38 @@
+import math
+from sqlalchemy import func
+
+# Geografické pomůcky pro vyhledávání nabíječek podle polohy (latitude/longitude ve stupních).
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE_LAT = 111_320
+
+def bounding_box(lat: float, lon: float, radius_m: float) -> tuple[float, float, float | None, float | None]:
+    """
+    Obdélník (min_lat, max_lat, min_lon, max_lon), který obsahuje kruh o poloměru radius_m.
+    Slouží jako předfiltr přes index (latitude, longitude) - přesnou vzdálenost počítá haversine.
+    Vrací None pro délku, pokud kruh zasahuje přes pól nebo přes 180. poledník
+    (pak se filtruje jen podle šířky).
+    """
+    dlat = radius_m / METERS_PER_DEGREE_LAT
+    min_lat, max_lat = lat - dlat, lat + dlat
+
+    cos_lat = math.cos(math.radians(lat))
+    if max_lat >= 90 or min_lat <= -90 or cos_lat <= 0:
+        return max(min_lat, -90), min(max_lat, 90), None, None
+
+    dlon = radius_m / (METERS_PER_DEGREE_LAT * cos_lat)
+    if lon - dlon < -180 or lon + dlon > 180:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, lon - dlon, lon + dlon
+
+def haversine_distance(lat_col, lon_col, lat: float, lon: float):
+    """SQL výraz: vzdálenost (m) mezi sloupci lat_col/lon_col a bodem lat/lon."""
+    dlat = func.radians(lat_col - lat)
+    dlon = func.radians(lon_col - lon)
+    a = (
+        func.power(func.sin(dlat / 2), 2)
+        + func.cos(func.radians(lat)) * func.cos(func.radians(lat_col)) * func.power(func.sin(dlon / 2), 2)
+    )
+    # LEAST ošetří zaokrouhlovací chybu (a > 1 -> asin mimo definiční obor)
+    return 2 * EARTH_RADIUS_M * func.asin(func.sqrt(func.least(a, 1.0)))
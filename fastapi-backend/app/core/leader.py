@@ -0,0 +1,26 @@
+import os
+import socket
+import uuid
+
+from redis.asyncio import Redis
+
+# Identita tohoto workeru (proces) pro volbu lídra přes Redis
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Prodloužení zámku jen pokud ho stále držíme my (atomicky v Redisu)
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+async def acquire_leadership(redis: Redis, name: str, ttl_seconds: int) -> bool:
+    """
+    Jednoduchá volba lídra: úlohu provádí jen worker, který drží zámek leader:{name}.
+    Lídr si zámek při každém běhu prodlouží; když vypadne, po TTL ho převezme jiný worker.
+    """
+    key = f"leader:{name}"
+    if await redis.set(key, WORKER_ID, nx=True, ex=ttl_seconds):
+        return True
+    return bool(await redis.eval(_RENEW_SCRIPT, 1, key, WORKER_ID, ttl_seconds))
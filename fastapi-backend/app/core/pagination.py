@@ -0,0 +1,23 @@
+import base64
+import json
+
+# Keyset (cursor) stránkování.
+# Kurzor je pro klienta neprůhledný řetězec - base64url z JSONu s hodnotami
+# posledního řádku stránky (např. {"id": 123}). Klient ho jen posílá zpátky.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """Vyhodí ValueError, pokud kurzor není platný."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+# Rychlá JSON odpověď pro velké seznamy (nabíječky, historie transakcí).
+#
+# Výchozí cesta FastAPI: validace do response_model -> jsonable_encoder (Python dict/list)
+# -> json.dumps. Tady pydantic-core validuje ORM objekty (from_attributes) a serializuje
+# rovnou do bytes, bez mezivrstvy Python objektů. Bez další závislosti (orjson apod.).
+#
+# Endpoint si ji zapíná sám tím, že vrátí ModelListResponse; response_model u routy
+# zůstává kvůli OpenAPI dokumentaci.
+
+@lru_cache
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+def dump_model_list(model: type[BaseModel], items: Iterable[Any]) -> bytes:
+    """Seznam ORM objektů / dictů -> JSON bytes podle Pydantic modelu."""
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+class ModelListResponse(Response):
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        model: type[BaseModel],
+        items: Iterable[Any],
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+    ):
+        super().__init__(content=dump_model_list(model, items), status_code=status_code, headers=headers)
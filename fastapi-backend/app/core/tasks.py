@@ -0,0 +1,37 @@
+import asyncio
+from typing import Awaitable, Callable
+
+# Periodické úlohy běžící na pozadí uvnitř workeru (spouští se v lifespan, app/main.py)
+
+async def _run_periodic(name: str, interval: float, job: Callable[[], Awaitable[object]]):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Chyba jedné iterace nesmí zastavit celou smyčku
+            print(f"⚠️ Periodic task '{name}' failed: {e}")
+
+
+class PeriodicTasks:
+    def __init__(self):
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def start(self, name: str, interval: float, job: Callable[[], Awaitable[object]]):
+        if name in self._tasks:
+            return
+        self._tasks[name] = asyncio.create_task(_run_periodic(name, interval, job), name=name)
+
+    def spawn(self, name: str, job: Callable[[], Awaitable[object]]):
+        """Spustí dlouhodobě běžící úlohu (např. Redis pub/sub listener)."""
+        if name in self._tasks:
+            return
+        self._tasks[name] = asyncio.create_task(job(), name=name)
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,78 @@
+import redis.asyncio as redis
+
+from app.core.config import config
+
+# Jeden pool a jeden klient na proces (uvicorn worker).
+# Vytváří se líně při prvním použití, nebo v lifespan (app/main.py).
+_pool: redis.BlockingConnectionPool | None = None
+_client: redis.Redis | None = None
+
+
+def _create_pool() -> redis.BlockingConnectionPool:
+    # BlockingConnectionPool: když dojdou spojení, request počká (redis_pool_timeout)
+    # místo okamžité chyby "Too many connections".
+    return redis.BlockingConnectionPool(
+        host=config.redis_host,
+        port=config.redis_port,
+        decode_responses=True,
+        max_connections=config.redis_max_connections,
+        timeout=config.redis_pool_timeout,
+        socket_timeout=config.redis_socket_timeout,
+        socket_connect_timeout=config.redis_socket_connect_timeout,
+        health_check_interval=config.redis_health_check_interval,
+    )
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Vrátí sdíleného Redis klienta nad aplikačním connection poolem.
+    Klient se NEZAVÍRÁ po requestu - spojení se vrací zpět do poolu.
+    """
+    global _pool, _client
+    if _client is None:
+        _pool = _create_pool()
+        _client = redis.Redis(connection_pool=_pool)
+    return _client
+
+
+async def init_redis_pool() -> redis.Redis:
+    """Voláno při startu aplikace (lifespan)."""
+    client = get_redis_client()
+    try:
+        await client.ping()
+    except redis.RedisError as e:
+        # Redis nemusí při startu ještě běžet (docker compose) - spojení se naváže později.
+        print(f"⚠️ Redis is not reachable on startup: {e}")
+    return client
+
+
+async def close_redis_pool():
+    """Voláno při vypnutí aplikace (lifespan). Zavře všechna spojení v poolu."""
+    global _pool, _client
+    if _client is not None:
+        await _client.aclose()
+    if _pool is not None:
+        await _pool.disconnect()
+    _pool = None
+    _client = None
+
+
+def get_pool_stats() -> dict:
+    """
+    Statistiky poolu pro monitoring (počet spojení v použití / volných).
+    """
+    if _pool is None:
+        return {"initialized": False, "max_connections": config.redis_max_connections}
+
+    # Interní atributy redis-py (nejsou veřejné API, proto getattr s defaultem)
+    available = getattr(_pool, "_available_connections", ())
+    in_use = getattr(_pool, "_in_use_connections", ())
+
+    return {
+        "initialized": True,
+        "max_connections": _pool.max_connections,
+        "in_use_connections": len(in_use),
+        "idle_connections": len(available),
+        "created_connections": len(in_use) + len(available),
+        "pool_timeout": _pool.timeout,
+    }
@@ -7,7 +7,7 @@ from app.models.enums import UserRole, CurrentType, ConnectorType, ChargeStatus
 # ZMĚNA: Importy pro async SQLAlchemy
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy import (
-    String, Float, DateTime, Enum as SQLEnum, ForeignKey, Numeric, Integer, Boolean, UniqueConstraint
+    String, Float, DateTime, Enum as SQLEnum, ForeignKey, Numeric, Integer, Boolean, UniqueConstraint, Index, text
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -154,10 +154,23 @@ class Charger(Base):
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
     )
 
+    # Poslední Heartbeat (zapisuje se dávkově - viz ChargerService.flush_heartbeats)
+    last_heartbeat: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
     owner: Mapped["User"] = relationship(back_populates="chargers")
     connectors: Mapped[List["Connector"]] = relationship(back_populates="charger")
     charge_logs: Mapped[List["ChargeLog"]] = relationship(back_populates="charger")
 
+    __table_args__ = (
+        # Keyset stránkování "Moje nabíječky" (WHERE owner_id = ... AND id > :cursor ORDER BY id);
+        # veřejný seznam stačí primární klíč
+        Index("ix_chargers_owner_id_id", "owner_id", "id"),
+        # Hledání podle polohy (obdélníkový předfiltr, viz ChargerService.find_nearby)
+        Index("ix_chargers_active_lat_lon", "latitude", "longitude", postgresql_where=text("is_active")),
+        # Fulltext (GIN trigram nad charger_search_text(...)) je jen v migraci c3d7e1a94b52 -
+        # potřebuje extenze pg_trgm/unaccent a vlastní funkce, viz ChargerService.search_chargers
+    )
+
 ########################
 # Charge logs
 ########################
@@ -222,4 +235,35 @@ class ChargeLog(Base):
     user: Mapped[Optional["User"]] = relationship(back_populates="charge_logs")
     charger: Mapped[Optional["Charger"]] = relationship(back_populates="charge_logs")
     connector: Mapped[Optional["Connector"]] = relationship(back_populates="charge_logs")
-    card: Mapped[Optional["RFIDCard"]] = relationship(back_populates="charge_logs")
\ No newline at end of file
+    card: Mapped[Optional["RFIDCard"]] = relationship(back_populates="charge_logs")
+
+    __table_args__ = (
+        # Historie nabíjení: keyset (start_time, id) DESC pro uživatele / nabíječku / admina
+        Index("ix_charge_logs_user_id_start_time", "user_id", "start_time", "id"),
+        Index("ix_charge_logs_charger_id_start_time", "charger_id", "start_time", "id"),
+        Index("ix_charge_logs_start_time_id", "start_time", "id"),
+        # Úklid visících transakcí (status = running AND last_update < ...)
+        Index("ix_charge_logs_status_last_update", "status", "last_update"),
+    )
+
+########################
+# Meter samples
+########################
+
+class MeterSample(Base):
+    """
+    Append-only časová řada stavů elektroměru pro každou transakci.
+    Tabulka je v PostgreSQL partitionovaná po měsících podle sampled_at
+    (partitions zakládá MeterSampleService.ensure_partitions).
+    Zapisuje se jen dávkově (MeterSampleService.flush), nikdy přes ORM po jednom.
+    """
+    __tablename__ = "meter_samples"
+
+    transaction_id: Mapped[int] = mapped_column(
+        ForeignKey("charge_logs.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    sampled_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    meter_wh: Mapped[int] = mapped_column(Integer, nullable=False)  # Stav elektroměru ve Wh
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (sampled_at)"}
\ No newline at end of file
@@ -1,15 +1,69 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import config
+from app.core.tasks import PeriodicTasks
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.db.redis_pool import init_redis_pool, close_redis_pool
+from app.services import jobs
+from app.services.charger_lookup import listen_for_invalidations
+from app.services.status_stream import status_broadcaster
 from app.api.v1 import user, charger, connector, rfid, transaction, login, internal # Importujeme routery
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start: sdílený Redis connection pool pro celý worker
+    redis_client = await init_redis_pool()
+
+    # Partitions pro meter_samples musí existovat dřív, než přijdou první vzorky
+    try:
+        await jobs.ensure_meter_sample_partitions_job()
+    except Exception as e:
+        print(f"⚠️ Could not ensure meter_samples partitions: {e}")
+
+    # Staré klíče živého stavu (před hashem charger:{ocpp_id}:state)
+    try:
+        await jobs.migrate_charger_state_job()
+    except Exception as e:
+        print(f"⚠️ Could not migrate charger state keys: {e}")
+
+    # Úlohy na pozadí
+    tasks = PeriodicTasks()
+    tasks.spawn("charger_lookup_invalidation", lambda: listen_for_invalidations(redis_client))
+    tasks.spawn("status_stream", lambda: status_broadcaster.run(redis_client))
+    if config.heartbeat_write_behind:
+        tasks.start("flush_heartbeats", config.heartbeat_flush_interval_seconds, jobs.flush_heartbeats_job)
+    tasks.start("flush_meter_samples", config.meter_sample_flush_interval_seconds, jobs.flush_meter_samples_job)
+    if config.meter_value_coalesce_seconds > 0:
+        tasks.start("flush_meter_values", config.meter_value_coalesce_seconds, jobs.flush_meter_values_job)
+    tasks.start("ensure_meter_sample_partitions", 3600, jobs.ensure_meter_sample_partitions_job)
+    tasks.start("prune_stale_transactions", config.stale_transaction_prune_interval_seconds, jobs.prune_stale_transactions_job)
+
+    yield
+
+    # Shutdown: zastavení úloh, poslední flush a zavření všech spojení v poolu
+    await tasks.stop()
+    final_flushes = [jobs.flush_meter_samples_job]
+    if config.heartbeat_write_behind:
+        final_flushes.append(jobs.flush_heartbeats_job)
+    if config.meter_value_coalesce_seconds > 0:
+        final_flushes.append(jobs.flush_meter_values_job)
+    for flush in final_flushes:
+        try:
+            await flush()
+        except Exception as e:
+            print(f"⚠️ Final flush ({flush.__name__}) failed: {e}")
+    await close_redis_pool()
+
 app = FastAPI(
     title=config.project_name,
     version=config.project_version,
     openapi_url="/api/v1/openapi.json",
     docs_url="/api/v1/docs",
     redoc_url="/api/v1/redoc",
+    lifespan=lifespan,
 )
 
 # Nastavení CORS (aby se na API dalo volat z frontendu/prohlížeče)
@@ -20,6 +74,7 @@ if config.backend_cors_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"],  # Kurzor další stránky a ETag musí být čitelné i z prohlížeče
     )
 
 @app.get("/", include_in_schema=False)
@@ -30,6 +30,14 @@ class ChargeLogUpdate(BaseModel):
     price: Optional[Decimal] = None
     status: Optional[ChargeStatus] = None
 
+class ChargeLogFilter(BaseModel):
+    """
+    Filtry historie nabíjení (query parametry GET /transactions a /transactions/usage).
+    """
+    status: Optional[ChargeStatus] = None
+    start_from: Optional[datetime] = None # start_time >= start_from
+    start_to: Optional[datetime] = None   # start_time < start_to
+
 class ChargeLogRead(ChargeLogBase):
     id: int
     user_id: Optional[int]
@@ -65,4 +73,5 @@ class TransactionStopRequest(BaseModel):
 
 class TransactionMeterValueRequest(BaseModel):
     transaction_id: int
-    meter_value: int
\ No newline at end of file
+    meter_value: int
+    timestamp: Optional[datetime] = None # Čas vzorku z nabíječky (jinak čas serveru)
\ No newline at end of file
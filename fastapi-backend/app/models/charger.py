@@ -1,7 +1,9 @@
 from datetime import datetime
+from decimal import Decimal
 from typing import Optional, List
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from app.models.connector import ConnectorRead
+from app.models.enums import ConnectorType, CurrentType
 
 class ChargerTechnicalStatus(BaseModel):
     """
@@ -85,4 +87,52 @@ class ChargerRead(ChargerBase):
 
     connectors: List[ConnectorRead] = [] 
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ChargerSummary(BaseModel):
+    """
+    Kompaktní nabíječka pro špendlík na mapě (GET /chargers/summary).
+    Bez adresy, technických dat a seznamu konektorů.
+    """
+    id: int
+    latitude: float
+    longitude: float
+    status: str                              # Connected / Disconnected / Disabled
+    available_connectors: int = 0            # Aktivní konektory se statusem Available
+    max_power_w: Optional[int] = None        # Nejvyšší výkon z aktivních konektorů
+    min_price_per_kwh: Optional[Decimal] = None # Nejnižší cena z aktivních konektorů
+
+
+class ChargerNearbyRead(ChargerRead):
+    """
+    Nabíječka ve výsledku hledání podle polohy (GET /chargers/nearby).
+    """
+    distance_m: float # Vzdálenost od zadaného bodu v metrech
+
+class ChargerFilter(BaseModel):
+    """
+    Filtry seznamu nabíječek (query parametry GET /chargers).
+    Nabíječka projde, pokud má aspoň jeden aktivní konektor splňující všechny podmínky.
+    """
+    available: bool = False                  # Jen volné konektory (status Available, nabíječka online)
+    connector_type: Optional[ConnectorType] = None
+    current_type: Optional[CurrentType] = None
+    min_power_w: Optional[int] = Field(None, ge=0)
+    max_price: Optional[Decimal] = Field(None, ge=0) # Max. cena za kWh
+
+    def is_empty(self) -> bool:
+        return self == ChargerFilter()
+
+    def cache_key(self) -> str:
+        """Část klíče pro cache veřejného seznamu."""
+        return ",".join(f"{k}={v}" for k, v in self.model_dump(exclude_defaults=True, mode="json").items())
+
+class ChargerCluster(BaseModel):
+    """
+    Shluk nabíječek na mapě (GET /chargers/clusters).
+    """
+    latitude: float             # Těžiště shluku
+    longitude: float
+    count: int                  # Počet nabíječek
+    available: int              # Z toho online a s volným konektorem
+    charger_id: Optional[int] = None # Jen pokud je ve shluku jediná nabíječka
@@ -0,0 +1,56 @@
+from typing import Annotated, Any, Literal, Optional, Union
+from pydantic import BaseModel, Field
+
+from app.models.charge_log import (
+    TransactionStartRequest,
+    TransactionStopRequest,
+    TransactionMeterValueRequest
+)
+from app.models.connector import ConnectorStatusUpdate
+
+# Maximální počet událostí v jedné dávce (/internal/batch)
+MAX_BATCH_EVENTS = 500
+
+# --- Události dávky ---
+# Každá událost nese pole "type" (discriminator) a stejná data jako samostatný endpoint.
+# Transakční události mají navíc idempotency_key - stejný klíč, jaký samostatný
+# endpoint dostává v hlavičce Idempotency-Key ("{ocpp_id}:{OCPP messageId}").
+
+class HeartbeatEvent(BaseModel):
+    type: Literal["heartbeat"]
+    ocpp_id: str
+
+class StatusEvent(ConnectorStatusUpdate):
+    type: Literal["status"]
+
+class MeterValueEvent(TransactionMeterValueRequest):
+    type: Literal["meter_value"]
+    idempotency_key: Optional[str] = Field(None, max_length=255)
+
+class StartTransactionEvent(TransactionStartRequest):
+    type: Literal["start"]
+    idempotency_key: Optional[str] = Field(None, max_length=255)
+
+class StopTransactionEvent(TransactionStopRequest):
+    type: Literal["stop"]
+    idempotency_key: Optional[str] = Field(None, max_length=255)
+
+InternalEvent = Annotated[
+    Union[HeartbeatEvent, StatusEvent, MeterValueEvent, StartTransactionEvent, StopTransactionEvent],
+    Field(discriminator="type")
+]
+
+class InternalBatchRequest(BaseModel):
+    # Události se zpracují přesně v tomto pořadí
+    events: list[InternalEvent] = Field(..., max_length=MAX_BATCH_EVENTS)
+
+class InternalEventResult(BaseModel):
+    index: int                      # Pozice události v dávce
+    type: str
+    ok: bool
+    status_code: int = 200          # HTTP kód, který by vrátil samostatný endpoint
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+
+class InternalBatchResponse(BaseModel):
+    results: list[InternalEventResult]
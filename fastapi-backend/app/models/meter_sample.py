@@ -0,0 +1,9 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+
+class MeterSampleRead(BaseModel):
+    sampled_at: datetime
+    meter_wh: int       # Stav elektroměru ve Wh
+    energy_wh: int      # Energie od začátku transakce (meter_wh - meter_start)
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,87 @@
+from redis.asyncio import Redis
+
+from app.models.enums import ConnectorType, CurrentType
+
+# Redis indexy VOLNÝCH konektorů (status Available, konektor aktivní) pro filtrování
+# seznamu nabíječek (GET /chargers?available=true&connector_type=&min_power_w=&max_price=).
+#
+# Člen všech množin je "{charger_id}:{ocpp_number}".
+#   avail:power             -> sorted set, skóre = max_power_w (všechny volné konektory)
+#   avail:type:{type}       -> sorted set, skóre = max_power_w (jen daný typ konektoru)
+#   avail:current:{AC|DC}   -> set
+#   avail:price             -> sorted set, skóre = price_per_kwh (jen konektory s cenou)
+#
+# Aktualizuje se při každém StatusNotification (idempotentní -> index se sám opraví)
+# a při úpravě konektoru majitelem. Zapnutí/smazání nabíječky a online stav ověřuje
+# až dotaz do Postgres / živý stav, index jen zúží kandidáty.
+
+POWER_KEY = "avail:power"
+PRICE_KEY = "avail:price"
+
+def _type_key(connector_type: ConnectorType | str) -> str:
+    return f"avail:type:{getattr(connector_type, 'value', connector_type)}"
+
+def _current_key(current_type: CurrentType | str) -> str:
+    return f"avail:current:{getattr(current_type, 'value', current_type)}"
+
+def _member(charger_id: int, ocpp_number: int) -> str:
+    return f"{charger_id}:{ocpp_number}"
+
+async def update_connector_availability(redis: Redis | None, connector, status: str | None):
+    """
+    Zařadí konektor (ORM objekt / cokoliv se stejnými atributy) do indexů, pokud je volný,
+    jinak ho ze všech indexů odebere. Vše v jedné pipeline.
+    """
+    if not redis:
+        return
+
+    member = _member(connector.charger_id, connector.ocpp_number)
+    available = status == "Available" and connector.is_active
+
+    async with redis.pipeline(transaction=True) as pipe:
+        # Nejdřív odebrat všude (typ / proud / cena se mohly změnit)
+        pipe.zrem(POWER_KEY, member)
+        pipe.zrem(PRICE_KEY, member)
+        for connector_type in ConnectorType:
+            pipe.zrem(_type_key(connector_type), member)
+        for current_type in CurrentType:
+            pipe.srem(_current_key(current_type), member)
+
+        if available:
+            power = connector.max_power_w or 0
+            pipe.zadd(POWER_KEY, {member: power})
+            if connector.type:
+                pipe.zadd(_type_key(connector.type), {member: power})
+            if connector.current_type:
+                pipe.sadd(_current_key(connector.current_type), member)
+            if connector.price_per_kwh is not None:
+                pipe.zadd(PRICE_KEY, {member: float(connector.price_per_kwh)})
+
+        await pipe.execute()
+
+async def find_available_charger_ids(
+    redis: Redis,
+    connector_type: ConnectorType | None = None,
+    current_type: CurrentType | None = None,
+    min_power_w: int | None = None,
+    max_price: float | None = None,
+) -> set[int]:
+    """
+    Id nabíječek, které mají aspoň jeden volný konektor splňující VŠECHNY podmínky.
+    Jedna pipeline; průnik se dělá po konektorech (ne po nabíječkách).
+    """
+    power_key = _type_key(connector_type) if connector_type else POWER_KEY
+
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.zrangebyscore(power_key, min_power_w if min_power_w is not None else "-inf", "+inf")
+        if current_type:
+            pipe.smembers(_current_key(current_type))
+        if max_price is not None:
+            pipe.zrangebyscore(PRICE_KEY, "-inf", max_price)
+        replies = await pipe.execute()
+
+    members = set(replies[0])
+    for other in replies[1:]:
+        members &= set(other)
+
+    return {int(member.split(":", 1)[0]) for member in members}
@@ -0,0 +1,47 @@
+import hashlib
+from redis.asyncio import Redis
+
+from app.core.config import config
+
+# Verzovaná cache veřejného seznamu nabíječek (GET /api/v1/chargers).
+#
+# chargers:list:version -> číslo verze; zvyšuje se při každé změně, kterou seznam ukazuje
+#   (katalog nabíječek/konektorů, status konektoru, online/offline nabíječky).
+# chargers:list:{version}:{variant} -> hash(etag, body, next_cursor) - serializovaná odpověď.
+#
+# ETag je hash těla odpovědi, takže i po vypršení cache (např. nabíječka přešla do offline
+# zestárnutím heartbeatu, což verzi nezvýší) dostane klient 304, pokud se nic nezměnilo.
+
+CHARGER_LIST_VERSION_KEY = "chargers:list:version"
+
+def _entry_key(version: int, variant: str) -> str:
+    return f"chargers:list:{version}:{variant}"
+
+async def bump_charger_list_version(redis: Redis | None):
+    """Zneplatní všechny uložené varianty seznamu (staré verze vyprší samy)."""
+    if redis:
+        await redis.incr(CHARGER_LIST_VERSION_KEY)
+
+async def get_cached_charger_list(redis: Redis, variant: str) -> tuple[int, dict | None]:
+    """Vrátí (aktuální verze, uložená odpověď nebo None)."""
+    version = int(await redis.get(CHARGER_LIST_VERSION_KEY) or 0)
+    cached = await redis.hgetall(_entry_key(version, variant))
+    return version, cached or None
+
+async def store_charger_list(redis: Redis, variant: str, version: int, body: bytes, next_cursor: str | None) -> str:
+    """Uloží serializovanou odpověď pro danou verzi a vrátí její ETag."""
+    etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+    key = _entry_key(version, variant)
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={"etag": etag, "body": body.decode(), "next_cursor": next_cursor or ""})
+        pipe.expire(key, config.charger_list_cache_ttl_seconds)
+        await pipe.execute()
+
+    return etag
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
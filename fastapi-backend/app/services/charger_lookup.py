@@ -0,0 +1,94 @@
+import asyncio
+from dataclasses import dataclass
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from redis.asyncio import Redis
+
+from app.core.cache import TTLCache
+from app.core.config import config
+from app.db.schema import Charger
+
+# Kanál pro invalidaci cache napříč workery (zpráva = ocpp_id)
+INVALIDATION_CHANNEL = "cache:charger_lookup:invalidate"
+
+@dataclass(frozen=True)
+class ChargerLookup:
+    """Minimum údajů o nabíječce, které potřebuje zpracování OCPP zpráv."""
+    id: int
+    owner_id: int
+    is_active: bool
+    is_enabled: bool
+    latitude: float | None = None    # Poloha kvůli filtrování živých událostí (status_stream)
+    longitude: float | None = None
+
+# Jedna cache na worker: ocpp_id -> ChargerLookup
+_cache = TTLCache(
+    maxsize=config.charger_lookup_cache_size,
+    ttl=config.charger_lookup_cache_ttl_seconds
+)
+
+async def get_charger_lookup(session: AsyncSession, ocpp_id: str) -> ChargerLookup | None:
+    """
+    Najde nabíječku podle ocpp_id - nejdřív v in-process cache, pak v DB.
+    Neexistující ocpp_id se do cache neukládá (nová nabíječka je vidět hned).
+    """
+    cached = _cache.get(ocpp_id)
+    if cached is not None:
+        return cached
+
+    stmt = select(
+        Charger.id, Charger.owner_id, Charger.is_active, Charger.is_enabled,
+        Charger.latitude, Charger.longitude
+    ).where(Charger.ocpp_id == ocpp_id)
+    result = await session.execute(stmt)
+    row = result.first()
+    if not row:
+        return None
+
+    lookup = ChargerLookup(
+        id=row.id,
+        owner_id=row.owner_id,
+        is_active=row.is_active,
+        is_enabled=row.is_enabled,
+        latitude=row.latitude,
+        longitude=row.longitude
+    )
+    _cache.set(ocpp_id, lookup)
+    return lookup
+
+async def invalidate_charger_lookup(redis: Redis | None, ocpp_id: str | None):
+    """
+    Zneplatní záznam v tomto workeru a (přes Redis pub/sub) ve všech ostatních.
+    """
+    if not ocpp_id:
+        return
+    _cache.pop(ocpp_id)
+    if redis:
+        await redis.publish(INVALIDATION_CHANNEL, ocpp_id)
+
+def clear_charger_lookup_cache():
+    _cache.clear()
+
+async def listen_for_invalidations(redis: Redis):
+    """
+    Běží na pozadí po celou dobu života workeru (spouští lifespan v app/main.py).
+    Při výpadku spojení se cache celá vyprázdní - mohli jsme zmeškat zprávy.
+    """
+    while True:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            _cache.clear()
+            while True:
+                # Krátký timeout místo blokujícího listen() (pool má socket_timeout)
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message["type"] == "message":
+                    _cache.pop(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Charger lookup invalidation listener error: {e}")
+            _cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
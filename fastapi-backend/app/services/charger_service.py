@@ -1,48 +1,235 @@
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, attributes
-from sqlalchemy import select
+from sqlalchemy import select, update, values, column, func, and_, or_, String, DateTime
 from redis.asyncio import Redis
 
+from app.core.config import config
+from app.core.geo import bounding_box, haversine_distance
+
 # Sloučené importy z obou větví
-from app.db.schema import Charger, RFIDCard
+from app.db.schema import Charger, Connector
+from app.services.charger_lookup import get_charger_lookup, invalidate_charger_lookup
+from app.services.rfid_auth_cache import get_card_auth
+from app.services.cluster_service import invalidate_cluster_tiles, invalidate_cluster_availability
+from app.services.charger_list_cache import bump_charger_list_version
+from app.services.status_stream import publish_status_event
+from app.services import charger_state
+from app.services.availability_index import find_available_charger_ids
 from app.models.charger import (
     ChargerCreate, 
     ChargerUpdate, 
-    ChargerTechnicalStatus
+    ChargerTechnicalStatus,
+    ChargerFilter
 )
 
+# Redis hash s čekajícími heartbeaty: ocpp_id -> ISO čas posledního heartbeatu
+HEARTBEAT_PENDING_KEY = "heartbeat:pending"
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 class ChargerService:
     def __init__(self, session: AsyncSession, redis: Redis = None):
         self._db = session
         self._redis = redis
 
     # ZMĚNA: Přidán parametr owner_id pro filtrování (Moje nabíječky)
-    async def list_chargers(self, skip: int = 0, limit: int = 100, owner_id: int | None = None, show_all: bool = False) -> list[Charger]:
+    async def list_chargers(self, limit: int = 100, owner_id: int | None = None, show_all: bool = False, after_id: int | None = None, filters: ChargerFilter | None = None) -> list[Charger]:
+        """
+        Seznam nabíječek seřazený podle id.
+        after_id = keyset stránkování (id poslední nabíječky předchozí stránky).
+        filters = parametry konektorů; available=true nejdřív zúží kandidáty přes Redis
+        indexy volných konektorů (viz availability_index), až pak jde dotaz do Postgres.
+        """
         stmt = select(Charger).options(selectinload(Charger.connectors))
+
+        if filters and not filters.is_empty():
+            if filters.available and self._redis:
+                charger_ids = await find_available_charger_ids(
+                    self._redis,
+                    connector_type=filters.connector_type,
+                    current_type=filters.current_type,
+                    min_power_w=filters.min_power_w,
+                    max_price=float(filters.max_price) if filters.max_price is not None else None,
+                )
+                if not charger_ids:
+                    return []
+                stmt = stmt.where(Charger.id.in_(charger_ids))
+            stmt = stmt.where(Charger.connectors.any(and_(*self._connector_conditions(filters))))
         
         if owner_id:
             stmt = stmt.where(Charger.owner_id == owner_id)
             
         if not show_all:
              stmt = stmt.where(Charger.is_active == True) # noqa: E712
-            
-        stmt = stmt.offset(skip).limit(limit)
+
+        stmt = stmt.order_by(Charger.id).limit(limit)
+
+        if not (filters and filters.available):
+            return await self._load_chargers(stmt, after_id)
+
+        # Index nezná online stav nabíječky ani zapnutí -> ověříme z živého stavu.
+        # Vyřazení kandidáti by stránku zkrátili (a route by pak nevrátila kurzor),
+        # proto dočítáme další dávky od posledního PROHLÉDNUTÉHO id, dokud není plná.
+        chargers = []
+        while True:
+            batch = await self._load_chargers(stmt, after_id)
+            chargers.extend(
+                c for c in batch
+                if c.status == "Connected" and any(getattr(conn, "status", None) == "Available" for conn in c.connectors)
+            )
+            if len(batch) < limit or len(chargers) >= limit:
+                return chargers[:limit]
+            after_id = batch[-1].id
+
+    async def _load_chargers(self, stmt, after_id: int | None) -> list[Charger]:
+        if after_id is not None:
+            stmt = stmt.where(Charger.id > after_id)
         result = await self._db.execute(stmt)
         chargers = result.scalars().all()
-        
-        await self._enrich_chargers_with_status(chargers)
-        await self._enrich_chargers_with_device_status(chargers)
+
+        await self._enrich_chargers(chargers)
+        return chargers
+
+    @staticmethod
+    def _connector_conditions(filters: ChargerFilter) -> list:
+        conditions = [Connector.is_active == True] # noqa: E712
+        if filters.connector_type:
+            conditions.append(Connector.type == filters.connector_type)
+        if filters.current_type:
+            conditions.append(Connector.current_type == filters.current_type)
+        if filters.min_power_w is not None:
+            conditions.append(Connector.max_power_w >= filters.min_power_w)
+        if filters.max_price is not None:
+            conditions.append(Connector.price_per_kwh <= filters.max_price)
+        return conditions
+
+    async def list_charger_summaries(self, limit: int = 100, after_id: int | None = None) -> list[dict]:
+        """
+        Kompaktní seznam aktivních nabíječek pro mapu (viz ChargerSummary).
+        Jeden Core dotaz jen na potřebné sloupce (agregace konektorů v DB, žádné ORM objekty)
+        a jedna Redis pipeline pro živý stav.
+        """
+        active_connector = Connector.is_active == True # noqa: E712
+        stmt = (
+            select(
+                Charger.id, Charger.ocpp_id, Charger.is_enabled, Charger.latitude, Charger.longitude,
+                func.max(Connector.max_power_w).filter(active_connector).label("max_power_w"),
+                func.min(Connector.price_per_kwh).filter(active_connector).label("min_price_per_kwh"),
+                func.array_remove(
+                    func.array_agg(Connector.ocpp_number).filter(active_connector), None
+                ).label("connectors"),
+            )
+            .outerjoin(Connector, Connector.charger_id == Charger.id)
+            .where(Charger.is_active == True) # noqa: E712
+            .group_by(Charger.id)
+            .order_by(Charger.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(Charger.id > after_id)
+
+        rows = (await self._db.execute(stmt)).all()
+        states = await charger_state.get_states(self._redis, [row.ocpp_id for row in rows]) if self._redis else [{}] * len(rows)
+
+        now = datetime.now(timezone.utc)
+        summaries = []
+        for row, state in zip(rows, states):
+            charger_status = charger_state.device_status(row.is_enabled, state, now)
+
+            available = 0
+            if charger_status == "Connected":
+                available = sum(
+                    1 for number in row.connectors or []
+                    if charger_state.connector_status(state, number) == "Available"
+                )
+
+            summaries.append({
+                "id": row.id,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+                "status": charger_status,
+                "available_connectors": available,
+                "max_power_w": row.max_power_w,
+                "min_price_per_kwh": row.min_price_per_kwh,
+            })
+        return summaries
+
+    async def search_chargers(self, q: str, limit: int = 20, offset: int = 0) -> list[Charger]:
+        """
+        Hledání aktivních nabíječek podle názvu, města, ulice a PSČ.
+        Bez ohledu na velikost písmen a diakritiku ("plzen" najde "Plzeň").
+        Jde přes GIN trigram index nad charger_search_text(...) (migrace c3d7e1a94b52):
+        podřetězec (LIKE) nebo podobné slovo (<%, překlepy). Řazení: nejdřív přesná shoda
+        podřetězce, pak podle word_similarity.
+        """
+        document = func.charger_search_text(Charger.name, Charger.city, Charger.street, Charger.postal_code)
+        query = func.f_unaccent(func.lower(q))
+        pattern = func.f_unaccent(func.lower("%" + _escape_like(q) + "%"))
+
+        contains = document.like(pattern, escape="\\")
+        rank = func.word_similarity(query, document)
+
+        stmt = (
+            select(Charger)
+            .options(selectinload(Charger.connectors))
+            .where(
+                Charger.is_active == True, # noqa: E712
+                or_(contains, query.op("<%")(document)),
+            )
+            .order_by(contains.desc(), rank.desc(), Charger.id)
+            .offset(offset)
+            .limit(limit)
+        )
+        result = await self._db.execute(stmt)
+        chargers = result.scalars().all()
+
+        await self._enrich_chargers(chargers)
+        return chargers
+
+    async def find_nearby(self, lat: float, lon: float, radius_m: float, limit: int = 10) -> list[Charger]:
+        """
+        Nejbližší aktivní nabíječky v okruhu radius_m, seřazené podle vzdálenosti.
+        Obdélník kolem bodu jde přes index (latitude, longitude), přesnou vzdálenost
+        (haversine) a řazení počítá DB jen pro nabíječky uvnitř obdélníku.
+        Každá nabíječka dostane runtime atribut distance_m.
+        """
+        distance = haversine_distance(Charger.latitude, Charger.longitude, lat, lon).label("distance_m")
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_m)
+
+        stmt = (
+            select(Charger, distance)
+            .options(selectinload(Charger.connectors))
+            .where(
+                Charger.is_active == True, # noqa: E712
+                Charger.latitude.between(min_lat, max_lat),
+            )
+        )
+        if min_lon is not None:
+            stmt = stmt.where(Charger.longitude.between(min_lon, max_lon))
+
+        stmt = stmt.where(distance <= radius_m).order_by(distance).limit(limit)
+        result = await self._db.execute(stmt)
+
+        chargers = []
+        for charger, distance_m in result.all():
+            charger.distance_m = round(distance_m, 1)
+            chargers.append(charger)
+
+        await self._enrich_chargers(chargers)
         return chargers
 
-    async def get_charger(self, charger_id: int) -> Charger | None:
+    async def get_charger(self, charger_id: int, enrich: bool = True) -> Charger | None:
+        """
+        enrich=False -> bez živého stavu z Redisu (např. jen kontrola vlastníka).
+        """
         stmt = select(Charger).options(selectinload(Charger.connectors)).where(Charger.id == charger_id)
         result = await self._db.execute(stmt)
         charger = result.scalars().first()
         
-        if charger:
-            await self._enrich_chargers_with_status([charger])
-            await self._enrich_chargers_with_device_status([charger])
+        if charger and enrich:
+            await self._enrich_chargers([charger])
             
         return charger
 
@@ -89,28 +276,45 @@ class ChargerService:
         await self._db.refresh(charger)
         
         attributes.set_committed_value(charger, "connectors", [])
+        await invalidate_cluster_tiles(self._redis, (charger.latitude, charger.longitude))
+        await bump_charger_list_version(self._redis)
         return charger
 
     async def update_charger(self, charger_id: int, data: ChargerUpdate) -> Charger | None:
-        charger = await self.get_charger(charger_id)
+        charger = await self.get_charger(charger_id, enrich=False)
         if not charger:
             return None
 
+        old_position = (charger.latitude, charger.longitude)
         update_data = data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(charger, key, value)
 
         await self._db.commit()
         await self._db.refresh(charger)
+        # Živý stav až po změně (status nabíječky závisí na is_enabled)
+        await self._enrich_chargers([charger])
+
+        # is_active / is_enabled se mohly změnit -> zneplatnit cache ve všech workerech
+        await invalidate_charger_lookup(self._redis, charger.ocpp_id)
+        # Shluky na mapě: původní i nová poloha (přesun, skrytí, vypnutí)
+        await invalidate_cluster_tiles(self._redis, old_position, (charger.latitude, charger.longitude))
+        await bump_charger_list_version(self._redis)
         return charger
 
     async def delete_charger(self, charger_id: int) -> bool:
-        charger = await self.get_charger(charger_id)
+        charger = await self.get_charger(charger_id, enrich=False)
         if not charger:
             return False
         
+        ocpp_id = charger.ocpp_id
+        position = (charger.latitude, charger.longitude)
         await self._db.delete(charger)
         await self._db.commit()
+
+        await invalidate_charger_lookup(self._redis, ocpp_id)
+        await invalidate_cluster_tiles(self._redis, position)
+        await bump_charger_list_version(self._redis)
         return True
     
     # --- Metody pro BootNotification / Auto-discovery ---
@@ -136,50 +340,44 @@ class ChargerService:
         
         await self._db.commit()
         await self._db.refresh(charger)
+        await bump_charger_list_version(self._redis)
         return charger
 
     # --- Metody pro Authorize (RFID) ---
 
     async def authorize_tag(self, ocpp_id: str, id_tag: str) -> dict:
-        charger = await self.get_charger_by_ocpp_id(ocpp_id)
+        charger = await get_charger_lookup(self._db, ocpp_id)
         if not charger:
             return {"status": "Invalid"}
 
-        stmt = select(RFIDCard).where(RFIDCard.card_uid == id_tag)
-        result = await self._db.execute(stmt)
-        card = result.scalars().first()
+        # Stav karty z Redis cache (při cache miss z DB), viz rfid_auth_cache
+        auth = await get_card_auth(self._db, self._redis, id_tag)
 
-        if not card:
-            print(f"❌ Authorization failed: Unknown card {id_tag}")
-            return {"status": "Invalid"}
-        
-        if not card.is_active:
-             print(f"🚫 Authorization failed: Card {id_tag} is deleted")
-             return {"status": "Invalid"} # Deleted card should look like it doesn't exist
-        
-        if not card.is_enabled:
-            print(f"🚫 Authorization failed: Card {id_tag} is disabled by user")
-            # "Blocked" or "Expired" often used for valid but disabled cards
-            return {"status": "Blocked"}
+        if auth.status != "Accepted":
+            print(f"❌ Authorization failed: Card {id_tag} -> {auth.status}")
+            return {"status": auth.status}
 
         if self._redis:
-            redis_key = f"charger:{ocpp_id}:authorized_tag"
-            await self._redis.set(redis_key, id_tag, ex=60)
-            print(f"🔐 Authorized tag {id_tag} on {ocpp_id} (TTL 60s)")
+            key = charger_state.state_key(ocpp_id)
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={
+                    charger_state.AUTHORIZED_TAG_FIELD: id_tag,
+                    charger_state.AUTHORIZED_AT_FIELD: datetime.now(timezone.utc).isoformat(),
+                })
+                pipe.expire(key, charger_state.STATE_TTL_SECONDS)
+                await pipe.execute()
+            print(f"🔐 Authorized tag {id_tag} on {ocpp_id} (TTL {charger_state.AUTHORIZED_TAG_TTL_SECONDS}s)")
 
         return {"status": "Accepted"}
 
     async def get_authorized_tag(self, ocpp_id: str) -> str | None:
         if not self._redis:
             return None
-        redis_key = f"charger:{ocpp_id}:authorized_tag"
-        tag = await self._redis.get(redis_key)
-        return tag
+        state = await self._redis.hgetall(charger_state.state_key(ocpp_id))
+        return charger_state.authorized_tag(state)
     
     async def check_exists_by_ocpp(self, ocpp_id: str) -> dict | None:
-        stmt = select(Charger.id, Charger.is_active, Charger.is_enabled).where(Charger.ocpp_id == ocpp_id)
-        result = await self._db.execute(stmt)
-        row = result.first()
+        row = await get_charger_lookup(self._db, ocpp_id)
         if row:
             # Check active (not deleted) AND enabled (switched on)
             is_working = row.is_active and row.is_enabled
@@ -187,102 +385,136 @@ class ChargerService:
         return None
     
     async def update_heartbeat(self, ocpp_id: str):
-        # A. Redis (ISO String)
-        redis_key = f"charger:{ocpp_id}:online"
-        
         # Použijeme time-zone aware UTC čas
-        current_time = datetime.now(timezone.utc).isoformat() # <--- OPRAVA
-        
-        await self._redis.set(redis_key, current_time, ex=330)
+        now = datetime.now(timezone.utc)
+        current_time = now.isoformat()
+
+        # A. Redis (ISO String) - pole "online" v hashi živého stavu, viz charger_state
+        state_key = charger_state.state_key(ocpp_id)
+
+        # MULTI: předchozí heartbeat přečteme a přepíšeme atomicky
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hget(state_key, charger_state.ONLINE_FIELD)
+            pipe.hset(state_key, charger_state.ONLINE_FIELD, current_time)
+            pipe.expire(state_key, charger_state.STATE_TTL_SECONDS)
+            if config.heartbeat_write_behind:
+                # B. Write-behind: do DB nezapisujeme hned, jen si heartbeat poznamenáme.
+                # Více heartbeatů stejné nabíječky se v hashi přepíše (coalescing),
+                # do DB je propíše flush_heartbeats() jedním UPDATE.
+                pipe.hset(HEARTBEAT_PENDING_KEY, ocpp_id, current_time)
+            previous = (await pipe.execute())[0]
+
+        # Nabíječka právě přešla do online -> změna pro seznam nabíječek a živý stream
+        if not charger_state.is_recent_heartbeat(previous, now):
+            await self._on_online_change(ocpp_id, "charger_online")
+
+        if config.heartbeat_write_behind:
+            return
 
-        # B. SQL Database (volitelné, pokud tam máš sloupec last_heartbeat)
-        charger = await self.get_charger_by_ocpp_id(ocpp_id)
-        if charger:
-            # SQLAlchemy si s timezone-aware objektem poradí (pokud máš DateTime(timezone=True))
-            # Pokud máš DateTime(timezone=False), uloží se to jako UTC bez info o zóně, což je OK.
-            charger.last_heartbeat = datetime.now(timezone.utc).replace(tzinfo=None) # .replace(tzinfo=None) je jistota pro naive sloupce
+        # B. SQL Database - přímý UPDATE bez načítání celé nabíječky
+        stmt = update(Charger).where(Charger.ocpp_id == ocpp_id).values(last_heartbeat=now)
+        await self._db.execute(stmt)
+        await self._db.commit()
+
+    async def flush_heartbeats(self) -> int:
+        """
+        Propíše nasbírané heartbeaty z Redisu do DB (chargers.last_heartbeat).
+        Volá se periodicky na pozadí (viz app/services/jobs.py).
+        Vrací počet propsaných nabíječek.
+        """
+        # 1. Atomicky vybereme a smažeme frontu (MULTI/EXEC),
+        # takže stejný heartbeat nepropíší dva workery zároveň.
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(HEARTBEAT_PENDING_KEY)
+            pipe.delete(HEARTBEAT_PENDING_KEY)
+            pending, _ = await pipe.execute()
+
+        if not pending:
+            return 0
+
+        rows = [(ocpp_id, datetime.fromisoformat(ts)) for ocpp_id, ts in pending.items()]
+
+        # 2. Jeden UPDATE ... FROM (VALUES ...) pro všechny nabíječky
+        heartbeats = values(
+            column("ocpp_id", String),
+            column("ts", DateTime(timezone=True)),
+            name="hb",
+        ).data(rows)
+
+        stmt = (
+            update(Charger)
+            .where(Charger.ocpp_id == heartbeats.c.ocpp_id)
+            .values(last_heartbeat=heartbeats.c.ts)
+        )
+
+        try:
+            await self._db.execute(stmt)
             await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            # Vrátíme heartbeaty zpět do fronty (HSETNX nepřepíše novější hodnotu)
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for ocpp_id, ts in pending.items():
+                    pipe.hsetnx(HEARTBEAT_PENDING_KEY, ocpp_id, ts)
+                await pipe.execute()
+            raise
+
+        return len(rows)
 
     async def handle_disconnect(self, ocpp_id: str):
         """
         Voláno při odpojení WebSocketu.
         Okamžitě smaže záznam o online stavu.
         """
-        redis_key = f"charger:{ocpp_id}:online"
-        await self._redis.delete(redis_key)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hget(charger_state.state_key(ocpp_id), charger_state.ONLINE_FIELD)
+            pipe.hdel(charger_state.state_key(ocpp_id), charger_state.ONLINE_FIELD)
+            previous, _ = await pipe.execute()
+
+        # Událost jen pokud byla nabíječka opravdu online (ne už prošlý heartbeat)
+        if charger_state.is_recent_heartbeat(previous):
+            await self._on_online_change(ocpp_id, "charger_offline")
+
+    async def _on_online_change(self, ocpp_id: str, event_type: str):
+        """Nabíječka přešla online/offline: nová verze seznamu, počty ve shlucích + událost pro živý stream."""
+        await bump_charger_list_version(self._redis)
+        charger = await get_charger_lookup(self._db, ocpp_id)
+        if charger:
+            await invalidate_cluster_availability(self._redis, (charger.latitude, charger.longitude))
+            await publish_status_event(self._redis, event_type, ocpp_id, charger)
 
     async def is_charger_online(self, ocpp_id: str) -> bool:
         """
         Pomocná metoda pro frontend/mapu.
-        Zkontroluje, zda v Redisu existuje heartbeat klíč.
+        Zkontroluje, zda je v Redisu dost čerstvý heartbeat.
         """
         if not self._redis:
             return False # Bez Redisu nevíme -> offline
             
-        key = f"charger:{ocpp_id}:online"
-        exists = await self._redis.exists(key)
-        return exists > 0
+        last_seen = await self._redis.hget(charger_state.state_key(ocpp_id), charger_state.ONLINE_FIELD)
+        return charger_state.is_recent_heartbeat(last_seen)
 
-    async def _enrich_chargers_with_status(self, chargers: list[Charger]):
+    async def _enrich_chargers(self, chargers: list[Charger]):
         """
-        Doplní ke všem konektorům v seznamu nabíječek aktuální status z Redisu.
-        Používá Redis Pipeline pro minimalizaci round-trips.
+        Doplní živý stav z Redisu: status každého konektoru a status celé nabíječky
+        (Connected/Disconnected/Disabled). Jeden HGETALL na nabíječku (hash charger_state),
+        vše v JEDNÉ pipeline.
         """
-        if not self._redis or not chargers:
+        if not chargers:
             return
 
-        # 1. Sbírání klíčů
-        # Potřebujeme mapovat: (charger_index, connector_index) -> redis_key
-        keys_map = [] 
-        
-        for i, charger in enumerate(chargers):
-            for j, connector in enumerate(charger.connectors):
-                # Klíč musí odpovídat tomu v ConnectorService._get_redis_key
-                # f"charger:{ocpp_id}:connector:{connector_num}:status"
-                key = f"charger:{charger.ocpp_id}:connector:{connector.ocpp_number}:status"
-                keys_map.append((i, j, key))
-        
-        if not keys_map:
-            return
-
-        # 2. Batch fetch z Redisu
-        async with self._redis.pipeline() as pipe:
-            for _, _, key in keys_map:
-                pipe.get(key)
-            statuses = await pipe.execute()
-
-        # 3. Přiřazení statusů zpět do objektů
-        # POZOR: SQLAlchemy objekty nemají field "status" v DB modelu.
-        # Musíme ho nastavit jako runtime atribut, který Pydantic (ConnectorRead) přečte.
-        for index, status_val in enumerate(statuses):
-            charger_idx, connector_idx, _ = keys_map[index]
-            connector = chargers[charger_idx].connectors[connector_idx]
-            
-            connector.status = status_val if status_val else "Unknown"
-
-    async def _enrich_chargers_with_device_status(self, chargers: list[Charger]):
-        """
-        Doplní status celé nabíječky (Connected/Disconnected/Disabled).
-        """
-        if not self._redis or not chargers:
+        if not self._redis:
             for c in chargers:
                 c.status = "Disabled" if not c.is_enabled else "Disconnected"
             return
 
-        # 1. Pipeline check for online keys
-        async with self._redis.pipeline() as pipe:
-            for charger in chargers:
-                key = f"charger:{charger.ocpp_id}:online"
-                pipe.exists(key)
-            online_flags = await pipe.execute()
+        states = await charger_state.get_states(self._redis, [charger.ocpp_id for charger in chargers])
 
-        # 2. Logic assignment
-        for i, charger in enumerate(chargers):
-            is_online = online_flags[i] > 0
-            
-            if not charger.is_enabled:
-                charger.status = "Disabled"
-            elif is_online:
-                charger.status = "Connected"
-            else:
-                charger.status = "Disconnected"
\ No newline at end of file
+        now = datetime.now(timezone.utc)
+        for charger, state in zip(chargers, states):
+            # POZOR: SQLAlchemy objekty nemají field "status" v DB modelu.
+            # Musíme ho nastavit jako runtime atribut, který Pydantic (ConnectorRead) přečte.
+            for connector in charger.connectors:
+                connector.status = charger_state.connector_status(state, connector.ocpp_number) or "Unknown"
+
+            charger.status = charger_state.device_status(charger.is_enabled, state, now)
@@ -0,0 +1,120 @@
+import re
+from datetime import datetime, timezone, timedelta
+from redis.asyncio import Redis
+
+# Živý stav nabíječky v JEDNOM Redis hashi na nabíječku: charger:{ocpp_id}:state
+#
+#   online          -> ISO čas posledního heartbeatu (online = mladší než ONLINE_TTL_SECONDS)
+#   authorized_tag  -> RFID tag z posledního Authorize, authorized_at -> ISO čas autorizace
+#   c:{n}:status    -> status konektoru n, c:{n}:error -> jeho error code
+#
+# Hash vyprší STATE_TTL_SECONDS po posledním zápisu. Expirace jednotlivých polí
+# (dřív TTL na samostatných klíčích) se nahrazuje porovnáním uloženého času.
+# Seznam nabíječek pak potřebuje jen jeden HGETALL na nabíječku.
+
+STATE_TTL_SECONDS = 86400
+ONLINE_TTL_SECONDS = 330
+AUTHORIZED_TAG_TTL_SECONDS = 60
+
+ONLINE_FIELD = "online"
+AUTHORIZED_TAG_FIELD = "authorized_tag"
+AUTHORIZED_AT_FIELD = "authorized_at"
+
+def state_key(ocpp_id: str) -> str:
+    return f"charger:{ocpp_id}:state"
+
+def status_field(connector_number: int) -> str:
+    return f"c:{connector_number}:status"
+
+def error_field(connector_number: int) -> str:
+    return f"c:{connector_number}:error"
+
+def _is_fresh(timestamp: str | None, ttl_seconds: int, now: datetime | None = None) -> bool:
+    if not timestamp:
+        return False
+    try:
+        seen = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return False
+    return (now or datetime.now(timezone.utc)) - seen < timedelta(seconds=ttl_seconds)
+
+def is_recent_heartbeat(last_seen: str | None, now: datetime | None = None) -> bool:
+    return _is_fresh(last_seen, ONLINE_TTL_SECONDS, now)
+
+def is_online(state: dict, now: datetime | None = None) -> bool:
+    return is_recent_heartbeat(state.get(ONLINE_FIELD), now)
+
+def device_status(is_enabled: bool, state: dict, now: datetime | None = None) -> str:
+    """Status celé nabíječky: Connected / Disconnected / Disabled."""
+    if not is_enabled:
+        return "Disabled"
+    return "Connected" if is_online(state, now) else "Disconnected"
+
+def authorized_tag(state: dict, now: datetime | None = None) -> str | None:
+    if _is_fresh(state.get(AUTHORIZED_AT_FIELD), AUTHORIZED_TAG_TTL_SECONDS, now):
+        return state.get(AUTHORIZED_TAG_FIELD)
+    return None
+
+def connector_status(state: dict, connector_number: int) -> str | None:
+    return state.get(status_field(connector_number))
+
+async def get_states(redis: Redis, ocpp_ids: list[str]) -> list[dict]:
+    """Stav více nabíječek - jeden HGETALL na nabíječku, vše v jedné pipeline."""
+    if not ocpp_ids:
+        return []
+    async with redis.pipeline(transaction=False) as pipe:
+        for ocpp_id in ocpp_ids:
+            pipe.hgetall(state_key(ocpp_id))
+        return [state or {} for state in await pipe.execute()]
+
+# --- Převod starých klíčů (charger:{ocpp}:online / :authorized_tag / :connector:{n}:status) ---
+
+_LEGACY_PATTERNS = [
+    ("charger:*:online", re.compile(r"^charger:(.+):online$")),
+    ("charger:*:authorized_tag", re.compile(r"^charger:(.+):authorized_tag$")),
+    ("charger:*:connector:*:status", re.compile(r"^charger:(.+):connector:(\d+):status$")),
+]
+
+async def migrate_legacy_state_keys(redis: Redis, batch_size: int = 500) -> int:
+    """
+    Jednorázově přelije staré samostatné klíče do hashů a smaže je.
+    HSETNX -> hodnota, kterou mezitím zapsal nový kód, má přednost.
+    Vrací počet převedených klíčů.
+    """
+    migrated = 0
+    now = datetime.now(timezone.utc).isoformat()
+
+    for pattern, regex in _LEGACY_PATTERNS:
+        keys = []
+        async for key in redis.scan_iter(match=pattern, count=batch_size):
+            if regex.match(key):
+                keys.append(key)
+            if len(keys) >= batch_size:
+                migrated += await _migrate_batch(redis, regex, keys, now)
+                keys = []
+        if keys:
+            migrated += await _migrate_batch(redis, regex, keys, now)
+
+    return migrated
+
+async def _migrate_batch(redis: Redis, regex: re.Pattern, keys: list[str], now: str) -> int:
+    values = await redis.mget(keys)
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, value in zip(keys, values):
+            if value is None:  # Mezitím vypršel
+                continue
+            match = regex.match(key)
+            target = state_key(match.group(1))
+            if key.endswith(":online"):
+                pipe.hsetnx(target, ONLINE_FIELD, value)
+            elif key.endswith(":authorized_tag"):
+                pipe.hsetnx(target, AUTHORIZED_TAG_FIELD, value)
+                pipe.hsetnx(target, AUTHORIZED_AT_FIELD, now)
+            else:
+                pipe.hsetnx(target, status_field(int(match.group(2))), value)
+            pipe.expire(target, STATE_TTL_SECONDS)
+        pipe.delete(*keys)
+        await pipe.execute()
+
+    return sum(1 for value in values if value is not None)
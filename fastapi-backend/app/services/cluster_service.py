@@ -0,0 +1,234 @@
+import json
+from collections import defaultdict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from redis.asyncio import Redis
+
+from app.core.config import config
+from app.db.schema import Charger, Connector
+from app.services import charger_state
+
+# Shlukování nabíječek pro mapu na serveru.
+#
+# Svět je pro každý zoom rozdělen na dlaždice (360 / 2^zoom stupňů) a každá dlaždice
+# na CELLS_PER_TILE x CELLS_PER_TILE buněk. Nabíječky v jedné buňce = jeden shluk.
+# Složení shluků (těžiště, počet, členové) se cachuje v Redisu po dlaždicích
+# (clusters:{zoom}:{x}:{y}) a maže se při vytvoření / přesunu / smazání nabíječky
+# a při změně jejích konektorů (úprava majitelem, auto-discovery).
+# Počty dostupných nabíječek (po buňkách dlaždice) se cachují vedle dlaždice
+# (clusters:available:{zoom}:{x}:{y}) s krátkým TTL a mažou se při změně statusu
+# konektoru nebo online stavu. Živé stavy se tak čtou jen pro dlaždice bez cache.
+
+MAX_CLUSTER_ZOOM = 20
+CELLS_PER_TILE = 4
+MAX_TILES_PER_REQUEST = 64
+
+def _tile_size(zoom: int) -> float:
+    return 360 / 2 ** zoom
+
+def _tile_key(zoom: int, x: int, y: int) -> str:
+    return f"clusters:{zoom}:{x}:{y}"
+
+def _available_key(zoom: int, x: int, y: int) -> str:
+    return f"clusters:available:{zoom}:{x}:{y}"
+
+def _tile_of(zoom: int, lat: float, lon: float) -> tuple[int, int]:
+    size = _tile_size(zoom)
+    max_x = 2 ** zoom - 1
+    max_y = max(2 ** zoom // 2 - 1, 0)
+    x = min(int((lon + 180) // size), max_x)
+    y = min(int((lat + 90) // size), max_y)
+    return max(x, 0), max(y, 0)
+
+def _cell_of(zoom: int, lat: float, lon: float) -> tuple[int, int]:
+    # Buňka vždy uvnitř dlaždice z _tile_of (lon=180 / lat=90 by jinak padly mimo)
+    size = _tile_size(zoom) / CELLS_PER_TILE
+    tile_x, tile_y = _tile_of(zoom, lat, lon)
+    x = min(max(int((lon + 180) // size), tile_x * CELLS_PER_TILE), tile_x * CELLS_PER_TILE + CELLS_PER_TILE - 1)
+    y = min(max(int((lat + 90) // size), tile_y * CELLS_PER_TILE), tile_y * CELLS_PER_TILE + CELLS_PER_TILE - 1)
+    return x, y
+
+def _keys_for_points(points, *key_fns) -> set[str]:
+    return {
+        key_fn(zoom, *_tile_of(zoom, lat, lon))
+        for lat, lon in points if lat is not None and lon is not None
+        for zoom in range(MAX_CLUSTER_ZOOM + 1)
+        for key_fn in key_fns
+    }
+
+async def invalidate_cluster_tiles(redis: Redis | None, *points: tuple[float | None, float | None]):
+    """Smaže cache dlaždic (všechny zoomy), do kterých padají body (latitude, longitude)."""
+    keys = _keys_for_points(points, _tile_key, _available_key)
+    if redis and keys:
+        await redis.delete(*keys)
+
+async def invalidate_cluster_availability(redis: Redis | None, *points: tuple[float | None, float | None]):
+    """Smaže jen cache počtů dostupných nabíječek (změna statusu konektoru / online stavu)."""
+    keys = _keys_for_points(points, _available_key)
+    if redis and keys:
+        await redis.delete(*keys)
+
+class ClusterService:
+    def __init__(self, session: AsyncSession, redis: Redis = None):
+        self._db = session
+        self._redis = redis
+
+    async def get_clusters(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float, zoom: int) -> list[dict]:
+        """
+        Shluky nabíječek pro výřez mapy (bbox) a zoom.
+        Vyhodí ValueError, pokud výřez při daném zoomu pokrývá příliš mnoho dlaždic.
+        """
+        zoom = min(zoom, MAX_CLUSTER_ZOOM)
+        min_x, min_y = _tile_of(zoom, min_lat, min_lon)
+        max_x, max_y = _tile_of(zoom, max_lat, max_lon)
+        tiles = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+        if len(tiles) > MAX_TILES_PER_REQUEST:
+            raise ValueError("Bounding box is too large for this zoom level")
+
+        cells_by_tile, recomputed = await self._load_tiles(zoom, tiles)
+        available_by_tile = await self._load_available(zoom, tiles, cells_by_tile, recomputed)
+        cells = [cell for tile in tiles for cell in cells_by_tile[tile]]
+        available = [count for tile in tiles for count in available_by_tile[tile]]
+
+        return [
+            {
+                "latitude": cell["lat"],
+                "longitude": cell["lon"],
+                "count": cell["count"],
+                "available": available[i],
+                # Samostatná nabíječka -> klient může rovnou otevřít detail
+                "charger_id": cell["members"][0][0] if cell["count"] == 1 else None,
+            }
+            for i, cell in enumerate(cells)
+        ]
+
+    async def _load_tiles(self, zoom: int, tiles: list[tuple[int, int]]) -> tuple[dict[tuple[int, int], list[dict]], set[tuple[int, int]]]:
+        """
+        Dlaždice z cache (jeden MGET), chybějící spočítá jedním dotazem do DB.
+        Vrací i množinu přepočítaných dlaždic (jejich počty dostupných v cache neplatí).
+        """
+        cached = await self._redis.mget([_tile_key(zoom, x, y) for x, y in tiles]) if self._redis else [None] * len(tiles)
+
+        result = {}
+        missing = []
+        for tile, raw in zip(tiles, cached):
+            if raw is None:
+                missing.append(tile)
+            else:
+                result[tile] = json.loads(raw)
+
+        if missing:
+            computed = await self._compute_tiles(zoom, missing)
+            result.update(computed)
+
+            if self._redis:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for (x, y), cells in computed.items():
+                        pipe.set(_tile_key(zoom, x, y), json.dumps(cells), ex=config.cluster_tile_ttl_seconds)
+                    await pipe.execute()
+
+        return result, set(missing)
+
+    async def _load_available(
+        self,
+        zoom: int,
+        tiles: list[tuple[int, int]],
+        cells_by_tile: dict[tuple[int, int], list[dict]],
+        recomputed: set[tuple[int, int]],
+    ) -> dict[tuple[int, int], list[int]]:
+        """
+        Počty dostupných nabíječek po buňkách každé dlaždice - z cache (jeden MGET),
+        živé stavy se čtou jen pro neprázdné dlaždice bez platné cache.
+        """
+        result = {tile: [] for tile in tiles if not cells_by_tile[tile]}
+        candidates = [tile for tile in tiles if tile not in result and tile not in recomputed]
+
+        if self._redis and candidates:
+            cached = await self._redis.mget([_available_key(zoom, x, y) for x, y in candidates])
+            for tile, raw in zip(candidates, cached):
+                counts = json.loads(raw) if raw is not None else None
+                # Jiný počet buněk = cache ke starší podobě dlaždice
+                if counts is not None and len(counts) == len(cells_by_tile[tile]):
+                    result[tile] = counts
+
+        missing = [tile for tile in tiles if tile not in result]
+        if missing:
+            counts = iter(await self._count_available([cell for tile in missing for cell in cells_by_tile[tile]]))
+            computed = {tile: [next(counts) for _ in cells_by_tile[tile]] for tile in missing}
+            result.update(computed)
+
+            if self._redis:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for (x, y), tile_counts in computed.items():
+                        pipe.set(_available_key(zoom, x, y), json.dumps(tile_counts), ex=config.cluster_available_ttl_seconds)
+                    await pipe.execute()
+
+        return result
+
+    async def _compute_tiles(self, zoom: int, tiles: list[tuple[int, int]]) -> dict[tuple[int, int], list[dict]]:
+        # Obdélník pokrývající všechny chybějící dlaždice
+        size = _tile_size(zoom)
+        min_x, max_x = min(x for x, _ in tiles), max(x for x, _ in tiles)
+        min_y, max_y = min(y for _, y in tiles), max(y for _, y in tiles)
+
+        # Jen sloupce (bez ORM objektů); čísla AKTIVNÍCH konektorů kvůli živému stavu
+        # (stejně jako /summary a ?available=true - neaktivní konektor není k dispozici)
+        active_connector = Connector.is_active == True # noqa: E712
+        stmt = (
+            select(
+                Charger.id, Charger.ocpp_id, Charger.is_enabled, Charger.latitude, Charger.longitude,
+                func.array_remove(
+                    func.array_agg(Connector.ocpp_number).filter(active_connector), None
+                ).label("connectors"),
+            )
+            .outerjoin(Connector, Connector.charger_id == Charger.id)
+            .where(
+                Charger.is_active == True, # noqa: E712
+                Charger.longitude >= min_x * size - 180,
+                Charger.longitude < (max_x + 1) * size - 180,
+                Charger.latitude >= min_y * size - 90,
+                Charger.latitude < (max_y + 1) * size - 90,
+            )
+            .group_by(Charger.id)
+        )
+        rows = (await self._db.execute(stmt)).all()
+
+        # Seskupení do buněk (stálé pořadí, počty dostupných v cache se na něj odkazují)
+        cells = defaultdict(list)
+        for row in sorted(rows, key=lambda r: r.id):
+            cells[_cell_of(zoom, row.latitude, row.longitude)].append(row)
+
+        computed = {tile: [] for tile in tiles}
+        for (cell_x, cell_y), members in sorted(cells.items()):
+            tile = (cell_x // CELLS_PER_TILE, cell_y // CELLS_PER_TILE)
+            if tile not in computed:
+                continue
+            computed[tile].append({
+                "lat": sum(m.latitude for m in members) / len(members),
+                "lon": sum(m.longitude for m in members) / len(members),
+                "count": len(members),
+                "members": [[m.id, m.ocpp_id, m.is_enabled, sorted(m.connectors or [])] for m in members],
+            })
+        return computed
+
+    async def _count_available(self, cells: list[dict]) -> list[int]:
+        """
+        Pro každý shluk počet nabíječek, které jsou online, zapnuté a mají volný konektor.
+        Jedna Redis pipeline, jeden HGETALL na nabíječku.
+        """
+        if not self._redis or not cells:
+            return [0] * len(cells)
+
+        ocpp_ids = [ocpp_id for cell in cells for _, ocpp_id, _, _ in cell["members"]]
+        states = iter(await charger_state.get_states(self._redis, ocpp_ids))
+
+        available = []
+        for cell in cells:
+            count = 0
+            for _, _, is_enabled, connectors in cell["members"]:
+                state = next(states)
+                statuses = [charger_state.connector_status(state, number) for number in connectors]
+                if is_enabled and charger_state.is_online(state) and "Available" in statuses:
+                    count += 1
+            available.append(count)
+        return available
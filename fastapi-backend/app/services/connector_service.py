@@ -1,33 +1,52 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 from redis.asyncio import Redis
 
 from app.db.schema import Connector, Charger
 from app.models.connector import ConnectorStatusUpdate, ConnectorRead, ConnectorUpdate
+from app.services.charger_lookup import get_charger_lookup
+from app.services.charger_list_cache import bump_charger_list_version
+from app.services.status_stream import publish_status_event
+from app.services import charger_state
+from app.services.availability_index import update_connector_availability
+from app.services.cluster_service import invalidate_cluster_tiles, invalidate_cluster_availability
 
 class ConnectorService:
     def __init__(self, session: AsyncSession, redis: Redis):
         self._db = session
         self._redis = redis
 
-    def _get_redis_key(self, ocpp_id: str, connector_num: int) -> str:
-        return f"charger:{ocpp_id}:connector:{connector_num}:status"
-
     # --- POUŽÍVÁ INTERNAL API (OCPP) ---
     async def process_status_notification(self, data: ConnectorStatusUpdate) -> Connector | None:
-        # 1. Uložíme status do Redisu (Expirace 24h)
-        redis_key = self._get_redis_key(data.ocpp_id, data.connector_number)
-        await self._redis.set(redis_key, data.status, ex=86400)
-
-        # 2. Najdeme nabíječku
-        stmt_charger = select(Charger).where(Charger.ocpp_id == data.ocpp_id)
-        result_charger = await self._db.execute(stmt_charger)
-        charger = result_charger.scalars().first()
+        # 1. Uložíme status a error code do hashe živého stavu nabíječky (viz charger_state)
+        state_key = charger_state.state_key(data.ocpp_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hget(state_key, charger_state.status_field(data.connector_number))
+            pipe.hset(state_key, mapping={
+                charger_state.status_field(data.connector_number): data.status,
+                charger_state.error_field(data.connector_number): data.error_code or "",
+            })
+            pipe.expire(state_key, charger_state.STATE_TTL_SECONDS)
+            previous = (await pipe.execute())[0]
+        changed = previous != data.status
+        if changed:
+            await bump_charger_list_version(self._redis)
+
+        # 2. Najdeme nabíječku (in-process cache, viz charger_lookup)
+        charger = await get_charger_lookup(self._db, data.ocpp_id)
         
         if not charger:
             return None
 
+        # Počty dostupných ve shlucích mapy + živý stream (GET /chargers/stream) - jen skutečná změna statusu
+        if changed:
+            await invalidate_cluster_availability(self._redis, (charger.latitude, charger.longitude))
+            await publish_status_event(
+                self._redis, "connector_status", data.ocpp_id, charger,
+                connector_number=data.connector_number, status=data.status, error_code=data.error_code
+            )
+
         # 3. Najdeme nebo vytvoříme konektor (Auto-discovery)
         stmt_connector = select(Connector).where(
             Connector.charger_id == charger.id,
@@ -46,15 +65,21 @@ class ConnectorService:
             self._db.add(connector)
             await self._db.commit()
             await self._db.refresh(connector)
+            await invalidate_cluster_tiles(self._redis, (charger.latitude, charger.longitude))
+            await bump_charger_list_version(self._redis)
+
+        # 4. Index volných konektorů (při každé notifikaci -> po výpadku Redisu se sám doplní)
+        await update_connector_availability(self._redis, connector, data.status)
         
         return connector
 
     # --- POMOCNÁ METODA PRO FETCH DB OBJEKTU ---
     async def get_connector(self, connector_id: int) -> Connector | None:
         """Vrání ORM objekt včetně načtené relace Charger (pro kontrolu majitele)."""
+        # JOIN místo selectinload -> konektor i nabíječka jedním dotazem
         stmt = (
             select(Connector)
-            .options(selectinload(Connector.charger)) # Důležité pro charger.owner_id
+            .options(joinedload(Connector.charger)) # Důležité pro charger.owner_id
             .where(Connector.id == connector_id)
         )
         result = await self._db.execute(stmt)
@@ -62,23 +87,38 @@ class ConnectorService:
 
     # --- POUŽÍVÁ USER API ---
     async def get_connector_with_status(self, connector_id: int) -> ConnectorRead | None:
-        # Získáme konektor i s nabíječkou
+        # Získáme konektor i s nabíječkou (jeden dotaz)
         connector = await self.get_connector(connector_id)
         
         if not connector:
             return None
-            
-        # Dotaz do Redisu pro aktuální status
-        redis_key = self._get_redis_key(connector.charger.ocpp_id, connector.ocpp_number)
-        status = await self._redis.get(redis_key)
-        
+
+        return await self.with_status(connector)
+
+    async def with_status(self, connector: Connector) -> ConnectorRead:
+        """Už načtený konektor (s nabíječkou) + aktuální status z Redisu - jeden HGET."""
+        return self._to_read(connector, await self._get_status(connector))
+
+    async def _get_status(self, connector: Connector) -> str | None:
+        return await self._redis.hget(
+            charger_state.state_key(connector.charger.ocpp_id),
+            charger_state.status_field(connector.ocpp_number),
+        )
+
+    @staticmethod
+    def _to_read(connector: Connector, status: str | None) -> ConnectorRead:
         # Převedeme na Pydantic a doplníme status
         response_model = ConnectorRead.model_validate(connector)
         response_model.status = status if status else "Unknown"
         return response_model
     
-    async def update_connector(self, connector_id: int, data: ConnectorUpdate) -> Connector | None:
-        connector = await self.get_connector(connector_id)
+    async def update_connector(self, connector_id: int, data: ConnectorUpdate, connector: Connector | None = None) -> ConnectorRead | None:
+        """
+        connector = už načtený konektor (např. po kontrole vlastníka v routeru) -> bez dalšího dotazu.
+        Vrací konektor i se statusem z Redisu (jeden HGET pro index i odpověď).
+        """
+        if connector is None:
+            connector = await self.get_connector(connector_id)
         if not connector:
             return None
 
@@ -86,9 +126,16 @@ class ConnectorService:
         for key, value in update_data.items():
             setattr(connector, key, value)
 
+        # Bez refresh: session má expire_on_commit=False a konektor nemá hodnoty počítané v DB
         await self._db.commit()
-        await self._db.refresh(connector)
-        return connector
+
+        # Typ / výkon / cena / aktivace se mohly změnit -> přepočítat v indexu volných konektorů
+        status = await self._get_status(connector)
+        await update_connector_availability(self._redis, connector, status)
+        # Složení shluků na mapě (aktivní konektory) i počty dostupných
+        await invalidate_cluster_tiles(self._redis, (connector.charger.latitude, connector.charger.longitude))
+        await bump_charger_list_version(self._redis)
+        return self._to_read(connector, status)
 
     async def get_by_ocpp_ids(self, identity: str, ocpp_connector_id: int):
         """
@@ -0,0 +1,83 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from app.core.config import config
+
+# Idempotence interních OCPP endpointů (start / stop / meter-values).
+# Gateway posílá hlavičku 'Idempotency-Key' (ocpp_id + OCPP messageId), opakovaný
+# request se stejným klíčem dostane uloženou odpověď z Redisu a nic se neprovede znovu.
+#
+# idempotency:{scope}:{key} -> "__in_progress__" (zpracovává se)
+#                              nebo JSON {"fingerprint": hash těla requestu, "response": odpověď}
+#
+# Nabíječky po restartu často čítají messageId znovu od začátku -> stejný klíč může
+# přijít s jinou zprávou. Odpověď se proto vrátí jen při shodném těle requestu,
+# jinak se request zpracuje jako nový.
+
+_IN_PROGRESS = "__in_progress__"
+
+# Pole, která k tělu zprávy nepatří (událost dávky /internal/batch vs. samostatný endpoint)
+_FINGERPRINT_EXCLUDE = {"type", "idempotency_key"}
+
+def _redis_key(scope: str, key: str) -> str:
+    return f"idempotency:{scope}:{key}"
+
+def request_fingerprint(request: BaseModel | None) -> str:
+    """Hash těla requestu (stejný pro samostatný endpoint i událost dávky)."""
+    if request is None:
+        return ""
+    body = request.model_dump_json(exclude=_FINGERPRINT_EXCLUDE)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+async def run_idempotent(
+    redis: Redis | None,
+    scope: str,
+    key: str | None,
+    handler: Callable[[], Awaitable[Any]],
+    request: BaseModel | None = None
+) -> Any:
+    """
+    Provede handler nejvýš jednou pro daný klíč a tělo requestu (request).
+    Výsledek musí jít serializovat do JSON. Bez klíče (nebo bez Redisu) se handler prostě zavolá.
+    """
+    if not key or not redis:
+        return await handler()
+
+    redis_key = _redis_key(scope, key)
+    fingerprint = request_fingerprint(request)
+
+    # 1. Zámek: první request klíč založí, ostatní přečtou uloženou odpověď
+    acquired = await redis.set(
+        redis_key, _IN_PROGRESS, nx=True, ex=config.idempotency_lock_seconds
+    )
+    if not acquired:
+        cached = await redis.get(redis_key)
+        if cached == _IN_PROGRESS:
+            # Původní request ještě běží (retry po timeoutu gateway) - ať to zkusí znovu
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Request with this Idempotency-Key is still being processed"
+            )
+        if cached is None:
+            # Klíč mezitím vypršel -> zpracujeme normálně (bez zámku)
+            return await handler()
+        stored = json.loads(cached)
+        if stored.get("fingerprint") == fingerprint:
+            return stored["response"]
+        # Stejný klíč, jiné tělo (znovu použité messageId) -> nová zpráva, klíč převezmeme
+        await redis.set(redis_key, _IN_PROGRESS, ex=config.idempotency_lock_seconds)
+
+    # 2. Zpracování; při chybě zámek uvolníme, aby retry mohl projít znovu
+    try:
+        result = await handler()
+    except Exception:
+        await redis.delete(redis_key)
+        raise
+
+    stored = {"fingerprint": fingerprint, "response": result}
+    await redis.set(redis_key, json.dumps(stored), ex=config.idempotency_ttl_seconds)
+    return result
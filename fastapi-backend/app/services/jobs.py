@@ -0,0 +1,72 @@
+from app.core.config import config
+from app.core.leader import acquire_leadership
+from app.db.schema import AsyncSessionLocal
+from app.db.redis_pool import get_redis_client
+from app.services.charger_service import ChargerService
+from app.services.charger_state import migrate_legacy_state_keys
+from app.services.meter_sample_service import MeterSampleService
+from app.services.transaction_service import TransactionService
+
+# Úlohy pro PeriodicTasks (app/core/tasks.py).
+# Každé spuštění si otevře vlastní DB session - neběží v kontextu requestu.
+
+async def flush_heartbeats_job() -> int:
+    async with AsyncSessionLocal() as session:
+        service = ChargerService(session=session, redis=get_redis_client())
+        return await service.flush_heartbeats()
+
+async def flush_meter_samples_job() -> int:
+    """Vyprázdní frontu vzorků elektroměru (po dávkách)."""
+    total = 0
+    async with AsyncSessionLocal() as session:
+        service = MeterSampleService(session=session, redis=get_redis_client())
+        while True:
+            written = await service.flush()
+            total += written
+            if written < config.meter_sample_flush_batch_size:
+                return total
+
+async def flush_meter_values_job() -> int:
+    """Propíše koalescované hodnoty elektroměru do charge_logs."""
+    async with AsyncSessionLocal() as session:
+        service = TransactionService(session=session, redis=get_redis_client())
+        return await service.flush_meter_values()
+
+async def ensure_meter_sample_partitions_job():
+    """Zakládání partitions meter_samples (DDL) - jen na jednom workeru."""
+    redis = get_redis_client()
+    if not await acquire_leadership(redis, "ensure_meter_sample_partitions", 3 * 3600):
+        return
+
+    async with AsyncSessionLocal() as session:
+        service = MeterSampleService(session=session, redis=redis)
+        await service.ensure_partitions()
+
+async def prune_stale_transactions_job() -> int:
+    """Úklid sirotků - běží jen na jednom workeru (lídr zvolený přes Redis)."""
+    redis = get_redis_client()
+    # Zámek vydrží několik intervalů, lídr si ho každým během prodlužuje
+    ttl = config.stale_transaction_prune_interval_seconds * 3
+    if not await acquire_leadership(redis, "prune_stale_transactions", ttl):
+        return 0
+
+    async with AsyncSessionLocal() as session:
+        service = TransactionService(session=session, redis=redis)
+        count = await service.close_stale_transactions(
+            max_age_minutes=config.stale_transaction_max_age_minutes
+        )
+
+    if count:
+        print(f"🧹 Closed {count} stale transactions")
+    return count
+
+async def migrate_charger_state_job() -> int:
+    """Převod starých Redis klíčů živého stavu do hashů - stačí jeden worker."""
+    redis = get_redis_client()
+    if not await acquire_leadership(redis, "migrate_charger_state", 300):
+        return 0
+
+    count = await migrate_legacy_state_keys(redis)
+    if count:
+        print(f"🔁 Migrated {count} legacy charger state keys")
+    return count
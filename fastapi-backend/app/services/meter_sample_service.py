@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, values, column, Integer, DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from redis.asyncio import Redis
+
+from app.core.config import config
+from app.db.schema import ChargeLog, MeterSample
+from app.models.meter_sample import MeterSampleRead
+
+# Redis list s vzorky čekajícími na zápis do DB.
+# Položka: "<transaction_id>|<ISO čas>|<Wh>"
+METER_SAMPLES_PENDING_KEY = "meter_samples:pending"
+
+def sample_entry(transaction_id: int, meter_wh: int, sampled_at: datetime | None = None) -> str:
+    """Položka fronty METER_SAMPLES_PENDING_KEY."""
+    sampled_at = sampled_at or datetime.now(timezone.utc)
+    if sampled_at.tzinfo is None:
+        sampled_at = sampled_at.replace(tzinfo=timezone.utc)
+    return f"{transaction_id}|{sampled_at.isoformat()}|{meter_wh}"
+
+class MeterSampleService:
+    def __init__(self, session: AsyncSession, redis: Redis):
+        self._db = session
+        self._redis = redis
+
+    # --- ZÁPIS (volá TransactionService.process_meter_value) ---
+
+    async def enqueue(self, transaction_id: int, meter_wh: int, sampled_at: datetime | None = None):
+        """
+        Zařadí vzorek do fronty v Redisu. Do DB ho dávkově propíše flush().
+        """
+        await self._redis.rpush(
+            METER_SAMPLES_PENDING_KEY,
+            sample_entry(transaction_id, meter_wh, sampled_at)
+        )
+
+    async def flush(self, batch_size: int | None = None) -> int:
+        """
+        Vybere z fronty až batch_size vzorků a zapíše je jedním INSERTem (multi-row VALUES).
+        Vrací počet zapsaných vzorků (0 = fronta je prázdná).
+        """
+        batch_size = batch_size or config.meter_sample_flush_batch_size
+
+        # Atomicky odebereme začátek fronty (MULTI/EXEC) - bezpečné pro více workerů
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(METER_SAMPLES_PENDING_KEY, 0, batch_size - 1)
+            pipe.ltrim(METER_SAMPLES_PENDING_KEY, batch_size, -1)
+            raw, _ = await pipe.execute()
+
+        if not raw:
+            return 0
+
+        rows = []
+        for item in raw:
+            tx_id, ts, wh = item.split("|")
+            rows.append((int(tx_id), datetime.fromisoformat(ts), int(wh)))
+
+        samples = values(
+            column("transaction_id", Integer),
+            column("sampled_at", DateTime(timezone=True)),
+            column("meter_wh", Integer),
+            name="samples",
+        ).data(rows)
+
+        # INSERT ... SELECT FROM (VALUES ...) JOIN charge_logs: vzorky neexistujících
+        # transakcí se zahodí (jinak by FK chyba shodila celou dávku).
+        # Duplicitní vzorek (stejná transakce + čas, např. retry z gateway) ignorujeme.
+        source = (
+            select(samples.c.transaction_id, samples.c.sampled_at, samples.c.meter_wh)
+            .select_from(samples)
+            .join(ChargeLog, ChargeLog.id == samples.c.transaction_id)
+        )
+        stmt = (
+            pg_insert(MeterSample)
+            .from_select(["transaction_id", "sampled_at", "meter_wh"], source)
+            .on_conflict_do_nothing()
+        )
+
+        try:
+            await self._db.execute(stmt)
+            await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            # Vrátíme vzorky zpět do fronty, ať se neztratí
+            await self._redis.rpush(METER_SAMPLES_PENDING_KEY, *raw)
+            raise
+
+        return len(rows)
+
+    async def ensure_partitions(self, now: datetime | None = None):
+        """
+        Založí měsíční partitions pro aktuální a následující měsíc (idempotentní).
+        Volá se jen na jednom workeru (lídr, viz jobs.ensure_meter_sample_partitions_job).
+        """
+        now = now or datetime.now(timezone.utc)
+
+        month_start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+        for _ in range(2):
+            if month_start.month == 12:
+                next_start = datetime(month_start.year + 1, 1, 1, tzinfo=timezone.utc)
+            else:
+                next_start = datetime(month_start.year, month_start.month + 1, 1, tzinfo=timezone.utc)
+
+            await self._create_partition(f"meter_samples_{month_start:%Y_%m}", month_start, next_start)
+            month_start = next_start
+
+        await self._db.commit()
+
+    async def _create_partition(self, name: str, start: datetime, end: datetime):
+        """
+        sampled_at je čas nabíječky, takže v DEFAULT partition můžou ležet vzorky
+        z měsíce, pro který partition ještě není. PostgreSQL pak odmítne
+        'CREATE TABLE ... PARTITION OF' -> partition založíme jako samostatnou tabulku,
+        přesuneme do ní vzorky z DEFAULT a připojíme ji (vše v jedné transakci).
+        """
+        if await self._db.scalar(text("SELECT to_regclass(:name)"), {"name": name}):
+            return
+
+        # Zápisy do DEFAULT počkají, jinak by nový vzorek v rozsahu shodil ATTACH
+        await self._db.execute(text("LOCK TABLE meter_samples_default IN ACCESS EXCLUSIVE MODE"))
+        await self._db.execute(text(f"CREATE TABLE {name} (LIKE meter_samples)"))
+        await self._db.execute(
+            text(
+                f"WITH moved AS ("
+                f"DELETE FROM meter_samples_default WHERE sampled_at >= :start AND sampled_at < :end "
+                f"RETURNING transaction_id, sampled_at, meter_wh"
+                f") INSERT INTO {name} (transaction_id, sampled_at, meter_wh) "
+                f"SELECT transaction_id, sampled_at, meter_wh FROM moved"
+            ),
+            {"start": start, "end": end},
+        )
+        await self._db.execute(text(
+            f"ALTER TABLE meter_samples ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+    # --- ČTENÍ (User API) ---
+
+    async def get_samples(self, log: ChargeLog) -> list[MeterSampleRead]:
+        stmt = (
+            select(MeterSample.sampled_at, MeterSample.meter_wh)
+            .where(MeterSample.transaction_id == log.id)
+            .order_by(MeterSample.sampled_at)
+        )
+        result = await self._db.execute(stmt)
+
+        return [
+            MeterSampleRead(
+                sampled_at=row.sampled_at,
+                meter_wh=row.meter_wh,
+                energy_wh=max(0, row.meter_wh - log.meter_start)
+            )
+            for row in result.all()
+        ]
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from redis.asyncio import Redis
+
+from app.core.config import config
+from app.db.schema import RFIDCard
+
+# Redis cache stavu autorizace RFID karet: rfid:auth:{uid} -> hash(status, owner_id, card_id)
+# Neznámé karty se cachují také (status Invalid, kratší TTL).
+
+@dataclass(frozen=True)
+class CardAuth:
+    status: str                 # Accepted / Blocked / Invalid
+    owner_id: int | None = None
+    card_id: int | None = None
+
+def _redis_key(uid: str) -> str:
+    return f"rfid:auth:{uid}"
+
+def _card_status(card: RFIDCard | None) -> str:
+    if not card:
+        return "Invalid"
+    if not card.is_active:
+        return "Invalid"  # Smazaná karta se tváří, jako by neexistovala
+    if not card.is_enabled:
+        return "Blocked"  # Platná, ale uživatelem vypnutá karta
+    return "Accepted"
+
+async def get_card_auth(session: AsyncSession, redis: Redis | None, uid: str) -> CardAuth:
+    """
+    Vrátí stav autorizace karty - z Redisu, nebo (při cache miss) z DB a uloží ho.
+    """
+    key = _redis_key(uid)
+
+    if redis:
+        cached = await redis.hgetall(key)
+        if cached:
+            return CardAuth(
+                status=cached["status"],
+                owner_id=int(cached["owner_id"]) if cached.get("owner_id") else None,
+                card_id=int(cached["card_id"]) if cached.get("card_id") else None,
+            )
+
+    stmt = select(RFIDCard).where(RFIDCard.card_uid == uid)
+    result = await session.execute(stmt)
+    card = result.scalars().first()
+
+    auth = CardAuth(
+        status=_card_status(card),
+        owner_id=card.owner_id if card else None,
+        card_id=card.id if card else None,
+    )
+
+    if redis:
+        ttl = config.rfid_auth_cache_ttl_seconds if card else config.rfid_auth_negative_ttl_seconds
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "status": auth.status,
+                "owner_id": auth.owner_id or "",
+                "card_id": auth.card_id or "",
+            })
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    return auth
+
+async def invalidate_card_auth(redis: Redis | None, *uids: str | None):
+    """Smaže cache pro dané UID (např. staré i nové UID při změně karty)."""
+    keys = [_redis_key(uid) for uid in uids if uid]
+    if redis and keys:
+        await redis.delete(*keys)
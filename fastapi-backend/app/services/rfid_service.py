@@ -1,12 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from redis.asyncio import Redis
 from app.db.schema import RFIDCard
 # DŮLEŽITÉ: Přidán import RFIDCardUpdate
 from app.models.rfid import RFIDCardCreate, RFIDCardUpdate
+from app.services.rfid_auth_cache import invalidate_card_auth
 
 class RFIDService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, redis: Redis = None):
         self._db = session
+        self._redis = redis
 
     async def list_cards(self, owner_id: int | None = None, show_all: bool = False) -> list[RFIDCard]:
         stmt = select(RFIDCard)
@@ -44,6 +47,9 @@ class RFIDService:
         self._db.add(card)
         await self._db.commit()
         await self._db.refresh(card)
+
+        # UID mohlo být v cache jako neznámé (negative cache)
+        await invalidate_card_auth(self._redis, card.card_uid)
         return card
 
     async def get_card(self, card_id: int) -> RFIDCard | None:
@@ -86,6 +92,8 @@ class RFIDService:
         if next_is_enabled is True and next_is_active is False:
             raise ValueError("Cannot enable an inactive card. Set is_active=True first or simultaneously.")
 
+        old_uid = card.card_uid
+
         # Dynamický update polí
         update_data = data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
@@ -93,6 +101,9 @@ class RFIDService:
 
         await self._db.commit()
         await self._db.refresh(card)
+
+        # Zneplatníme cache autorizace (staré i případně nové UID)
+        await invalidate_card_auth(self._redis, old_uid, card.card_uid)
         return card
 
     # --- SOFT DELETE ---
@@ -106,4 +117,6 @@ class RFIDService:
         card.is_enabled = False
         
         await self._db.commit()
+
+        await invalidate_card_auth(self._redis, card.card_uid)
         return True
\ No newline at end of file
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from redis.asyncio import Redis
+
+from app.core.config import config
+from app.services.charger_lookup import ChargerLookup
+
+# Živé změny stavu nabíječek a konektorů.
+#
+# Publikují je ConnectorService.process_status_notification a ChargerService
+# (update_heartbeat / handle_disconnect) do Redis kanálu STATUS_CHANNEL - jen skutečné změny.
+# Každý worker má JEDNO odběratelské spojení (StatusBroadcaster.run) a zprávy rozdělí
+# do front jednotlivých klientů streamu (GET /chargers/stream), podle jejich filtru.
+
+STATUS_CHANNEL = "charger_status:events"
+
+async def publish_status_event(redis: Redis | None, event_type: str, ocpp_id: str, charger: ChargerLookup, **fields):
+    """
+    event_type: connector_status / charger_online / charger_offline
+    """
+    if not redis:
+        return
+    event = {
+        "type": event_type,
+        "ocpp_id": ocpp_id,
+        "charger_id": charger.id,
+        "latitude": charger.latitude,
+        "longitude": charger.longitude,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **fields,
+    }
+    await redis.publish(STATUS_CHANNEL, json.dumps(event))
+
+@dataclass
+class StreamFilter:
+    charger_ids: set[int] | None = None
+    bbox: tuple[float, float, float, float] | None = None  # min_lon, min_lat, max_lon, max_lat
+
+    def matches(self, event: dict) -> bool:
+        if self.charger_ids is not None and event.get("charger_id") not in self.charger_ids:
+            return False
+        if self.bbox is not None:
+            lat, lon = event.get("latitude"), event.get("longitude")
+            if lat is None or lon is None:
+                return False
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+                return False
+        return True
+
+@dataclass(eq=False)
+class Subscription:
+    filter: StreamFilter
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=config.status_stream_queue_size))
+
+    def push(self, data: str):
+        # Pomalý klient: zahodíme nejstarší událost, novější stav je důležitější
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(data)
+
+class StatusBroadcaster:
+    def __init__(self):
+        self._subscriptions: set[Subscription] = set()
+
+    def subscribe(self, stream_filter: StreamFilter) -> Subscription:
+        subscription = Subscription(filter=stream_filter)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def dispatch(self, data: str):
+        """Rozešle jednu zprávu z Redisu všem odběratelům, jejichž filtr odpovídá."""
+        if not self._subscriptions:
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        for subscription in self._subscriptions:
+            if subscription.filter.matches(event):
+                subscription.push(data)
+
+    async def run(self, redis: Redis):
+        """
+        Běží na pozadí po celou dobu života workeru (spouští lifespan v app/main.py).
+        """
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(STATUS_CHANNEL)
+                while True:
+                    # Krátký timeout místo blokujícího listen() (pool má socket_timeout)
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message["type"] == "message":
+                        self.dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Status stream listener error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+# Jeden na worker
+status_broadcaster = StatusBroadcaster()
@@ -1,18 +1,81 @@
 from datetime import datetime, timedelta, timezone
-from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, values, column, literal, func, case, and_, tuple_, union_all, Integer, DateTime
 from fastapi import HTTPException
+from redis.asyncio import Redis
 
-from app.db.schema import ChargeLog, Charger, Connector, RFIDCard
-from app.models.charge_log import TransactionMeterValueRequest, TransactionStartRequest, TransactionStopRequest
+from app.db.schema import ChargeLog, Charger, Connector, RFIDCard, User
+from app.models.charge_log import ChargeLogFilter, TransactionMeterValueRequest, TransactionStartRequest, TransactionStopRequest
 from app.models.enums import ChargeStatus
+from app.core.config import config
+from app.services.meter_sample_service import MeterSampleService, METER_SAMPLES_PENDING_KEY, sample_entry
+from app.services.charger_lookup import get_charger_lookup
+
+# Koalescované hodnoty elektroměru (hash transaction_id -> nejvyšší meter_value za okno)
+METER_VALUES_PENDING_KEY = "meter_values:pending"
+
+# HSET jen pokud je hodnota vyšší než čekající (atomicky v Redisu) - stejně jako
+# podmínka '<=' u přímého zápisu nepřepíše zpožděná / přeházená zpráva novější stav
+_HSET_MAX_SCRIPT = """
+local current = redis.call('hget', KEYS[1], ARGV[1])
+if not current or tonumber(current) < tonumber(ARGV[2]) then
+    return redis.call('hset', KEYS[1], ARGV[1], ARGV[2])
+end
+return 0
+"""
+
+def balance_moves(stopped):
+    """
+    UPDATE users pro vyúčtování ukončených transakcí ('stopped' = cokoliv se sloupci
+    user_id, charger_id, price): -cena uživateli, +cena majiteli nabíječky.
+    Peníze se hýbou jen u placené relace se známým uživatelem - anonymní relace
+    (neznámý RFID tag, karta bez uživatele) nikomu nic nepřipíše.
+    Pohyby se sečtou po uživatelích (GROUP BY), protože jeden UPDATE nesmí
+    změnit stejný řádek dvakrát (majitel nabíjí na vlastní nabíječce).
+    """
+    paid = and_(stopped.c.user_id.is_not(None), stopped.c.price > 0)
+    payer = (
+        select(stopped.c.user_id.label("user_id"), (-stopped.c.price).label("delta"))
+        .where(paid)
+    )
+    payee = (
+        select(Charger.owner_id.label("user_id"), stopped.c.price.label("delta"))
+        .join_from(stopped, Charger, Charger.id == stopped.c.charger_id)
+        .where(paid)
+    )
+    moves_union = union_all(payer, payee).subquery("moves_union")
+    deltas = (
+        select(moves_union.c.user_id, func.sum(moves_union.c.delta).label("delta"))
+        .group_by(moves_union.c.user_id)
+        .subquery("deltas")
+    )
+    return (
+        update(User)
+        .where(User.id == deltas.c.user_id)
+        .values(balance=User.balance + deltas.c.delta)
+        .returning(User.id)
+    )
 
 class TransactionService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, redis: Redis = None):
         self._db = session
+        self._redis = redis
+        # Časová řada elektroměru (bez Redisu se vzorky neukládají)
+        self._samples = MeterSampleService(session, redis) if redis else None
 
-    async def get_transactions(self, user_id: int | None = None, owner_id: int | None = None, charger_id: int | None = None, skip: int = 0, limit: int = 100):
+    async def get_transactions(
+        self,
+        user_id: int | None = None,
+        owner_id: int | None = None,
+        charger_id: int | None = None,
+        limit: int = 100,
+        after: tuple[datetime, int] | None = None,
+        filters: ChargeLogFilter | None = None,
+    ):
+        """
+        Historie nabíjení seřazená od nejnovější (start_time DESC, id DESC).
+        after = keyset stránkování: (start_time, id) posledního záznamu předchozí stránky.
+        """
         stmt = select(ChargeLog)
         
         if owner_id:
@@ -23,8 +86,20 @@ class TransactionService:
 
         if user_id:
             stmt = stmt.where(ChargeLog.user_id == user_id)
+
+        if filters:
+            if filters.status:
+                stmt = stmt.where(ChargeLog.status == filters.status)
+            if filters.start_from:
+                stmt = stmt.where(ChargeLog.start_time >= filters.start_from)
+            if filters.start_to:
+                stmt = stmt.where(ChargeLog.start_time < filters.start_to)
+
+        if after is not None:
+            stmt = stmt.where(tuple_(ChargeLog.start_time, ChargeLog.id) < tuple_(*after))
             
-        stmt = stmt.order_by(ChargeLog.start_time.desc()).offset(skip).limit(limit)
+        # Indexy (user_id|charger_id, start_time, id) se čtou pozpátku
+        stmt = stmt.order_by(ChargeLog.start_time.desc(), ChargeLog.id.desc()).limit(limit)
         
         result = await self._db.execute(stmt)
         return result.scalars().all()
@@ -34,186 +109,267 @@ class TransactionService:
         result = await self._db.execute(stmt)
         return result.scalars().first()
 
+    async def get_meter_samples(self, log: ChargeLog):
+        """Časová řada elektroměru pro danou transakci (seřazená podle času)."""
+        return await MeterSampleService(self._db, self._redis).get_samples(log)
+
     async def start_transaction(self, data: TransactionStartRequest) -> dict: # Změna návratového typu z int na dict
-        # 1. Najít nabíječku
-        stmt = select(Charger).where(Charger.ocpp_id == data.ocpp_id)
-        result = await self._db.execute(stmt)
-        charger = result.scalars().first()
+        # 1. Najít nabíječku (in-process cache, viz charger_lookup)
+        charger = await get_charger_lookup(self._db, data.ocpp_id)
         if not charger:
             raise HTTPException(status_code=404, detail="Charger not found")
 
-        # 2. Najít konektor
-        stmt_conn = select(Connector).where(
-            Connector.charger_id == charger.id,
-            Connector.ocpp_number == data.connector_id
+        # 2. Konektor + karta + vytvoření záznamu v JEDNOM dotazu:
+        # INSERT INTO charge_logs (...) SELECT ... FROM connectors LEFT JOIN rfid_cards ... RETURNING id
+        # Neznámá karta -> user_id/rfid_card_id zůstanou NULL (LEFT JOIN).
+        now = datetime.now(timezone.utc)
+        source = (
+            select(
+                literal(charger.id, Integer),
+                Connector.id,
+                RFIDCard.owner_id,
+                RFIDCard.id,
+                literal(data.timestamp, DateTime(timezone=True)),
+                literal(data.meter_start, Integer),
+                literal(ChargeStatus.running, ChargeLog.__table__.c.status.type),
+                func.coalesce(Connector.price_per_kwh, 0),
+                literal(now, DateTime(timezone=True)),
+            )
+            .select_from(Connector)
+            .outerjoin(RFIDCard, RFIDCard.card_uid == data.id_tag)
+            .where(
+                Connector.charger_id == charger.id,
+                Connector.ocpp_number == data.connector_id
+            )
         )
-        result_conn = await self._db.execute(stmt_conn)
-        connector = result_conn.scalars().first()
-        if not connector:
-            raise HTTPException(status_code=404, detail="Connector not found")
 
-        # 3. Najít uživatele/kartu
-        stmt_rfid = select(RFIDCard).where(RFIDCard.card_uid == data.id_tag)
-        result_rfid = await self._db.execute(stmt_rfid)
-        rfid_card = result_rfid.scalars().first()
-        
-        user_id = rfid_card.owner_id if rfid_card else None
-        rfid_id = rfid_card.id if rfid_card else None
-
-        # 4. Vytvořit záznam
-        new_log = ChargeLog(
-            charger_id=charger.id,
-            connector_id=connector.id,
-            user_id=user_id,
-            rfid_card_id=rfid_id,
-            start_time=data.timestamp,
-            meter_start=data.meter_start,
-            status=ChargeStatus.running,
-            price_per_kwh=connector.price_per_kwh if connector.price_per_kwh else 0
+        stmt = (
+            insert(ChargeLog)
+            .from_select(
+                [
+                    ChargeLog.charger_id,
+                    ChargeLog.connector_id,
+                    ChargeLog.user_id,
+                    ChargeLog.rfid_card_id,
+                    ChargeLog.start_time,
+                    ChargeLog.meter_start,
+                    ChargeLog.status,
+                    ChargeLog.price_per_kwh,
+                    ChargeLog.last_update,
+                ],
+                source
+            )
+            .returning(ChargeLog.id)
         )
-        
-        self._db.add(new_log)
-        await self._db.flush()
+
+        result = await self._db.execute(stmt)
+        transaction_id = result.scalar()
+        if transaction_id is None:
+            # SELECT nevrátil žádný řádek -> konektor neexistuje, nic se nevložilo
+            await self._db.rollback()
+            raise HTTPException(status_code=404, detail="Connector not found")
+
         await self._db.commit()
 
-        # --- ZMĚNA: Vracíme více informací ---
-        # Předpokládám, že Connector má sloupec 'max_power' (kW)
-        # Pokud ne, doplňte si ho do modelu, nebo zde vraťte natvrdo třeba 11
+        # Connector nemá sloupec 'max_power' (jen max_power_w), proto stejně
+        # jako dřív vracíme výchozích 11 kW pro nastavení profilu.
         return {
-            "transaction_id": new_log.id,
-            "max_power": connector.max_power if hasattr(connector, 'max_power') else 11
+            "transaction_id": transaction_id,
+            "max_power": 11
         }
 
     async def stop_transaction(self, data: TransactionStopRequest) -> ChargeLog:
-        # 1. Najdeme běžící transakci
-        stmt = select(ChargeLog).where(ChargeLog.id == data.transaction_id)
+        """
+        Ukončí transakci a vyúčtuje ji JEDNÍM SQL příkazem (CTE):
+          1. stopped  - UPDATE charge_logs (meter_stop, energie, cena, status=completed)
+                        jen pokud transakce ještě není completed
+          2. moves    - převod ceny z účtu uživatele na účet majitele nabíječky
+        Duplicitní StopTransaction (retry z gateway) čeká na zámek řádku prvního
+        a pak už podmínku status <> completed nesplní -> nic se neúčtuje dvakrát.
+        """
+        # Pokud request obsahuje timestamp, použijeme ho, jinak aktuální čas
+        end_time = data.timestamp or datetime.now(timezone.utc)
+
+        # Spotřeba ve Wh (záporná spotřeba = elektroměr blbne -> 0)
+        consumed_wh = literal(data.meter_stop, Integer) - ChargeLog.meter_start
+        energy_wh = func.greatest(consumed_wh, 0)
+
+        # Cena = (Wh / 1000) * Cena_za_kWh, zaokrouhleno na haléře
+        price = case(
+            (
+                and_(consumed_wh > 0, ChargeLog.price_per_kwh > 0),
+                func.round(ChargeLog.price_per_kwh * consumed_wh / 1000, 2)
+            ),
+            else_=0
+        )
+
+        # 1. Ukončení transakce (podmínka na status = idempotence)
+        stopped = (
+            update(ChargeLog)
+            .where(
+                ChargeLog.id == data.transaction_id,
+                ChargeLog.status != ChargeStatus.completed
+            )
+            .values(
+                meter_stop=data.meter_stop,
+                end_time=end_time,
+                status=ChargeStatus.completed,
+                energy_wh=energy_wh,
+                price=price,
+                last_update=datetime.now(timezone.utc)
+            )
+            .returning(*ChargeLog.__table__.c)
+            .cte("stopped")
+        )
+
+        # 2. Pohyby na účtech (debet uživatele, kredit majiteli nabíječky)
+        moves = balance_moves(stopped).cte("moves")
+
+        # Hlavní dotaz vrací ukončený záznam; CTE "moves" se musí vykonat i bez odkazu
+        stmt = (
+            select(ChargeLog)
+            .from_statement(select(stopped).add_cte(moves))
+            .execution_options(populate_existing=True)
+        )
         result = await self._db.execute(stmt)
         log = result.scalars().first()
+        await self._db.commit()
+
+        if log:
+            return log
 
+        # Nic se neaktualizovalo: transakce neexistuje, nebo už je hotová (idempotence)
+        log = await self.get_transaction(data.transaction_id)
         if not log:
             raise ValueError(f"Transaction {data.transaction_id} not found")
+        return log
 
-        # Pokud už je hotová, vrátíme ji (idempotence) - aby se to nepočítalo dvakrát
-        if log.status == ChargeStatus.completed:
-            return log
+    async def process_meter_value(self, data: TransactionMeterValueRequest):
+        """
+        Aktualizuje běžící transakci o aktuální stav elektroměru.
+        S koalescencí (meter_value_coalesce_seconds > 0) jde hodnota jen do Redisu
+        a do DB ji propíše flush_meter_values (nejvyšší hodnota za okno).
+        Vzorek do časové řady (meter_samples) se zapíše vždy - je to auditní záznam
+        toho, co nabíječka poslala, monotónní podmínka platí jen pro charge_logs.meter_stop.
+        """
+        if self._redis and config.meter_value_coalesce_seconds > 0:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.eval(_HSET_MAX_SCRIPT, 1, METER_VALUES_PENDING_KEY, str(data.transaction_id), data.meter_value)
+                pipe.rpush(
+                    METER_SAMPLES_PENDING_KEY,
+                    sample_entry(data.transaction_id, data.meter_value, data.timestamp)
+                )
+                await pipe.execute()
+            return
 
-        # 2. Aktualizace dat z Requestu
-        log.meter_stop = data.meter_stop
-        
-        # Pokud request obsahuje timestamp, použijeme ho, jinak aktuální čas
-        if data.timestamp:
-            log.end_time = data.timestamp
-        else:
-            from datetime import datetime, timezone
-            log.end_time = datetime.now(timezone.utc)
-
-        # 3. Změna stavu na COMPLETED
-        log.status = ChargeStatus.completed
-
-        # 4. Výpočet spotřeby (pokud máme start i stop)
-        # meter_start a meter_stop jsou ve Wh
-        if log.meter_start is not None and log.meter_stop is not None:
-            consumed_wh = log.meter_stop - log.meter_start
-            # Ošetření záporné spotřeby (pokud by elektroměr blbnul)
-            log.energy_wh = max(0, consumed_wh)
-        else:
-            log.energy_wh = 0
-
-        # 5. Výpočet Ceny
-        # Cena = (Wh / 1000) * Cena_za_kWh
-        if log.energy_wh > 0 and log.price_per_kwh:
-            # Převedeme na Decimal pro přesný výpočet
-            kwh = Decimal(log.energy_wh) / Decimal(1000)
-            
-            # log.price_per_kwh je typu Decimal
-            log.price = log.price_per_kwh * kwh
-        else:
-            log.price = 0
-
-        # --- DEDUCT BALANCE FROM USER ---
-        if log.price > 0 and log.user_id:
-            # Atomic update for User (Deduct balance)
-            from sqlalchemy import update
-            from app.db.schema import User # Local import to avoid potential circular dep issues if any, though top-level is likely fine too.
-
-            stmt_deduct = (
-                update(User)
-                .where(User.id == log.user_id)
-                .values(balance=User.balance - log.price)
+        # Jeden UPDATE místo SELECT + změny přes ORM + COMMIT.
+        # Transakce, která neexistuje nebo už není 'running', se neaktualizuje (0 řádků),
+        # stejně tak hodnota menší než poslední známá (zpožděná / přeházená zpráva).
+        stmt = (
+            update(ChargeLog)
+            .where(
+                ChargeLog.id == data.transaction_id,
+                ChargeLog.status == ChargeStatus.running,
+                func.coalesce(ChargeLog.meter_stop, ChargeLog.meter_start) <= data.meter_value,
             )
-            await self._db.execute(stmt_deduct)
-            
-            # Atomic update for Owner (Credit balance)
-            # 1. Get Charger's owner_id
-            stmt_charger = select(Charger.owner_id).where(Charger.id == log.charger_id)
-            result_charger = await self._db.execute(stmt_charger)
-            owner_id = result_charger.scalars().first()
-            
-            if owner_id:
-                 stmt_credit = (
-                     update(User)
-                     .where(User.id == owner_id)
-                     .values(balance=User.balance + log.price)
-                 )
-                 await self._db.execute(stmt_credit)
-
-        # 6. Uložení do DB
-        self._db.add(log)
+            .values(
+                meter_stop=data.meter_value,
+                energy_wh=func.greatest(data.meter_value - ChargeLog.meter_start, 0),
+            )
+        )
+        # 'last_update' se nastaví samo (onupdate na sloupci)
+        await self._db.execute(stmt)
         await self._db.commit()
-        await self._db.refresh(log)
 
-        return log
-    
-    async def process_meter_value(self, data: TransactionMeterValueRequest):
+        # Vzorek do časové řady i když UPDATE nic nezměnil (dávkový zápis, viz MeterSampleService.flush)
+        if self._samples:
+            await self._samples.enqueue(data.transaction_id, data.meter_value, data.timestamp)
+
+    async def flush_meter_values(self) -> int:
         """
-        Aktualizuje běžící transakci o aktuální stav elektroměru.
+        Propíše koalescované hodnoty elektroměru z Redisu do charge_logs
+        jedním UPDATE ... FROM (VALUES ...). Volá se periodicky (app/services/jobs.py).
+        Vrací počet transakcí ve frontě.
         """
-        stmt = select(ChargeLog).where(ChargeLog.id == data.transaction_id)
-        result = await self._db.execute(stmt)
-        log = result.scalars().first()
+        # Atomicky vybereme a smažeme frontu (MULTI/EXEC)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(METER_VALUES_PENDING_KEY)
+            pipe.delete(METER_VALUES_PENDING_KEY)
+            pending, _ = await pipe.execute()
 
-        # Pokud transakce neexistuje nebo už není 'running', ignorujeme
-        if not log or log.status != ChargeStatus.running:
-            return
+        if not pending:
+            return 0
 
-        # Aktualizujeme stav
-        # Díky 'onupdate' v databázi se 'last_update' změní samo!
-        log.meter_stop = data.meter_value
-        
-        # Přepočet energie
-        consumed_wh = max(0, log.meter_stop - log.meter_start)
-        log.energy_wh = consumed_wh
+        meter = values(
+            column("transaction_id", Integer),
+            column("meter_value", Integer),
+            name="mv",
+        ).data([(int(tx_id), int(value)) for tx_id, value in pending.items()])
 
-        # Volitelně: Průběžný výpočet ceny (pokud máš cenu v logu nebo na konektoru)
-        if hasattr(log, 'price_per_kwh') and log.price_per_kwh:
-             # pozor na převod typů (Decimal vs int)
-             pass 
+        # Stejné podmínky jako u přímého zápisu (běžící transakce, monotónní elektroměr)
+        stmt = (
+            update(ChargeLog)
+            .where(
+                ChargeLog.id == meter.c.transaction_id,
+                ChargeLog.status == ChargeStatus.running,
+                func.coalesce(ChargeLog.meter_stop, ChargeLog.meter_start) <= meter.c.meter_value,
+            )
+            .values(
+                meter_stop=meter.c.meter_value,
+                energy_wh=func.greatest(meter.c.meter_value - ChargeLog.meter_start, 0),
+            )
+        )
 
-        await self._db.commit()
+        try:
+            await self._db.execute(stmt)
+            await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            # Vrátíme hodnoty zpět do fronty (vyšší hodnota, která mezitím přišla, zůstane)
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for tx_id, value in pending.items():
+                    pipe.eval(_HSET_MAX_SCRIPT, 1, METER_VALUES_PENDING_KEY, tx_id, value)
+                await pipe.execute()
+            raise
+
+        return len(pending)
 
-    async def close_stale_transactions(self, max_age_minutes: int = 15):
+    async def close_stale_transactions(self, max_age_minutes: int = 15, batch_size: int | None = None) -> int:
         """
-        Najde transakce, které jsou 'running', ale o kterých jsme neslyšeli déle než X minut.
+        Ukončí transakce, které jsou 'running', ale o kterých jsme neslyšeli déle než X minut.
+        Hromadně: UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING id,
+        po dávkách (batch_size), aby se zámky nedržely dlouho. SKIP LOCKED přeskočí řádky,
+        které právě zpracovává jiný worker (nebo na nich běží StopTransaction).
         """
+        batch_size = batch_size or config.stale_transaction_prune_batch_size
         limit_time = datetime.now(timezone.utc) - timedelta(minutes=max_age_minutes)
 
-        stmt = select(ChargeLog).where(
-            ChargeLog.status == ChargeStatus.running,
-            ChargeLog.last_update < limit_time
+        stale_ids = (
+            select(ChargeLog.id)
+            .where(
+                ChargeLog.status == ChargeStatus.running,
+                ChargeLog.last_update < limit_time
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+
+        # Ukončíme jako Failed časem posledního kontaktu (SET vidí původní last_update).
+        # Cena a energie už jsou tam uložené z posledního process_meter_value.
+        stmt = (
+            update(ChargeLog)
+            .where(ChargeLog.id.in_(stale_ids))
+            .values(status=ChargeStatus.failed, end_time=ChargeLog.last_update)
+            .returning(ChargeLog.id)
         )
-        result = await self._db.execute(stmt)
-        stale_logs = result.scalars().all()
 
         count = 0
-        for log in stale_logs:
-            # Ukončíme jako Failed (nebo Completed, záleží na preferenci)
-            log.status = ChargeStatus.failed 
-            log.end_time = log.last_update # Ukončíme časem posledního kontaktu
-            
-            # Cena a energie už jsou tam uložené z posledního process_meter_value
-            count += 1
-        
-        if count > 0:
+        while True:
+            result = await self._db.execute(stmt)
+            closed = len(result.scalars().all())
             await self._db.commit()
-        
-        return count
\ No newline at end of file
+
+            count += closed
+            if closed < batch_size:
+                return count
@@ -0,0 +1,120 @@
+"""
+Benchmark serializace velkých seznamů (ChargerRead, ChargeLogRead) do JSON:
+
+  - fastapi:      výchozí cesta FastAPI (validace -> Python dict/list v JSON módu -> json.dumps)
+  - encoder:      jsonable_encoder + JSONResponse (routy bez response_model)
+  - orjson:       validace -> dict -> orjson.dumps (jen pokud je orjson nainstalovaný)
+  - pydantic:     app.core.responses.ModelListResponse (pydantic-core rovnou do bytes)
+
+Nepotřebuje DB ani Redis, data jsou syntetická ORM-like objekty:
+
+    python -m benchmarks.bench_json_responses --sizes 1000 10000 --repeat 20
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import ModelListResponse, list_adapter
+from app.models.charger import ChargerRead
+from app.models.charge_log import ChargeLogRead
+
+try:
+    import orjson
+except ImportError:  # Volitelné - jen pro srovnání
+    orjson = None
+
+
+def make_chargers(n: int) -> list[SimpleNamespace]:
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i, ocpp_id=f"VOLTUJ-{i:06}", owner_id=1 + i % 50, name=f"Nabíječka {i}",
+            latitude=50.0 + i * 1e-4, longitude=14.4 + i * 1e-4,
+            street="Vinohradská", house_number=str(i), city="Praha", postal_code="12000", region="Praha",
+            is_active=True, is_enabled=True, status="Connected", created_at=created,
+            vendor="ABB", model="Terra AC", serial_number=f"SN{i}", firmware_version="1.8.2",
+            connectors=[
+                SimpleNamespace(
+                    id=i * 2 + n_, ocpp_number=n_, type="Type2", current_type="AC",
+                    max_power_w=22000, price_per_kwh=Decimal("8.50"), is_active=True,
+                    charger_id=i, status="Available",
+                )
+                for n_ in (1, 2)
+            ],
+        )
+        for i in range(n)
+    ]
+
+
+def make_charge_logs(n: int) -> list[SimpleNamespace]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i, status="completed", energy_wh=12_345 + i, price=Decimal("104.93"),
+            user_id=1 + i % 100, charger_id=1 + i % 500, connector_id=1 + i % 1000, rfid_card_id=None,
+            start_time=start + timedelta(minutes=i), end_time=start + timedelta(minutes=i + 45),
+        )
+        for i in range(n)
+    ]
+
+
+def fastapi_default(model, items) -> bytes:
+    adapter = list_adapter(model)
+    content = adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+
+def encoder(model, items) -> bytes:
+    validated = list_adapter(model).validate_python(items, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def with_orjson(model, items) -> bytes:
+    adapter = list_adapter(model)
+    return orjson.dumps(adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json"))
+
+
+def pydantic_bytes(model, items) -> bytes:
+    return ModelListResponse(model, items).body
+
+
+def measure(fn, model, items, repeat: int) -> tuple[float, int]:
+    fn(model, items)  # Zahřátí (TypeAdapter, cache)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(model, items)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    variants = [("fastapi", fastapi_default), ("encoder", encoder)]
+    if orjson is not None:
+        variants.append(("orjson", with_orjson))
+    variants.append(("pydantic", pydantic_bytes))
+
+    for model, factory in ((ChargerRead, make_chargers), (ChargeLogRead, make_charge_logs)):
+        for size in args.sizes:
+            items = factory(size)
+            print(f"\n{model.__name__} x {size}")
+            baseline = None
+            for name, fn in variants:
+                median_ms, length = measure(fn, model, items, args.repeat)
+                baseline = baseline or median_ms
+                print(f"  {name:<9} {median_ms:8.2f} ms  {length / 1024:8.0f} KiB  {baseline / median_ms:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
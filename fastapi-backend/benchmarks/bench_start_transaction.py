@@ -0,0 +1,125 @@
+"""
+Benchmark StartTransaction: původní verze (3x SELECT + flush + commit)
+vs. TransactionService.start_transaction (INSERT ... SELECT ... RETURNING).
+
+Potřebuje běžící PostgreSQL (bere se z .env stejně jako aplikace):
+
+    docker compose exec api python -m benchmarks.bench_start_transaction --iterations 500
+
+Vytvoří si vlastní testovací data (uživatel, nabíječka, konektor, karta) a na konci je smaže.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select, delete
+
+from app.db.schema import AsyncSessionLocal, User, Charger, Connector, RFIDCard, ChargeLog
+from app.models.charge_log import TransactionStartRequest
+from app.models.enums import ChargeStatus
+from app.services.transaction_service import TransactionService
+
+
+async def legacy_start_transaction(session, data: TransactionStartRequest) -> int:
+    """Původní implementace (před optimalizací) - pro srovnání."""
+    result = await session.execute(select(Charger).where(Charger.ocpp_id == data.ocpp_id))
+    charger = result.scalars().first()
+
+    result = await session.execute(select(Connector).where(
+        Connector.charger_id == charger.id,
+        Connector.ocpp_number == data.connector_id
+    ))
+    connector = result.scalars().first()
+
+    result = await session.execute(select(RFIDCard).where(RFIDCard.card_uid == data.id_tag))
+    rfid_card = result.scalars().first()
+
+    log = ChargeLog(
+        charger_id=charger.id,
+        connector_id=connector.id,
+        user_id=rfid_card.owner_id if rfid_card else None,
+        rfid_card_id=rfid_card.id if rfid_card else None,
+        start_time=data.timestamp,
+        meter_start=data.meter_start,
+        status=ChargeStatus.running,
+        price_per_kwh=connector.price_per_kwh or 0
+    )
+    session.add(log)
+    await session.flush()
+    await session.commit()
+    return log.id
+
+
+async def setup_fixtures(suffix: str) -> tuple[int, str, str]:
+    async with AsyncSessionLocal() as session:
+        user = User(name="bench", email=f"bench-{suffix}@example.com", password="x")
+        session.add(user)
+        await session.flush()
+
+        charger = Charger(
+            owner_id=user.id, name="Bench", latitude=50.0, longitude=14.0,
+            ocpp_id=f"BENCH-{suffix}", is_active=True, is_enabled=True
+        )
+        session.add(charger)
+        await session.flush()
+
+        session.add(Connector(charger_id=charger.id, ocpp_number=1, price_per_kwh=5, is_active=True))
+        session.add(RFIDCard(card_uid=f"B{suffix[:10]}", owner_id=user.id, is_active=True, is_enabled=True))
+        await session.commit()
+        return user.id, charger.ocpp_id, f"B{suffix[:10]}"
+
+
+async def cleanup_fixtures(user_id: int, ocpp_id: str):
+    async with AsyncSessionLocal() as session:
+        charger_id = (await session.execute(select(Charger.id).where(Charger.ocpp_id == ocpp_id))).scalar()
+        await session.execute(delete(ChargeLog).where(ChargeLog.charger_id == charger_id))
+        await session.execute(delete(User).where(User.id == user_id))  # CASCADE: nabíječka, konektor, karta
+        await session.commit()
+
+
+async def measure(iterations: int, call) -> list[float]:
+    timings = []
+    async with AsyncSessionLocal() as session:
+        await call(session)  # warm-up (spojení v poolu, cache ocpp_id)
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await call(session)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    q = statistics.quantiles(timings, n=100)
+    print(f"{name:<10} mean {statistics.mean(timings):7.2f} ms | p50 {q[49]:7.2f} ms | p95 {q[94]:7.2f} ms | p99 {q[98]:7.2f} ms")
+
+
+async def main(iterations: int):
+    suffix = uuid.uuid4().hex
+    user_id, ocpp_id, id_tag = await setup_fixtures(suffix)
+
+    def request() -> TransactionStartRequest:
+        return TransactionStartRequest(
+            ocpp_id=ocpp_id, connector_id=1, id_tag=id_tag,
+            meter_start=0, timestamp=datetime.now(timezone.utc)
+        )
+
+    try:
+        before = await measure(iterations, lambda s: legacy_start_transaction(s, request()))
+        after = await measure(iterations, lambda s: TransactionService(s).start_transaction(request()))
+    finally:
+        await cleanup_fixtures(user_id, ocpp_id)
+
+    print(f"StartTransaction latency ({iterations} calls)")
+    report("before", before)
+    report("after", after)
+    print(f"speedup (p50): {statistics.median(before) / statistics.median(after):.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
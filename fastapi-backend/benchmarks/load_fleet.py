@@ -0,0 +1,196 @@
+"""
+Zátěžový test interního API: N simulovaných nabíječek najednou.
+
+Každá nabíječka projde stejný průběh jako přes OCPP gateway (ocpp-backend):
+handshake -> BootNotification -> StatusNotification -> Authorize -> StartTransaction
+-> MeterValues (heartbeat + meter-values) -> StopTransaction -> StatusNotification.
+Na konci vypíše latence (p50/p95/p99) a propustnost pro každý endpoint.
+
+Potřebuje běžící PostgreSQL a Redis (bere se z .env stejně jako aplikace):
+
+    # In-process (app.main:app přes ASGI transport, bez síťové vrstvy)
+    docker compose exec api python -m benchmarks.load_fleet --chargers 200 --meter-values 20
+
+    # Přes HTTP proti běžící instanci
+    docker compose exec api python -m benchmarks.load_fleet --chargers 200 --url http://localhost:80
+
+Vytvoří si vlastní testovací data (uživatel, nabíječky, konektory, karta) a na konci je smaže.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import select, delete
+
+from app.core.config import config
+from app.db.schema import AsyncSessionLocal, User, Charger, Connector, RFIDCard, ChargeLog
+
+INTERNAL_PREFIX = "/api/v1/internal"
+
+
+class Stats:
+    """Latence (ms) a chyby podle endpointu (šablona cesty, ne konkrétní ocpp_id)."""
+
+    def __init__(self):
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, path: str, **kwargs) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, INTERNAL_PREFIX + path, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.timings[name].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, duration: float):
+        print(f"{'endpoint':<40} {'count':>7} {'err':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, timings in self.timings.items():
+            q = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+            print(
+                f"{name:<40} {len(timings):>7} {self.errors[name]:>5} {len(timings) / duration:>9.1f} "
+                f"{q[49]:>8.2f} {q[94]:>8.2f} {q[98]:>8.2f}"
+            )
+        total = sum(len(t) for t in self.timings.values())
+        print(f"{'TOTAL':<40} {total:>7} {sum(self.errors.values()):>5} {total / duration:>9.1f}")
+
+
+async def simulate_charger(client: httpx.AsyncClient, stats: Stats, ocpp_id: str, id_tag: str, meter_values: int, interval: float):
+    """Jedna nabíječka: celý životní cyklus jedné nabíjecí session."""
+    now = lambda: datetime.now(timezone.utc).isoformat()
+
+    # 1. Handshake (gateway ověřuje existenci nabíječky)
+    response = await stats.call(client, "GET /charger/exists/{ocpp_id}", "GET", f"/charger/exists/{ocpp_id}")
+    if response is None or response.status_code != 200:
+        return
+
+    # 2. BootNotification
+    await stats.call(
+        client, "POST /boot-notification/{ocpp_id}", "POST", f"/boot-notification/{ocpp_id}",
+        json={"vendor": "LoadTest", "model": "Sim", "firmware_version": "1.0"}
+    )
+
+    # 3. StatusNotification
+    status = {"ocpp_id": ocpp_id, "connector_number": 1, "status": "Available"}
+    await stats.call(client, "POST /connector-status", "POST", "/connector-status", json=status)
+
+    # 4. Authorize
+    await stats.call(client, "POST /authorize/{ocpp_id}", "POST", f"/authorize/{ocpp_id}", json={"id_tag": id_tag})
+
+    # 5. StartTransaction
+    await stats.call(client, "POST /connector-status", "POST", "/connector-status", json={**status, "status": "Charging"})
+    response = await stats.call(
+        client, "POST /transaction/start", "POST", "/transaction/start",
+        json={"ocpp_id": ocpp_id, "connector_id": 1, "id_tag": id_tag, "meter_start": 0, "timestamp": now()},
+        headers={"Idempotency-Key": f"{ocpp_id}:start"}
+    )
+    if response is None or response.status_code != 200:
+        return
+    transaction_id = response.json()["transactionId"]
+
+    # 6. MeterValues (gateway posílá zároveň heartbeat, viz MeterValues.js)
+    meter = 0
+    for i in range(meter_values):
+        if interval:
+            await asyncio.sleep(interval)
+        meter += 250
+        await stats.call(client, "POST /heartbeat/{ocpp_id}", "POST", f"/heartbeat/{ocpp_id}")
+        await stats.call(
+            client, "POST /transaction/meter-values", "POST", "/transaction/meter-values",
+            json={"transaction_id": transaction_id, "meter_value": meter, "timestamp": now()},
+            headers={"Idempotency-Key": f"{ocpp_id}:mv-{i}"}
+        )
+
+    # 7. StopTransaction
+    await stats.call(
+        client, "POST /transaction/stop", "POST", "/transaction/stop",
+        json={"transaction_id": transaction_id, "meter_stop": meter, "timestamp": now(), "id_tag": id_tag, "reason": "Local"},
+        headers={"Idempotency-Key": f"{ocpp_id}:stop"}
+    )
+    await stats.call(client, "POST /connector-status", "POST", "/connector-status", json=status)
+
+
+async def setup_fixtures(suffix: str, chargers: int) -> tuple[int, list[str], str]:
+    async with AsyncSessionLocal() as session:
+        user = User(name="load", email=f"load-{suffix}@example.com", password="x", balance=1_000_000)
+        session.add(user)
+        await session.flush()
+
+        fleet = [
+            Charger(
+                owner_id=user.id, name=f"Load {i}", latitude=50.0 + i / 10000, longitude=14.0,
+                ocpp_id=f"LOAD-{suffix[:8]}-{i}", is_active=True, is_enabled=True
+            )
+            for i in range(chargers)
+        ]
+        session.add_all(fleet)
+        await session.flush()
+
+        session.add_all([
+            Connector(charger_id=charger.id, ocpp_number=1, price_per_kwh=5, is_active=True)
+            for charger in fleet
+        ])
+        id_tag = f"L{suffix[:10]}"
+        session.add(RFIDCard(card_uid=id_tag, owner_id=user.id, is_active=True, is_enabled=True))
+        await session.commit()
+        return user.id, [charger.ocpp_id for charger in fleet], id_tag
+
+
+async def cleanup_fixtures(user_id: int):
+    async with AsyncSessionLocal() as session:
+        charger_ids = select(Charger.id).where(Charger.owner_id == user_id)
+        await session.execute(delete(ChargeLog).where(ChargeLog.charger_id.in_(charger_ids)))
+        await session.execute(delete(User).where(User.id == user_id))  # CASCADE: nabíječky, konektory, karta
+        await session.commit()
+
+
+def make_client(url: str | None, api_key: str) -> httpx.AsyncClient:
+    headers = {"x-api-key": api_key}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if url:
+        return httpx.AsyncClient(base_url=url, headers=headers, timeout=30, limits=limits)
+
+    # In-process: volání jdou přímo do ASGI aplikace
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", headers=headers, timeout=30)
+
+
+async def main(chargers: int, meter_values: int, interval: float, url: str | None, api_key: str):
+    suffix = uuid.uuid4().hex
+    user_id, ocpp_ids, id_tag = await setup_fixtures(suffix, chargers)
+    stats = Stats()
+
+    try:
+        async with make_client(url, api_key) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                simulate_charger(client, stats, ocpp_id, id_tag, meter_values, interval)
+                for ocpp_id in ocpp_ids
+            ))
+            duration = time.perf_counter() - start
+    finally:
+        await cleanup_fixtures(user_id)
+
+    target = url or "in-process (app.main:app)"
+    print(f"Fleet of {chargers} chargers, {meter_values} meter values each -> {target}, {duration:.2f} s")
+    stats.report(duration)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chargers", type=int, default=100, help="Počet simulovaných nabíječek")
+    parser.add_argument("--meter-values", type=int, default=10, help="Počet MeterValues na jednu session")
+    parser.add_argument("--interval", type=float, default=0.0, help="Pauza mezi MeterValues (s), 0 = co nejrychleji")
+    parser.add_argument("--url", default=None, help="Base URL běžící instance; bez ní se volá app.main:app in-process")
+    parser.add_argument("--api-key", default=config.api_key)
+    args = parser.parse_args()
+    asyncio.run(main(args.chargers, args.meter_values, args.interval, args.url, args.api_key))
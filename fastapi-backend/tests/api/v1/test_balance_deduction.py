@@ -1,216 +1,167 @@
 import unittest
-from unittest.mock import AsyncMock, MagicMock, call
+from unittest.mock import AsyncMock, MagicMock
 from decimal import Decimal
 from datetime import datetime
-from app.services.transaction_service import TransactionService
+from sqlalchemy import create_engine, insert, select, MetaData, Table, Column, Integer, Numeric
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.services.transaction_service import TransactionService, balance_moves
 from app.models.charge_log import TransactionStopRequest
 from app.models.enums import ChargeStatus
-from app.db.schema import ChargeLog, User, Charger
+from app.db.schema import Base, ChargeLog, Charger, User
+
+def result_with(log):
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = log
+    return result
+
+def compiled_sql(mock_session, call_index=0) -> str:
+    stmt = mock_session.execute.call_args_list[call_index].args[0]
+    return str(stmt.compile(dialect=asyncpg.dialect()))
 
 class TestBalanceDeduction(unittest.IsolatedAsyncioTestCase):
-    async def test_balance_deduction_success(self):
+    async def test_settlement_is_single_statement(self):
         # Setup
         mock_session = AsyncMock()
         service = TransactionService(mock_session)
-        
-        # Data
-        user_id = 123
-        initial_balance = Decimal("100.00")
-        price_per_kwh = Decimal("10.00")
-        conn_max_power_w = 22000
-        
-        mock_user = User(id=user_id, balance=initial_balance)
-        mock_log = ChargeLog(
-            id=1, 
-            user_id=user_id, 
-            status=ChargeStatus.running,
+
+        settled_log = ChargeLog(
+            id=1,
+            user_id=123,
+            status=ChargeStatus.completed,
             meter_start=0,
-            price_per_kwh=price_per_kwh
+            meter_stop=5000,
+            energy_wh=5000,
+            price_per_kwh=Decimal("10.00"),
+            price=Decimal("50.00")
         )
-        
-        # Mocks for DB calls
-        # We expect 2 queries: one for transaction, one for user
-        # 1. select(ChargeLog)
-        mock_result_log = MagicMock()
-        mock_result_log.scalars.return_value.first.return_value = mock_log
-        
-        # 2. select(User)
-        mock_result_user = MagicMock()
-        mock_result_user.scalars.return_value.first.return_value = mock_user
-
-        # 3. select(Charger) - NEW: Return None to skip owner credit logic in this test
-        mock_result_charger = MagicMock()
-        mock_result_charger.scalars.return_value.first.return_value = None
-        
-        # Prepare side_effect for session.execute
-        # Note: In the actual code, execute is awaited.
-        mock_session.execute.side_effect = [mock_result_log, mock_result_user, mock_result_charger]
-        
-        # Input Data
+        mock_session.execute.side_effect = [result_with(settled_log)]
+
         stop_req = TransactionStopRequest(
             transaction_id=1,
             meter_stop=5000, # 5 kWh
             timestamp=datetime.now()
         )
-        
+
         # Execute
         result_log = await service.stop_transaction(stop_req)
-        
-        # Verify
-        # Energy: 5000 Wh = 5 kWh
-        # Price: 5 * 10.00 = 50.00
-        self.assertEqual(result_log.energy_wh, 5000)
-        self.assertEqual(result_log.price, Decimal("50.00"))
-        
-        # User Balance: 100.00 - 50.00 = 50.00
-        self.assertEqual(mock_user.balance, Decimal("50.00"))
-        
-        # Check commits
-        self.assertTrue(mock_session.commit.called)
-        
-    async def test_balance_deduction_zero_price(self):
-        # Setup
+
+        # Verify: ukončení i oba pohyby na účtech v jednom dotazu + commit
+        self.assertIs(result_log, settled_log)
+        mock_session.execute.assert_awaited_once()
+        mock_session.commit.assert_awaited_once()
+        mock_session.refresh.assert_not_called()
+
+    async def test_settlement_runs_balance_moves_in_same_statement(self):
         mock_session = AsyncMock()
         service = TransactionService(mock_session)
-        
-        user_id = 123
-        initial_balance = Decimal("100.00")
-        
-        mock_user = User(id=user_id, balance=initial_balance)
-        mock_log = ChargeLog(
-            id=1, 
-            user_id=user_id, 
-            status=ChargeStatus.running,
-            meter_start=0,
-            price_per_kwh=Decimal("0.00") # Free charging
-        )
-        
-        # 1. select(ChargeLog)
-        mock_result_log = MagicMock()
-        mock_result_log.scalars.return_value.first.return_value = mock_log
-        
-        # No User query expected if price is 0
-        mock_session.execute.side_effect = [mock_result_log]
-        
-        stop_req = TransactionStopRequest(
-            transaction_id=1,
-            meter_stop=5000,
-            timestamp=datetime.now()
-        )
-        
-        await service.stop_transaction(stop_req)
-        
-        self.assertEqual(mock_log.price, 0)
-        self.assertEqual(mock_user.balance, initial_balance) # Unchanged
+        mock_session.execute.side_effect = [result_with(ChargeLog(id=1))]
 
-    async def test_balance_goes_negative(self):
-        # Setup
+        await service.stop_transaction(TransactionStopRequest(
+            transaction_id=1, meter_stop=1000, timestamp=datetime.now()
+        ))
+
+        sql = compiled_sql(mock_session)
+        # Ukončení jen pokud ještě není completed (idempotence) + pohyby jako CTE
+        self.assertIn("WITH stopped AS", sql)
+        self.assertIn("charge_logs.status != ", sql)
+        self.assertIn("moves AS \n(UPDATE users", sql)
+
+    async def test_duplicate_stop_is_not_charged_twice(self):
+        # Setup: CTE nic neaktualizuje (transakce už je completed)
         mock_session = AsyncMock()
         service = TransactionService(mock_session)
-        
-        # Data: User has 10.00, Charge costs 50.00
-        user_id = 123
-        initial_balance = Decimal("10.00")
-        price_per_kwh = Decimal("10.00") 
-        
-        mock_user = User(id=user_id, balance=initial_balance)
-        mock_log = ChargeLog(
-            id=1, 
-            user_id=user_id, 
-            status=ChargeStatus.running,
-            meter_start=0,
-            price_per_kwh=price_per_kwh
-        )
-        
-        mock_result_log = MagicMock()
-        mock_result_log.scalars.return_value.first.return_value = mock_log
-        mock_result_user = MagicMock()
-        mock_result_user.scalars.return_value.first.return_value = mock_user
-        
-        # 3. select(Charger) - Skip owner logic
-        mock_result_charger = MagicMock()
-        mock_result_charger.scalars.return_value.first.return_value = None
-
-        mock_session.execute.side_effect = [mock_result_log, mock_result_user, mock_result_charger]
-        
+
+        completed_log = ChargeLog(id=1, status=ChargeStatus.completed, price=Decimal("50.00"))
+        mock_session.execute.side_effect = [result_with(None), result_with(completed_log)]
+
         stop_req = TransactionStopRequest(
             transaction_id=1,
-            meter_stop=5000, # 5 kWh * 10 = 50.00 cost
+            meter_stop=5000,
             timestamp=datetime.now()
         )
-        
-        await service.stop_transaction(stop_req)
-        
-        # Verify
-        # 10.00 - 50.00 = -40.00
-        self.assertEqual(mock_user.balance, Decimal("-40.00"))
-
-    async def test_balance_transfer_user_to_owner(self):
-        # Setup
+
+        result_log = await service.stop_transaction(stop_req)
+
+        # Vrátí existující záznam, druhý dotaz je jen SELECT
+        self.assertIs(result_log, completed_log)
+        self.assertEqual(mock_session.execute.await_count, 2)
+        self.assertTrue(compiled_sql(mock_session, 1).startswith("SELECT"))
+
+    async def test_unknown_transaction(self):
         mock_session = AsyncMock()
         service = TransactionService(mock_session)
-        
-        # User (Payer)
-        user_id = 100
-        user_balance_start = Decimal("100.00")
-        mock_user = User(id=user_id, balance=user_balance_start)
-
-        # Owner (Receiver)
-        owner_id = 999
-        owner_balance_start = Decimal("50.00")
-        mock_owner = User(id=owner_id, balance=owner_balance_start)
-        
-        # Charger
-        mock_charger = Charger(id=55, owner_id=owner_id)
-
-        # Log
-        price_per_kwh = Decimal("10.00")
-        mock_log = ChargeLog(
-            id=1, 
-            user_id=user_id, 
-            charger_id=55,
-            status=ChargeStatus.running,
-            meter_start=0,
-            price_per_kwh=price_per_kwh
-        )
-        
-        # Mock DB chaining
-        mock_result_log = MagicMock()
-        mock_result_log.scalars.return_value.first.return_value = mock_log
-        
-        mock_result_user = MagicMock()
-        mock_result_user.scalars.return_value.first.return_value = mock_user
-
-        mock_result_charger = MagicMock()
-        mock_result_charger.scalars.return_value.first.return_value = mock_charger
-
-        mock_result_owner = MagicMock()
-        mock_result_owner.scalars.return_value.first.return_value = mock_owner
-        
-        # Sequentital calls:
-        # 1. select(ChargeLog) -> transaction
-        # 2. select(User) -> payer (deduct)
-        # 3. select(Charger) -> get owner_id
-        # 4. select(User) -> owner (credit)
-        mock_session.execute.side_effect = [
-            mock_result_log, 
-            mock_result_user, 
-            mock_result_charger, 
-            mock_result_owner
-        ]
-        
-        stop_req = TransactionStopRequest(
-            transaction_id=1,
-            meter_stop=1000, # 1 kWh => 10.00 cost
-            timestamp=datetime.now()
+        mock_session.execute.side_effect = [result_with(None), result_with(None)]
+
+        with self.assertRaises(ValueError):
+            await service.stop_transaction(TransactionStopRequest(
+                transaction_id=999, meter_stop=5000, timestamp=datetime.now()
+            ))
+
+
+class TestBalanceMoves(unittest.TestCase):
+    """
+    Pohyby na účtech (balance_moves) nad skutečnou databází (SQLite v paměti).
+    'stopped' zastupuje CTE s ukončenými transakcemi.
+    """
+    PAYER_ID = 100
+    OWNER_ID = 999
+    CHARGER_ID = 55
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine, tables=[User.__table__, Charger.__table__])
+        metadata = MetaData()
+        self.stopped = Table(
+            "stopped", metadata,
+            Column("user_id", Integer), Column("charger_id", Integer), Column("price", Numeric(10, 2))
         )
-        
-        await service.stop_transaction(stop_req)
-        
-        # Verify Payer (Deduction)
-        # 100 - 10 = 90
-        self.assertEqual(mock_user.balance, Decimal("90.00"))
-
-        # Verify Owner (Credit)
-        # 50 + 10 = 60
-        self.assertEqual(mock_owner.balance, Decimal("60.00"))
+        metadata.create_all(self.engine)
+
+        with self.engine.begin() as conn:
+            conn.execute(insert(User), [
+                dict(id=self.PAYER_ID, name="payer", email="payer@example.com", password="x", balance=Decimal("100.00")),
+                dict(id=self.OWNER_ID, name="owner", email="owner@example.com", password="x", balance=Decimal("50.00")),
+            ])
+            conn.execute(insert(Charger), [
+                dict(id=self.CHARGER_ID, owner_id=self.OWNER_ID, name="Charger", latitude=50.0, longitude=14.4)
+            ])
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def settle(self, user_id, price, charger_id=CHARGER_ID):
+        with self.engine.begin() as conn:
+            conn.execute(insert(self.stopped), [dict(user_id=user_id, charger_id=charger_id, price=price)])
+            conn.execute(balance_moves(self.stopped))
+            return dict(conn.execute(select(User.id, User.balance)).all())
+
+    def test_balance_transfer_user_to_owner(self):
+        balances = self.settle(self.PAYER_ID, Decimal("10.00"))
+
+        self.assertEqual(balances[self.PAYER_ID], Decimal("90.00"))  # 100 - 10
+        self.assertEqual(balances[self.OWNER_ID], Decimal("60.00"))  # 50 + 10
+
+    def test_balance_goes_negative(self):
+        balances = self.settle(self.PAYER_ID, Decimal("150.00"))
+
+        self.assertEqual(balances[self.PAYER_ID], Decimal("-50.00"))
+        self.assertEqual(balances[self.OWNER_ID], Decimal("200.00"))
+
+    def test_anonymous_session_credits_nobody(self):
+        # Neznámý RFID tag / karta bez uživatele -> nikdo neplatí, majitel nic nedostane
+        balances = self.settle(None, Decimal("10.00"))
+
+        self.assertEqual(balances[self.PAYER_ID], Decimal("100.00"))
+        self.assertEqual(balances[self.OWNER_ID], Decimal("50.00"))
+
+    def test_zero_price_moves_nothing(self):
+        balances = self.settle(self.PAYER_ID, Decimal("0.00"))
+
+        self.assertEqual(balances[self.PAYER_ID], Decimal("100.00"))
+        self.assertEqual(balances[self.OWNER_ID], Decimal("50.00"))
+
+    def test_owner_charging_on_own_charger(self):
+        balances = self.settle(self.OWNER_ID, Decimal("10.00"))
+
+        self.assertEqual(balances[self.OWNER_ID], Decimal("50.00"))
+        self.assertEqual(balances[self.PAYER_ID], Decimal("100.00"))
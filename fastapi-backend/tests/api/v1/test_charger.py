@@ -14,7 +14,7 @@ os.environ.setdefault("JWT_SECRET", "test")
 os.environ.setdefault("DEBUG", "True")
 
 from fastapi.testclient import TestClient
-from app.api.v1.deps import get_charger_service, get_current_user
+from app.api.v1.deps import get_redis, get_charger_service, get_current_user
 from app.main import app
 from app.services.charger_service import ChargerService
 from app.models.enums import UserRole
@@ -26,6 +26,7 @@ class TestCharger(unittest.TestCase):
         
         # Override dependency
         app.dependency_overrides[get_charger_service] = lambda: self.mock_service
+        app.dependency_overrides[get_redis] = lambda: None
         
         # Default user mock (Owner)
         self.mock_user = MagicMock()
@@ -0,0 +1,100 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from app.api.v1.deps import get_redis, get_charger_service, get_current_user_optional
+from app.main import app
+from app.services.charger_service import ChargerService
+from app.services.charger_list_cache import etag_matches
+
+def charger(charger_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=charger_id, ocpp_id=f"V-{charger_id:03}", owner_id=1, name=f"C{charger_id}",
+        latitude=50.0, longitude=14.0, created_at="2023-01-01T00:00:00",
+        is_active=True, is_enabled=True, status="Connected", connectors=[]
+    )
+
+def make_redis(version="7", cached=None):
+    """In-memory náhrada za Redis pro verzi seznamu a uložené odpovědi."""
+    store = {}
+    pipe = MagicMock()
+    pipe.hset.side_effect = lambda key, mapping: store.__setitem__(key, mapping)
+    pipe.execute = AsyncMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    redis.get = AsyncMock(return_value=version)
+    redis.hgetall = AsyncMock(side_effect=lambda key: store.get(key, {}))
+    return redis, store
+
+class TestChargerListETag(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.mock_service = AsyncMock(spec=ChargerService)
+        self.mock_service.list_chargers.return_value = [charger(1)]
+        self.redis, self.store = make_redis()
+        app.dependency_overrides[get_charger_service] = lambda: self.mock_service
+        app.dependency_overrides[get_redis] = lambda: self.redis
+        app.dependency_overrides[get_current_user_optional] = lambda: None
+
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_first_request_is_cached_by_version(self):
+        response = self.client.get("/api/v1/chargers")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["ocpp_id"], "V-001")
+        self.assertIn("ETag", response.headers)
+        self.assertIn("chargers:list:7:public:100:0", self.store)
+
+    def test_unchanged_list_returns_304_without_db(self):
+        etag = self.client.get("/api/v1/chargers").headers["ETag"]
+        self.mock_service.list_chargers.reset_mock()
+
+        response = self.client.get("/api/v1/chargers", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.mock_service.list_chargers.assert_not_called()
+
+    def test_cached_body_served_without_db(self):
+        first = self.client.get("/api/v1/chargers")
+        self.mock_service.list_chargers.reset_mock()
+
+        second = self.client.get("/api/v1/chargers")
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.mock_service.list_chargers.assert_not_called()
+
+    def test_new_version_rebuilds(self):
+        self.client.get("/api/v1/chargers")
+        self.redis.get.return_value = "8"  # Změna (např. status konektoru)
+
+        self.client.get("/api/v1/chargers")
+
+        self.assertEqual(self.mock_service.list_chargers.await_count, 2)
+
+    def test_etag_matching(self):
+        self.assertTrue(etag_matches('"abc", "def"', '"def"'))
+        self.assertTrue(etag_matches('W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+if __name__ == "__main__":
+    unittest.main()
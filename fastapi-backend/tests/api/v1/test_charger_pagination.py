@@ -0,0 +1,81 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.api.v1.deps import get_redis, get_charger_service, get_current_user_optional
+from app.core.pagination import encode_cursor, decode_cursor
+from app.main import app
+from app.services.charger_service import ChargerService
+from app.models.charger import ChargerFilter
+
+def charger(charger_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=charger_id, ocpp_id=f"V-{charger_id:03}", owner_id=1, name=f"C{charger_id}",
+        latitude=50.0, longitude=14.0, created_at="2023-01-01T00:00:00",
+        is_active=True, is_enabled=True, status="Disconnected", connectors=[]
+    )
+
+class TestChargerPagination(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.mock_service = AsyncMock(spec=ChargerService)
+        app.dependency_overrides[get_charger_service] = lambda: self.mock_service
+        app.dependency_overrides[get_redis] = lambda: None
+        app.dependency_overrides[get_current_user_optional] = lambda: None
+
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_full_page_returns_next_cursor(self):
+        self.mock_service.list_chargers.return_value = [charger(1), charger(2)]
+
+        response = self.client.get("/api/v1/chargers?limit=2")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(decode_cursor(response.headers["X-Next-Cursor"]), {"id": 2})
+
+    def test_cursor_is_passed_as_after_id(self):
+        self.mock_service.list_chargers.return_value = [charger(3)]
+
+        response = self.client.get(f"/api/v1/chargers?limit=2&cursor={encode_cursor({'id': 2})}")
+
+        self.assertEqual(response.status_code, 200)
+        self.mock_service.list_chargers.assert_called_with(show_all=False, limit=2, after_id=2, filters=ChargerFilter())
+        # Poslední (neúplná) stránka
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/v1/chargers?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+
+class TestListChargersQuery(unittest.IsolatedAsyncioTestCase):
+    async def test_keyset_query(self):
+        mock_session = AsyncMock()
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        mock_session.execute.return_value = result
+        service = ChargerService(mock_session)
+
+        await service.list_chargers(limit=50, after_id=120)
+
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        self.assertIn("chargers.id > ", sql)
+        self.assertIn("ORDER BY chargers.id", sql)
+        self.assertIn("LIMIT", sql)
+
+if __name__ == "__main__":
+    unittest.main()
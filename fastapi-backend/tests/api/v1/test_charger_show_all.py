@@ -13,10 +13,11 @@ os.environ.setdefault("API_KEY", "test")
 os.environ.setdefault("JWT_SECRET", "test")
 os.environ.setdefault("DEBUG", "True")
 
-from app.api.v1.deps import get_charger_service, get_current_user, get_current_user_optional
+from app.api.v1.deps import get_redis, get_charger_service, get_current_user, get_current_user_optional
 from app.main import app
 from app.services.charger_service import ChargerService
 from app.models.enums import UserRole
+from app.models.charger import ChargerFilter
 from app.db.schema import User
 
 class TestChargerShowAll(unittest.TestCase):
@@ -24,6 +25,7 @@ class TestChargerShowAll(unittest.TestCase):
         self.client = TestClient(app)
         self.mock_service = AsyncMock(spec=ChargerService)
         app.dependency_overrides[get_charger_service] = lambda: self.mock_service
+        app.dependency_overrides[get_redis] = lambda: None
         # Reset other overrides
         if get_current_user in app.dependency_overrides:
             del app.dependency_overrides[get_current_user]
@@ -56,7 +58,7 @@ class TestChargerShowAll(unittest.TestCase):
         response = self.client.get("/api/v1/chargers/?show_all=true")
         self.assertEqual(response.status_code, 200)
         # Verify service was called with show_all=True
-        self.mock_service.list_chargers.assert_called_with(show_all=True)
+        self.mock_service.list_chargers.assert_called_with(show_all=True, limit=100, after_id=None, filters=ChargerFilter())
 
     def test_list_chargers_mine_show_all(self):
         # 1. Owner + mine=True + show_all=True -> sees own deleted
@@ -73,7 +75,7 @@ class TestChargerShowAll(unittest.TestCase):
         
         response = self.client.get("/api/v1/chargers/?mine=true&show_all=true")
         self.assertEqual(response.status_code, 200)
-        self.mock_service.list_chargers.assert_called_with(owner_id=1, show_all=True)
+        self.mock_service.list_chargers.assert_called_with(owner_id=1, show_all=True, limit=100, after_id=None, filters=ChargerFilter())
 
     def test_list_chargers_public_ignores_show_all(self):
         # Public user (or unauth) tries show_all=true -> ignored (show_all=False)
@@ -89,7 +91,7 @@ class TestChargerShowAll(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         # Verify service called with show_all=False (default or explicit False)
         # Because effective_show_all = show_all (True) and is_admin (False) -> False
-        self.mock_service.list_chargers.assert_called_with(show_all=False)
+        self.mock_service.list_chargers.assert_called_with(show_all=False, limit=100, after_id=None, filters=ChargerFilter())
 
 if __name__ == "__main__":
     unittest.main()
@@ -63,8 +63,8 @@ class TestConnector(unittest.TestCase):
         
         self.mock_service.get_connector.return_value = mock_connector
         
-        # Result of update
-        self.mock_service.get_connector_with_status.return_value = {
+        # Result of update (už načtený konektor + status z Redisu)
+        self.mock_service.update_connector.return_value = {
             "id": 1, 
             "charger_id": 1,
             "ocpp_number": 1,
@@ -75,6 +75,11 @@ class TestConnector(unittest.TestCase):
         response = self.client.patch("/api/v1/connectors/1", json={"max_power_w": 22000})
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["max_power_w"], 22000)
+        # Router předá konektor načtený pro kontrolu vlastníka, service ho nenačítá znovu
+        self.assertIs(self.mock_service.update_connector.await_args.kwargs["connector"], mock_connector)
+        # Status přečetl už update (jeden HGET), žádné další čtení
+        self.mock_service.with_status.assert_not_called()
+        self.mock_service.get_connector_with_status.assert_not_called()
 
     def test_update_connector_forbidden(self):
         # Mock connector owned by someone else
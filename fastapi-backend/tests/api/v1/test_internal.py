@@ -14,13 +14,28 @@ os.environ.setdefault("JWT_SECRET", "test")
 os.environ.setdefault("DEBUG", "True")
 
 from fastapi.testclient import TestClient
-from app.api.v1.deps import get_charger_service, get_connector_service, get_transaction_service
+from fastapi import HTTPException
+from app.api.v1.deps import get_charger_service, get_connector_service, get_transaction_service, get_db, get_redis
 from app.main import app
 from app.services.charger_service import ChargerService
 from app.services.connector_service import ConnectorService
 from app.services.transaction_service import TransactionService
 from app.models.charger import ChargerTechnicalStatus
 
+def fake_idempotency_redis():
+    """Jednoduchý in-memory Redis (SET NX / GET / DELETE)."""
+    store = {}
+    async def fake_set(key, value, nx=False, ex=None):
+        if nx and key in store:
+            return None
+        store[key] = value
+        return True
+    redis = MagicMock()
+    redis.set = AsyncMock(side_effect=fake_set)
+    redis.get = AsyncMock(side_effect=lambda key: store.get(key))
+    redis.delete = AsyncMock()
+    return redis
+
 class TestInternal(unittest.TestCase):
     def setUp(self):
         self.client = TestClient(app)
@@ -33,6 +48,8 @@ class TestInternal(unittest.TestCase):
         app.dependency_overrides[get_charger_service] = lambda: self.mock_charger_service
         app.dependency_overrides[get_connector_service] = lambda: self.mock_connector_service
         app.dependency_overrides[get_transaction_service] = lambda: self.mock_transaction_service
+        self.mock_db = AsyncMock()
+        app.dependency_overrides[get_db] = lambda: self.mock_db
         
         self.headers = {"x-api-key": "test_api_key"}
         
@@ -126,6 +143,128 @@ class TestInternal(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["transactionId"], 100)
 
+    def test_start_transaction_retry_with_idempotency_key(self):
+        redis = fake_idempotency_redis()
+        app.dependency_overrides[get_redis] = lambda: redis
+
+        self.mock_transaction_service.start_transaction.return_value = {
+            "transaction_id": 100,
+            "max_power": 11.0
+        }
+        data = {
+            "ocpp_id": "CP1",
+            "connector_id": 1,
+            "id_tag": "AABBCC",
+            "meter_start": 0,
+            "timestamp": "2023-01-01T10:00:00"
+        }
+        headers = {**self.headers, "Idempotency-Key": "CP1:msg-1"}
+
+        first = self.client.post("/api/v1/internal/transaction/start", json=data, headers=headers)
+        retry = self.client.post("/api/v1/internal/transaction/start", json=data, headers=headers)
+
+        self.assertEqual(first.json(), retry.json())
+        self.mock_transaction_service.start_transaction.assert_awaited_once()
+
+    def test_batch_mixed_events(self):
+        mock_conn = MagicMock()
+        mock_conn.id = 7
+        self.mock_connector_service.process_status_notification.return_value = mock_conn
+        self.mock_transaction_service.start_transaction.return_value = {
+            "transaction_id": 100,
+            "max_power": 11.0
+        }
+
+        data = {"events": [
+            {"type": "heartbeat", "ocpp_id": "CP1"},
+            {"type": "status", "ocpp_id": "CP1", "connector_number": 1, "status": "Charging"},
+            {"type": "start", "ocpp_id": "CP1", "connector_id": 1, "id_tag": "AABBCC",
+             "meter_start": 0, "timestamp": "2023-01-01T10:00:00"},
+            {"type": "meter_value", "transaction_id": 100, "meter_value": 1500},
+        ]}
+
+        response = self.client.post("/api/v1/internal/batch", json=data, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3])
+        self.assertTrue(all(r["ok"] for r in results))
+        self.assertEqual(results[1]["result"]["connector_id"], 7)
+        self.assertEqual(results[2]["result"]["transactionId"], 100)
+        self.mock_charger_service.update_heartbeat.assert_called_with("CP1")
+        self.mock_transaction_service.process_meter_value.assert_called_once()
+
+    def test_batch_event_error_is_isolated(self):
+        self.mock_transaction_service.start_transaction.side_effect = HTTPException(
+            status_code=404, detail="Charger not found"
+        )
+
+        data = {"events": [
+            {"type": "start", "ocpp_id": "UNKNOWN", "connector_id": 1, "id_tag": "AABBCC",
+             "meter_start": 0, "timestamp": "2023-01-01T10:00:00"},
+            {"type": "heartbeat", "ocpp_id": "CP1"},
+        ]}
+
+        response = self.client.post("/api/v1/internal/batch", json=data, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertFalse(results[0]["ok"])
+        self.assertEqual(results[0]["status_code"], 404)
+        self.assertTrue(results[1]["ok"])
+        self.mock_db.rollback.assert_awaited_once()
+
+    def test_batch_value_error_is_internal_error(self):
+        # Samostatný /transaction/stop nechá ValueError probublat (500) -> dávka stejně
+        self.mock_transaction_service.stop_transaction.side_effect = ValueError("Transaction 999 not found")
+
+        data = {"events": [{"type": "stop", "transaction_id": 999, "meter_stop": 1000,
+                            "timestamp": "2023-01-01T11:00:00"}]}
+
+        response = self.client.post("/api/v1/internal/batch", json=data, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        result = response.json()["results"][0]
+        self.assertFalse(result["ok"])
+        self.assertEqual(result["status_code"], 500)
+        self.assertEqual(result["error"], "Internal error")
+
+    def test_batch_retry_with_idempotency_keys(self):
+        redis = fake_idempotency_redis()
+        app.dependency_overrides[get_redis] = lambda: redis
+        self.mock_transaction_service.start_transaction.return_value = {
+            "transaction_id": 100,
+            "max_power": 11.0
+        }
+        self.mock_transaction_service.stop_transaction.return_value = MagicMock(
+            id=100, status="completed", energy_wh=1000, price=10, user_id=1, charger_id=1,
+            connector_id=1, rfid_card_id=None, start_time="2023-01-01T10:00:00", end_time="2023-01-01T11:00:00"
+        )
+
+        data = {"events": [
+            {"type": "start", "ocpp_id": "CP1", "connector_id": 1, "id_tag": "AABBCC",
+             "meter_start": 0, "timestamp": "2023-01-01T10:00:00", "idempotency_key": "CP1:msg-1"},
+            {"type": "stop", "transaction_id": 100, "meter_stop": 1000,
+             "timestamp": "2023-01-01T11:00:00", "idempotency_key": "CP1:msg-2"},
+        ]}
+
+        first = self.client.post("/api/v1/internal/batch", json=data, headers=self.headers)
+        retry = self.client.post("/api/v1/internal/batch", json=data, headers=self.headers)
+
+        # Opakovaná dávka nezaloží druhou transakci ani neúčtuje stop dvakrát
+        self.assertEqual(first.json(), retry.json())
+        self.assertTrue(all(r["ok"] for r in retry.json()["results"]))
+        self.mock_transaction_service.start_transaction.assert_awaited_once()
+        self.mock_transaction_service.stop_transaction.assert_awaited_once()
+        # Stejné klíče jako samostatné endpointy (hlavička Idempotency-Key)
+        stored = {c.args[0] for c in redis.set.await_args_list}
+        self.assertEqual(stored, {"idempotency:transaction:start:CP1:msg-1", "idempotency:transaction:stop:CP1:msg-2"})
+
+    def test_batch_unknown_event_type(self):
+        data = {"events": [{"type": "reboot", "ocpp_id": "CP1"}]}
+        response = self.client.post("/api/v1/internal/batch", json=data, headers=self.headers)
+        self.assertEqual(response.status_code, 422)
+
     def test_api_key_invalid(self):
         response = self.client.post("/api/v1/internal/heartbeat/CP1", headers={"x-api-key": "wrong"})
         self.assertEqual(response.status_code, 401)
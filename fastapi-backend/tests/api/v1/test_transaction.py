@@ -17,6 +17,7 @@ from fastapi.testclient import TestClient
 from app.api.v1.deps import get_transaction_service, get_current_user
 from app.main import app
 from app.services.transaction_service import TransactionService
+from app.models.charge_log import ChargeLogFilter
 from app.models.enums import UserRole, ChargeStatus
 
 class TestTransaction(unittest.TestCase):
@@ -53,7 +54,7 @@ class TestTransaction(unittest.TestCase):
         self.assertEqual(len(response.json()), 1)
         # Should verify service was called with user_id=1
         self.mock_service.get_transactions.assert_called_with(
-            user_id=1, charger_id=None, skip=0, limit=50
+            user_id=1, charger_id=None, limit=50, after=None, filters=ChargeLogFilter()
         )
 
     def test_list_transactions_as_admin(self):
@@ -65,7 +66,7 @@ class TestTransaction(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         # Admin calls without user_id filter
         self.mock_service.get_transactions.assert_called_with(
-            skip=0, limit=50, charger_id=None
+            limit=50, charger_id=None, after=None, filters=ChargeLogFilter()
         )
 
     def test_get_transaction_detail(self):
@@ -1,11 +1,15 @@
 import os
 import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
 from unittest.mock import MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 from app.api.v1.deps import get_transaction_service, get_current_user
 from app.main import app
 from app.services.transaction_service import TransactionService
-from app.models.enums import UserRole
+from app.models.charge_log import ChargeLogFilter
+from app.models.enums import UserRole, ChargeStatus
+from app.core.pagination import NEXT_CURSOR_HEADER
 
 class TestTransactionFiltering(unittest.TestCase):
     def setUp(self):
@@ -39,8 +43,9 @@ class TestTransactionFiltering(unittest.TestCase):
         self.mock_service.get_transactions.assert_called_with(
             owner_id=10, 
             charger_id=55, 
-            skip=0, 
-            limit=50
+            limit=50,
+            after=None,
+            filters=ChargeLogFilter()
         )
 
     def test_get_transactions_as_owner_without_charger_filter(self):
@@ -57,8 +62,9 @@ class TestTransactionFiltering(unittest.TestCase):
         self.mock_service.get_transactions.assert_called_with(
             owner_id=10, 
             charger_id=None, 
-            skip=0, 
-            limit=50
+            limit=50,
+            after=None,
+            filters=ChargeLogFilter()
         )
 
     def test_get_transactions_as_user_ignoring_as_owner(self):
@@ -77,9 +83,34 @@ class TestTransactionFiltering(unittest.TestCase):
         self.mock_service.get_transactions.assert_called_with(
             user_id=10, 
             charger_id=55, 
-            skip=0, 
-            limit=50
+            limit=50,
+            after=None,
+            filters=ChargeLogFilter()
         )
 
+    def test_keyset_cursor_and_filters(self):
+        self.mock_user.role = UserRole.user
+        last = SimpleNamespace(
+            id=7, status=ChargeStatus.completed, energy_wh=1000, price=None, user_id=10, charger_id=55,
+            connector_id=1, rfid_card_id=None, start_time=datetime(2026, 3, 1, 10, 0, tzinfo=timezone.utc), end_time=None,
+        )
+        self.mock_service.get_transactions.return_value = [last]
+
+        response = self.client.get("/api/v1/transactions/?limit=1&status=completed&start_from=2026-01-01T00:00:00Z")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.mock_service.get_transactions.await_args.kwargs["filters"],
+            ChargeLogFilter(status=ChargeStatus.completed, start_from=datetime(2026, 1, 1, tzinfo=timezone.utc)),
+        )
+
+        cursor = response.headers[NEXT_CURSOR_HEADER]
+        self.client.get(f"/api/v1/transactions/?limit=1&cursor={cursor}")
+        self.assertEqual(self.mock_service.get_transactions.await_args.kwargs["after"], (last.start_time, 7))
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/v1/transactions/usage?cursor=nonsense")
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,143 @@
+import os
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from app.api.v1.deps import get_redis, get_charger_service, get_current_user_optional
+from app.main import app
+from app.models.charger import ChargerFilter
+from app.models.enums import ConnectorType, CurrentType
+from app.services.availability_index import update_connector_availability, find_available_charger_ids
+from app.services.charger_service import ChargerService
+
+def make_redis(pipeline_result=None):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=pipeline_result or [])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    return redis, pipe
+
+def ccs(is_active=True):
+    return SimpleNamespace(
+        charger_id=7, ocpp_number=1, is_active=is_active, type=ConnectorType.CCS,
+        current_type=CurrentType.DC, max_power_w=150000, price_per_kwh=Decimal("12.90"),
+    )
+
+class TestAvailabilityIndex(unittest.IsolatedAsyncioTestCase):
+    async def test_available_connector_is_indexed(self):
+        redis, pipe = make_redis()
+
+        await update_connector_availability(redis, ccs(), "Available")
+
+        added = {c.args[0]: c.args[1] for c in pipe.zadd.call_args_list}
+        self.assertEqual(added, {
+            "avail:power": {"7:1": 150000},
+            "avail:type:CCS": {"7:1": 150000},
+            "avail:price": {"7:1": 12.9},
+        })
+        pipe.sadd.assert_called_once_with("avail:current:DC", "7:1")
+
+    async def test_busy_or_inactive_connector_is_removed(self):
+        for connector, status in ((ccs(), "Charging"), (ccs(is_active=False), "Available")):
+            redis, pipe = make_redis()
+
+            await update_connector_availability(redis, connector, status)
+
+            pipe.zadd.assert_not_called()
+            pipe.zrem.assert_any_call("avail:type:CCS", "7:1")
+
+    async def test_find_intersects_per_connector(self):
+        # Nabíječka 1: výkonný konektor je drahý, levný je slabý -> nevyhovuje
+        redis, pipe = make_redis(pipeline_result=[["1:1", "2:1", "2:2"], ["1:2", "2:2"]])
+
+        ids = await find_available_charger_ids(redis, connector_type=ConnectorType.CCS, min_power_w=50000, max_price=10)
+
+        self.assertEqual(ids, {2})
+        pipe.zrangebyscore.assert_any_call("avail:type:CCS", 50000, "+inf")
+        pipe.zrangebyscore.assert_any_call("avail:price", "-inf", 10)
+
+class TestAvailableChargerListing(unittest.IsolatedAsyncioTestCase):
+    async def test_no_available_candidates_skips_postgres(self):
+        mock_session = AsyncMock()
+        service = ChargerService(mock_session, MagicMock())
+
+        with patch("app.services.charger_service.find_available_charger_ids", AsyncMock(return_value=set())):
+            chargers = await service.list_chargers(filters=ChargerFilter(available=True, min_power_w=50000))
+
+        self.assertEqual(chargers, [])
+        mock_session.execute.assert_not_called()
+
+    async def test_candidates_narrow_the_query(self):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+        service = ChargerService(mock_session, MagicMock())
+
+        with patch("app.services.charger_service.find_available_charger_ids", AsyncMock(return_value={3, 5})):
+            await service.list_chargers(filters=ChargerFilter(available=True, connector_type=ConnectorType.CCS))
+
+        sql = str(mock_session.execute.call_args.args[0])
+        self.assertIn("chargers.id IN", sql)
+        self.assertIn("EXISTS", sql)
+
+    async def test_dropped_candidate_does_not_shorten_page(self):
+        # Nabíječka 1 je v indexu, ale je offline -> stránka se doplní další dávkou
+        def live(charger_id, status="Connected"):
+            return SimpleNamespace(id=charger_id, status=status, connectors=[SimpleNamespace(status="Available")])
+
+        batches = [[live(1, status="Disconnected"), live(2)], [live(3), live(4)]]
+        results = []
+        for batch in batches:
+            result = MagicMock()
+            result.scalars.return_value.all.return_value = batch
+            results.append(result)
+        mock_session = AsyncMock()
+        mock_session.execute.side_effect = results
+        service = ChargerService(mock_session, MagicMock())
+        service._enrich_chargers = AsyncMock()
+
+        with patch("app.services.charger_service.find_available_charger_ids", AsyncMock(return_value={1, 2, 3, 4})):
+            chargers = await service.list_chargers(limit=2, filters=ChargerFilter(available=True))
+
+        # Plná stránka -> route vrátí X-Next-Cursor a stránkování pokračuje
+        self.assertEqual([c.id for c in chargers], [2, 3])
+        self.assertEqual(mock_session.execute.await_count, 2)
+        second = mock_session.execute.await_args_list[1].args[0]
+        self.assertIn("chargers.id > 2", str(second.compile(compile_kwargs={"literal_binds": True})))
+
+class TestChargerFilterParams(unittest.TestCase):
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_query_params(self):
+        mock_service = AsyncMock(spec=ChargerService)
+        mock_service.list_chargers.return_value = []
+        app.dependency_overrides[get_charger_service] = lambda: mock_service
+        app.dependency_overrides[get_redis] = lambda: None
+        app.dependency_overrides[get_current_user_optional] = lambda: None
+
+        response = TestClient(app).get("/api/v1/chargers?available=true&connector_type=CCS&min_power_w=50000&max_price=12")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            mock_service.list_chargers.await_args.kwargs["filters"],
+            ChargerFilter(available=True, connector_type=ConnectorType.CCS, min_power_w=50000, max_price=Decimal("12")),
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import json
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from app.api.v1.deps import get_cluster_service
+from app.main import app
+from app.services.cluster_service import ClusterService, invalidate_cluster_tiles, invalidate_cluster_availability, MAX_CLUSTER_ZOOM
+
+def make_redis(mget=None, pipeline_result=None):
+    """mget = odpovědi postupných MGETů (dlaždice, pak počty dostupných)."""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=pipeline_result or [])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    redis.mget = AsyncMock(side_effect=mget or [])
+    redis.delete = AsyncMock()
+    return redis, pipe
+
+def state(**fields):
+    """Hash živého stavu online nabíječky (viz charger_state)."""
+    return {"online": datetime.now(timezone.utc).isoformat(), **fields}
+
+def row(charger_id, ocpp_id, lat, lon, connectors=(1,)):
+    return SimpleNamespace(id=charger_id, ocpp_id=ocpp_id, is_enabled=True, latitude=lat, longitude=lon, connectors=list(connectors))
+
+class TestClusterService(unittest.IsolatedAsyncioTestCase):
+    async def test_cached_tile_skips_db(self):
+        # Zoom 0 = jedna dlaždice (0, 0) přes celý svět
+        tile = [{"lat": 50.0, "lon": 14.0, "count": 2, "members": [[1, "A", True, [1]], [2, "B", True, [1, 2]]]}]
+        redis, _ = make_redis(
+            mget=[[json.dumps(tile)], [None]],
+            # A: online, Available | B: online, Charging + Available
+            pipeline_result=[state(**{"c:1:status": "Available"}), state(**{"c:1:status": "Charging", "c:2:status": "Available"})],
+        )
+        mock_session = AsyncMock()
+        service = ClusterService(mock_session, redis)
+
+        clusters = await service.get_clusters(-180, -90, 180, 90, zoom=0)
+
+        mock_session.execute.assert_not_called()
+        self.assertEqual(clusters, [{"latitude": 50.0, "longitude": 14.0, "count": 2, "available": 2, "charger_id": None}])
+
+    async def test_missing_tile_is_computed_and_cached(self):
+        # Stavy: A online + 1 konektor, B online + 1 konektor, C offline bez konektorů
+        redis, pipe = make_redis(mget=[[None]], pipeline_result=[
+            state(**{"c:1:status": "Available"}), state(**{"c:1:status": "Faulted"}), {}
+        ])
+        result = MagicMock()
+        # Praha a Brno jsou při zoomu 0 ve stejné buňce, Sydney jinde
+        result.all.return_value = [
+            row(1, "A", 50.08, 14.42), row(2, "B", 49.19, 16.60), row(3, "C", -33.86, 151.2, connectors=())
+        ]
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+        service = ClusterService(mock_session, redis)
+
+        clusters = await service.get_clusters(-180, -90, 180, 90, zoom=0)
+
+        self.assertEqual(sorted(c["count"] for c in clusters), [1, 2])
+        pair = next(c for c in clusters if c["count"] == 2)
+        self.assertEqual(pair["available"], 1)
+        single = next(c for c in clusters if c["count"] == 1)
+        self.assertEqual(single["charger_id"], 3)
+        # Přepočítaná dlaždice -> počty dostupných se čtou živě (bez dalšího MGET) a uloží se vedle ní
+        redis.mget.assert_awaited_once()
+        self.assertEqual([c.args[0] for c in pipe.set.call_args_list], ["clusters:0:0:0", "clusters:available:0:0:0"])
+        # Členové shluku nesou jen aktivní konektory (neaktivní není k dispozici)
+        sql = str(mock_session.execute.call_args.args[0])
+        self.assertIn("array_agg(connectors.ocpp_number) FILTER (WHERE connectors.is_active", sql)
+
+    async def test_cached_availability_skips_live_state(self):
+        tile = [
+            {"lat": 50.0, "lon": 14.0, "count": 2, "members": [[1, "A", True, [1]], [2, "B", True, [1]]]},
+            {"lat": -33.8, "lon": 151.2, "count": 1, "members": [[3, "C", True, [1]]]},
+        ]
+        redis, _ = make_redis(mget=[[json.dumps(tile)], [json.dumps([2, 0])]])
+        service = ClusterService(AsyncMock(), redis)
+
+        clusters = await service.get_clusters(-180, -90, 180, 90, zoom=0)
+
+        # Žádné čtení živého stavu (HGETALL na nabíječku) ani zápis cache
+        redis.pipeline.assert_not_called()
+        self.assertEqual([c["available"] for c in clusters], [2, 0])
+        self.assertEqual(redis.mget.await_args_list[1].args[0], ["clusters:available:0:0:0"])
+
+    async def test_stale_availability_is_recomputed(self):
+        # Počty ke starší podobě dlaždice (jiný počet buněk) se nepoužijí
+        tile = [{"lat": 50.0, "lon": 14.0, "count": 1, "members": [[1, "A", True, [1]]]}]
+        redis, pipe = make_redis(
+            mget=[[json.dumps(tile)], [json.dumps([0, 0])]],
+            pipeline_result=[state(**{"c:1:status": "Available"})],
+        )
+        service = ClusterService(AsyncMock(), redis)
+
+        clusters = await service.get_clusters(-180, -90, 180, 90, zoom=0)
+
+        self.assertEqual(clusters[0]["available"], 1)
+        pipe.set.assert_called_once()
+        self.assertEqual(pipe.set.call_args.args[:2], ("clusters:available:0:0:0", "[1]"))
+
+    async def test_charger_on_tile_edge_is_kept(self):
+        # lon=180 / lat=90 leží na hraně světa - buňka se nesmí dostat mimo dlaždici
+        redis, _ = make_redis(mget=[[None]], pipeline_result=[{}, {}])
+        result = MagicMock()
+        result.all.return_value = [row(1, "A", 90.0, 180.0), row(2, "B", -90.0, -180.0)]
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+        service = ClusterService(mock_session, redis)
+
+        clusters = await service.get_clusters(-180, -90, 180, 90, zoom=0)
+
+        self.assertEqual(sorted(c["charger_id"] for c in clusters), [1, 2])
+
+    async def test_too_many_tiles(self):
+        redis, _ = make_redis()
+        service = ClusterService(AsyncMock(), redis)
+
+        with self.assertRaises(ValueError):
+            await service.get_clusters(-180, -90, 180, 90, zoom=10)
+
+    async def test_invalidation_covers_all_zooms(self):
+        redis, _ = make_redis()
+
+        await invalidate_cluster_tiles(redis, (50.08, 14.42))
+
+        keys = redis.delete.await_args.args
+        # Dlaždice i počty dostupných pro každý zoom
+        self.assertEqual(len(keys), 2 * (MAX_CLUSTER_ZOOM + 1))
+        self.assertIn("clusters:0:0:0", keys)
+        self.assertIn("clusters:available:0:0:0", keys)
+
+    async def test_availability_invalidation_keeps_tiles(self):
+        redis, _ = make_redis()
+
+        await invalidate_cluster_availability(redis, (50.08, 14.42))
+
+        keys = redis.delete.await_args.args
+        self.assertEqual(len(keys), MAX_CLUSTER_ZOOM + 1)
+        self.assertTrue(all(key.startswith("clusters:available:") for key in keys))
+
+class TestClustersEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.mock_service = AsyncMock(spec=ClusterService)
+        app.dependency_overrides[get_cluster_service] = lambda: self.mock_service
+
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_clusters(self):
+        self.mock_service.get_clusters.return_value = [
+            {"latitude": 50.0, "longitude": 14.0, "count": 12, "available": 3, "charger_id": None}
+        ]
+
+        response = self.client.get("/api/v1/chargers/clusters?bbox=12.0,48.5,19.0,51.1&zoom=7")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["count"], 12)
+        self.mock_service.get_clusters.assert_awaited_once_with(12.0, 48.5, 19.0, 51.1, 7)
+
+    def test_invalid_bbox(self):
+        response = self.client.get("/api/v1/chargers/clusters?bbox=abc&zoom=7")
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.services.charger_service import ChargerService
+
+def make_redis(pipeline_result):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=pipeline_result)
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    return redis, pipe
+
+def charger(ocpp_id, is_enabled=True, connectors=(1,)):
+    return SimpleNamespace(
+        ocpp_id=ocpp_id, is_enabled=is_enabled,
+        connectors=[SimpleNamespace(ocpp_number=n) for n in connectors],
+    )
+
+def session_returning(obj):
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = obj
+    mock_session = AsyncMock()
+    mock_session.execute.return_value = result
+    return mock_session
+
+class TestChargerEnrichment(unittest.IsolatedAsyncioTestCase):
+    async def test_one_pipeline_for_connectors_and_device_status(self):
+        now = datetime.now(timezone.utc).isoformat()
+        redis, pipe = make_redis([
+            {"online": now, "c:1:status": "Charging", "c:2:status": "Available"},
+            {},
+            {"online": now},
+        ])
+        chargers = [charger("A", connectors=(1, 2)), charger("B"), charger("C", is_enabled=False)]
+
+        await ChargerService(AsyncMock(), redis)._enrich_chargers(chargers)
+
+        redis.pipeline.assert_called_once()
+        pipe.execute.assert_awaited_once()
+        self.assertEqual(pipe.hgetall.call_count, 3)
+        self.assertEqual([c.status for c in chargers[0].connectors], ["Charging", "Available"])
+        self.assertEqual(chargers[1].connectors[0].status, "Unknown")
+        self.assertEqual([c.status for c in chargers], ["Connected", "Disconnected", "Disabled"])
+
+    async def test_get_charger_without_enrichment_skips_redis(self):
+        redis, _ = make_redis([])
+        service = ChargerService(session_returning(charger("A")), redis)
+
+        found = await service.get_charger(1, enrich=False)
+
+        self.assertEqual(found.ocpp_id, "A")
+        redis.pipeline.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
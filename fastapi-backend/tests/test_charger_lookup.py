@@ -0,0 +1,113 @@
+import os
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.core.cache import TTLCache
+from app.services import charger_lookup
+from app.services.charger_lookup import get_charger_lookup, clear_charger_lookup_cache, INVALIDATION_CHANNEL
+from app.services.charger_service import ChargerService
+from app.models.charger import ChargerUpdate
+
+def make_row(id=1, owner_id=10, is_active=True, is_enabled=True):
+    row = MagicMock(id=id, owner_id=owner_id, is_active=is_active, is_enabled=is_enabled, latitude=50.0, longitude=14.0)
+    result = MagicMock()
+    result.first.return_value = row
+    return result
+
+class TestTTLCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")        # "a" je teď nejčerstvější
+        cache.set("c", 3)     # vyhodí "b"
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expiration(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        with patch("app.core.cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("app.core.cache.time.monotonic", return_value=1061.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+class TestChargerLookup(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        clear_charger_lookup_cache()
+
+    def tearDown(self):
+        clear_charger_lookup_cache()
+
+    async def test_second_lookup_is_served_from_cache(self):
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = make_row(id=5)
+
+        first = await get_charger_lookup(mock_session, "CP1")
+        second = await get_charger_lookup(mock_session, "CP1")
+
+        self.assertEqual(first.id, 5)
+        self.assertEqual(first, second)
+        mock_session.execute.assert_awaited_once()
+
+    async def test_unknown_charger_is_not_cached(self):
+        mock_session = AsyncMock()
+        result = MagicMock()
+        result.first.return_value = None
+        mock_session.execute.return_value = result
+
+        self.assertIsNone(await get_charger_lookup(mock_session, "UNKNOWN"))
+        self.assertIsNone(await get_charger_lookup(mock_session, "UNKNOWN"))
+        self.assertEqual(mock_session.execute.await_count, 2)
+
+    async def test_check_exists_uses_cache(self):
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = make_row(id=5, is_enabled=False)
+        service = ChargerService(mock_session)
+
+        self.assertEqual(await service.check_exists_by_ocpp("CP1"), {"id": 5, "is_active": False})
+        await service.check_exists_by_ocpp("CP1")
+        mock_session.execute.assert_awaited_once()
+
+    async def test_update_charger_invalidates_all_workers(self):
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = make_row(id=5)
+        await get_charger_lookup(mock_session, "CP1")
+
+        redis = MagicMock()
+        redis.publish = AsyncMock()
+        redis.delete = AsyncMock()  # Cache shluků na mapě
+        redis.incr = AsyncMock()    # Verze seznamu nabíječek
+        service = ChargerService(mock_session, redis)
+        service.get_charger = AsyncMock(return_value=MagicMock(ocpp_id="CP1", latitude=50.0, longitude=14.0))
+
+        await service.update_charger(5, ChargerUpdate(is_enabled=False))
+
+        redis.publish.assert_awaited_once_with(INVALIDATION_CHANNEL, "CP1")
+        self.assertIsNone(charger_lookup._cache.get("CP1"))
+
+    async def test_delete_charger_invalidates(self):
+        mock_session = AsyncMock()
+        redis = MagicMock()
+        redis.publish = AsyncMock()
+        redis.delete = AsyncMock()  # Cache shluků na mapě
+        redis.incr = AsyncMock()    # Verze seznamu nabíječek
+        service = ChargerService(mock_session, redis)
+        service.get_charger = AsyncMock(return_value=MagicMock(ocpp_id="CP1", latitude=50.0, longitude=14.0))
+
+        await service.delete_charger(5)
+        redis.publish.assert_awaited_once_with(INVALIDATION_CHANNEL, "CP1")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.api.v1.deps import get_charger_service
+from app.core.geo import bounding_box
+from app.db.schema import Charger
+from app.main import app
+from app.services.charger_service import ChargerService
+
+class TestBoundingBox(unittest.TestCase):
+    def test_box_contains_radius(self):
+        min_lat, max_lat, min_lon, max_lon = bounding_box(50.0, 14.0, 10_000)
+        # ~0.09° šířky, na 50. rovnoběžce ~0.14° délky
+        self.assertAlmostEqual(max_lat - 50.0, 0.0898, places=3)
+        self.assertAlmostEqual(max_lon - 14.0, 0.1397, places=3)
+        self.assertAlmostEqual(50.0 - min_lat, max_lat - 50.0)
+
+    def test_antimeridian_filters_only_latitude(self):
+        _, _, min_lon, max_lon = bounding_box(0.0, 179.99, 10_000)
+        self.assertIsNone(min_lon)
+        self.assertIsNone(max_lon)
+
+class TestFindNearby(unittest.IsolatedAsyncioTestCase):
+    async def test_bbox_prefilter_and_distance_order(self):
+        charger = Charger(id=1, ocpp_id="V-001", is_enabled=True, latitude=50.001, longitude=14.0)
+        charger.connectors = []
+        result = MagicMock()
+        result.all.return_value = [(charger, 111.19492)]
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+        service = ChargerService(mock_session)
+
+        chargers = await service.find_nearby(lat=50.0, lon=14.0, radius_m=2000, limit=5)
+
+        self.assertEqual(chargers, [charger])
+        self.assertEqual(charger.distance_m, 111.2)
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        self.assertIn("chargers.latitude BETWEEN", sql)
+        self.assertIn("chargers.longitude BETWEEN", sql)
+        self.assertIn("asin(sqrt(least(", sql)
+        self.assertIn("ORDER BY distance_m", sql)
+
+class TestNearbyEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.mock_service = AsyncMock(spec=ChargerService)
+        app.dependency_overrides[get_charger_service] = lambda: self.mock_service
+
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_nearby(self):
+        self.mock_service.find_nearby.return_value = [SimpleNamespace(
+            id=1, ocpp_id="V-001", owner_id=1, name="C1", latitude=50.001, longitude=14.0,
+            created_at="2023-01-01T00:00:00", is_active=True, is_enabled=True,
+            status="Connected", connectors=[], distance_m=111.2
+        )]
+
+        response = self.client.get("/api/v1/chargers/nearby?lat=50&lon=14&radius=2000&limit=5")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["distance_m"], 111.2)
+        self.mock_service.find_nearby.assert_awaited_once_with(lat=50.0, lon=14.0, radius_m=2000.0, limit=5)
+
+    def test_nearby_validates_coordinates(self):
+        response = self.client.get("/api/v1/chargers/nearby?lat=95&lon=14")
+        self.assertEqual(response.status_code, 422)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from app.api.v1.deps import get_charger_service
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.main import app
+from app.services.charger_service import ChargerService
+
+def charger(charger_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=charger_id, ocpp_id=f"V-{charger_id:03}", owner_id=1, name="Plzeň Depo",
+        latitude=49.74, longitude=13.37, created_at="2023-01-01T00:00:00",
+        is_active=True, is_enabled=True, status="Connected", connectors=[]
+    )
+
+class TestChargerSearchService(unittest.IsolatedAsyncioTestCase):
+    async def test_query_uses_indexed_expression(self):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+
+        await ChargerService(mock_session, None).search_chargers("50%_sleva", limit=10, offset=20)
+
+        stmt = mock_session.execute.call_args.args[0]
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        # Stejný výraz jako v indexu ix_chargers_search_trgm
+        self.assertIn("charger_search_text(chargers.name, chargers.city, chargers.street, chargers.postal_code)", sql)
+        self.assertIn("<%", sql)
+        self.assertIn("word_similarity", sql)
+        # Zástupné znaky LIKE z dotazu jsou escapované
+        self.assertIn("%50\\%\\_sleva%", compiled.params.values())
+
+class TestChargerSearchRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.mock_service = AsyncMock(spec=ChargerService)
+        app.dependency_overrides[get_charger_service] = lambda: self.mock_service
+
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_full_page_returns_offset_cursor(self):
+        self.mock_service.search_chargers.return_value = [charger(1), charger(2)]
+
+        response = self.client.get("/api/v1/chargers/search?q=plzen&limit=2")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(decode_cursor(response.headers[NEXT_CURSOR_HEADER]), {"offset": 2})
+
+        cursor = encode_cursor({"offset": 2})
+        self.client.get(f"/api/v1/chargers/search?q=plzen&limit=2&cursor={cursor}")
+        self.mock_service.search_chargers.assert_awaited_with("plzen", limit=2, offset=2)
+
+    def test_short_query_rejected(self):
+        response = self.client.get("/api/v1/chargers/search?q=a")
+        self.assertEqual(response.status_code, 422)
+
+    def test_whitespace_query_rejected(self):
+        # Po oříznutí prázdný dotaz by našel všechny nabíječky
+        response = self.client.get("/api/v1/chargers/search?q=%20%20%20")
+        self.assertEqual(response.status_code, 422)
+        self.mock_service.search_chargers.assert_not_called()
+
+    def test_query_is_stripped(self):
+        self.mock_service.search_chargers.return_value = []
+        self.client.get("/api/v1/chargers/search?q=%20plzen%20")
+        self.mock_service.search_chargers.assert_awaited_with("plzen", limit=20, offset=0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import unittest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.services import charger_state
+
+def make_redis(legacy: dict):
+    """Mock Redis se starými klíči (klíč -> hodnota) pro SCAN/MGET."""
+    async def scan_iter(match, count):
+        prefix, suffix = match.split("*", 1)
+        for key in legacy:
+            if key.startswith(prefix) and key.endswith(suffix.split("*")[-1]):
+                yield key
+
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    redis.scan_iter = scan_iter
+    redis.mget = AsyncMock(side_effect=lambda keys: [legacy[k] for k in keys])
+    return redis, pipe
+
+class TestChargerState(unittest.TestCase):
+    def test_online_means_recent_heartbeat(self):
+        now = datetime.now(timezone.utc)
+        self.assertTrue(charger_state.is_online({"online": (now - timedelta(seconds=60)).isoformat()}, now))
+        self.assertFalse(charger_state.is_online({"online": (now - timedelta(seconds=400)).isoformat()}, now))
+        self.assertFalse(charger_state.is_online({}, now))
+
+    def test_authorized_tag_expires(self):
+        now = datetime.now(timezone.utc)
+        state = {"authorized_tag": "AABBCC", "authorized_at": (now - timedelta(seconds=30)).isoformat()}
+        self.assertEqual(charger_state.authorized_tag(state, now), "AABBCC")
+        self.assertIsNone(charger_state.authorized_tag(state, now + timedelta(seconds=60)))
+
+class TestLegacyMigration(unittest.IsolatedAsyncioTestCase):
+    async def test_legacy_keys_are_folded_into_hash(self):
+        redis, pipe = make_redis({
+            "charger:CP1:online": "2026-01-01T10:00:00+00:00",
+            "charger:CP1:connector:2:status": "Charging",
+        })
+
+        count = await charger_state.migrate_legacy_state_keys(redis)
+
+        self.assertEqual(count, 2)
+        fields = {c.args[1]: c.args[2] for c in pipe.hsetnx.call_args_list}
+        self.assertEqual(fields, {"online": "2026-01-01T10:00:00+00:00", "c:2:status": "Charging"})
+        self.assertTrue(all(c.args[0] == "charger:CP1:state" for c in pipe.hsetnx.call_args_list))
+        deleted = [key for c in pipe.delete.call_args_list for key in c.args]
+        self.assertEqual(sorted(deleted), ["charger:CP1:connector:2:status", "charger:CP1:online"])
+
+if __name__ == "__main__":
+    unittest.main()
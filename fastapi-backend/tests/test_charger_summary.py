@@ -0,0 +1,88 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from app.api.v1.deps import get_redis, get_charger_service
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.main import app
+from app.services.charger_service import ChargerService
+
+def row(charger_id, ocpp_id, is_enabled=True, connectors=(1,), max_power_w=22000, min_price=Decimal("8.50")):
+    return SimpleNamespace(
+        id=charger_id, ocpp_id=ocpp_id, is_enabled=is_enabled, latitude=50.0, longitude=14.0,
+        max_power_w=max_power_w, min_price_per_kwh=min_price, connectors=list(connectors),
+    )
+
+class TestChargerSummaryService(unittest.IsolatedAsyncioTestCase):
+    async def test_column_query_and_live_state(self):
+        result = MagicMock()
+        result.all.return_value = [
+            row(1, "A", connectors=(1, 2)),
+            row(2, "B"),
+            row(3, "C", is_enabled=False),
+        ]
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+
+        now = datetime.now(timezone.utc).isoformat()
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[
+            {"online": now, "c:1:status": "Available", "c:2:status": "Available"},
+            {"c:1:status": "Available"},  # Offline -> nic není k dispozici
+            {"online": now, "c:1:status": "Available"},
+        ])
+        pipe.__aenter__ = AsyncMock(return_value=pipe)
+        pipe.__aexit__ = AsyncMock(return_value=False)
+        redis = MagicMock()
+        redis.pipeline.return_value = pipe
+
+        summaries = await ChargerService(mock_session, redis).list_charger_summaries(limit=10)
+
+        sql = str(mock_session.execute.call_args.args[0])
+        self.assertIn("FILTER (WHERE connectors.is_active", sql)
+        self.assertNotIn("chargers.street", sql)
+        self.assertEqual([s["status"] for s in summaries], ["Connected", "Disconnected", "Disabled"])
+        self.assertEqual([s["available_connectors"] for s in summaries], [2, 0, 0])
+        self.assertEqual(summaries[0]["min_price_per_kwh"], Decimal("8.50"))
+
+class TestChargerSummaryRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.mock_service = AsyncMock(spec=ChargerService)
+        app.dependency_overrides[get_charger_service] = lambda: self.mock_service
+        app.dependency_overrides[get_redis] = lambda: None
+
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_compact_payload_with_cursor(self):
+        self.mock_service.list_charger_summaries.return_value = [
+            {"id": 4, "latitude": 50.0, "longitude": 14.0, "status": "Connected",
+             "available_connectors": 1, "max_power_w": 11000, "min_price_per_kwh": Decimal("7.00")}
+        ]
+
+        response = self.client.get("/api/v1/chargers/summary?limit=1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()[0]), {
+            "id", "latitude", "longitude", "status", "available_connectors", "max_power_w", "min_price_per_kwh"
+        })
+        self.assertIn(NEXT_CURSOR_HEADER, response.headers)
+        self.mock_service.list_charger_summaries.assert_awaited_once_with(limit=1, after_id=None)
+
+if __name__ == "__main__":
+    unittest.main()
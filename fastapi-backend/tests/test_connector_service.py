@@ -0,0 +1,73 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.models.connector import ConnectorUpdate
+from app.services.connector_service import ConnectorService
+
+def connector():
+    return SimpleNamespace(
+        id=3, charger_id=1, ocpp_number=2, type=None, current_type=None, max_power_w=11000,
+        price_per_kwh=None, is_active=True, charger=SimpleNamespace(ocpp_id="CP1", owner_id=10, latitude=50.08, longitude=14.42),
+    )
+
+class TestConnectorDetail(unittest.IsolatedAsyncioTestCase):
+    async def test_detail_is_one_joined_query_and_one_redis_call(self):
+        result = MagicMock()
+        result.scalars.return_value.first.return_value = connector()
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+        redis = MagicMock()
+        redis.hget = AsyncMock(return_value="Charging")
+
+        detail = await ConnectorService(mock_session, redis).get_connector_with_status(3)
+
+        mock_session.execute.assert_awaited_once()
+        self.assertIn("JOIN chargers", str(mock_session.execute.call_args.args[0]))
+        redis.hget.assert_awaited_once_with("charger:CP1:state", "c:2:status")
+        self.assertEqual(detail.status, "Charging")
+
+    async def test_update_reuses_loaded_connector(self):
+        mock_session = AsyncMock()
+        redis = MagicMock()
+        redis.incr = AsyncMock()
+        redis.hget = AsyncMock(return_value="Available")
+        redis.delete = AsyncMock()
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        pipe.__aenter__ = AsyncMock(return_value=pipe)
+        pipe.__aexit__ = AsyncMock(return_value=False)
+        redis.pipeline.return_value = pipe
+        loaded = connector()
+
+        updated = await ConnectorService(mock_session, redis).update_connector(
+            3, ConnectorUpdate(max_power_w=22000), connector=loaded
+        )
+
+        self.assertEqual(loaded.max_power_w, 22000)
+        self.assertEqual((updated.id, updated.max_power_w, updated.status), (3, 22000, "Available"))
+        # Jeden HGET pro index volných konektorů i odpověď
+        redis.hget.assert_awaited_once_with("charger:CP1:state", "c:2:status")
+        mock_session.execute.assert_not_called()
+        mock_session.refresh.assert_not_called()
+        mock_session.commit.assert_awaited_once()
+        # Nový výkon se propíše i do indexu volných konektorů
+        pipe.zadd.assert_any_call("avail:power", {"1:2": 22000})
+        # ... a do shluků na mapy (dlaždice i počty dostupných)
+        deleted = redis.delete.await_args.args
+        self.assertIn("clusters:0:0:0", deleted)
+        self.assertIn("clusters:available:0:0:0", deleted)
+
+if __name__ == "__main__":
+    unittest.main()
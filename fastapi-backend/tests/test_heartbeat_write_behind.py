@@ -0,0 +1,135 @@
+import os
+import json
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.services.charger_service import ChargerService, HEARTBEAT_PENDING_KEY
+from app.services.charger_list_cache import CHARGER_LIST_VERSION_KEY
+from app.services.charger_lookup import ChargerLookup
+from app.services.status_stream import STATUS_CHANNEL
+
+CHARGER = ChargerLookup(id=1, owner_id=2, is_active=True, is_enabled=True, latitude=50.0, longitude=14.0)
+
+def make_redis(pipeline_result=None):
+    """Mock Redis klienta s pipeline() jako async context managerem."""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=pipeline_result or [])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    redis.set = AsyncMock()
+    redis.incr = AsyncMock()
+    redis.delete = AsyncMock()
+    return redis, pipe
+
+class TestHeartbeatWriteBehind(unittest.IsolatedAsyncioTestCase):
+    @patch("app.services.charger_service.config.heartbeat_write_behind", True)
+    @patch("app.services.charger_service.get_charger_lookup", AsyncMock(return_value=CHARGER))
+    async def test_charger_coming_online_bumps_list_version(self):
+        # HGET online (nabíječka byla offline), HSET, EXPIRE, HSET pending
+        redis, _ = make_redis(pipeline_result=[None, 1, True, 1])
+        redis.publish = AsyncMock()
+        service = ChargerService(AsyncMock(), redis)
+
+        await service.update_heartbeat("CP1")
+
+        redis.incr.assert_awaited_once_with(CHARGER_LIST_VERSION_KEY)
+        channel, data = redis.publish.await_args.args
+        self.assertEqual(channel, STATUS_CHANNEL)
+        self.assertEqual(json.loads(data)["type"], "charger_online")
+
+    @patch("app.services.charger_service.get_charger_lookup", AsyncMock(return_value=CHARGER))
+    async def test_disconnect_publishes_offline(self):
+        # HGET (čerstvý heartbeat) + HDEL
+        redis, pipe = make_redis(pipeline_result=[datetime.now(timezone.utc).isoformat(), 1])
+        redis.publish = AsyncMock()
+        service = ChargerService(AsyncMock(), redis)
+
+        await service.handle_disconnect("CP1")
+
+        pipe.hdel.assert_called_once_with("charger:CP1:state", "online")
+        self.assertEqual(json.loads(redis.publish.await_args.args[1])["type"], "charger_offline")
+        # Počty dostupných ve shlucích mapy se přepočítají
+        self.assertIn("clusters:available:0:0:0", redis.delete.await_args.args)
+
+    async def test_disconnect_of_stale_charger_is_silent(self):
+        # Heartbeat už je prošlý -> nabíječka byla offline i předtím
+        redis, _ = make_redis(pipeline_result=["2026-01-01T10:00:00+00:00", 1])
+        redis.publish = AsyncMock()
+        service = ChargerService(AsyncMock(), redis)
+
+        await service.handle_disconnect("CP1")
+
+        redis.incr.assert_not_called()
+        redis.publish.assert_not_called()
+
+    @patch("app.services.charger_service.config.heartbeat_write_behind", True)
+    async def test_heartbeat_does_not_touch_db(self):
+        mock_session = AsyncMock()
+        # Nabíječka už byla online (HGET vrátil čerstvý heartbeat)
+        redis, pipe = make_redis(pipeline_result=[datetime.now(timezone.utc).isoformat(), 0, True, 1])
+        service = ChargerService(mock_session, redis)
+
+        await service.update_heartbeat("CP1")
+
+        redis.incr.assert_not_called()
+        self.assertEqual(
+            [c.args[:2] for c in pipe.hset.call_args_list],
+            [("charger:CP1:state", "online"), (HEARTBEAT_PENDING_KEY, "CP1")],
+        )
+        mock_session.execute.assert_not_called()
+        mock_session.commit.assert_not_called()
+
+    @patch("app.services.charger_service.config.heartbeat_write_behind", False)
+    async def test_heartbeat_direct_mode_single_update(self):
+        mock_session = AsyncMock()
+        redis, pipe = make_redis(pipeline_result=[datetime.now(timezone.utc).isoformat(), 0, True])
+        service = ChargerService(mock_session, redis)
+
+        await service.update_heartbeat("CP1")
+
+        pipe.hset.assert_called_once()
+        mock_session.execute.assert_awaited_once()
+        mock_session.commit.assert_awaited_once()
+
+    async def test_flush_writes_one_bulk_update(self):
+        mock_session = AsyncMock()
+        pending = {
+            "CP1": "2026-01-01T10:00:00+00:00",
+            "CP2": "2026-01-01T10:00:05+00:00",
+        }
+        redis, _ = make_redis(pipeline_result=[pending, 1])
+        service = ChargerService(mock_session, redis)
+
+        count = await service.flush_heartbeats()
+
+        self.assertEqual(count, 2)
+        mock_session.execute.assert_awaited_once()
+        sql = str(mock_session.execute.call_args.args[0])
+        self.assertIn("UPDATE chargers", sql)
+        self.assertIn("VALUES", sql)
+        mock_session.commit.assert_awaited_once()
+
+    async def test_flush_empty_queue(self):
+        mock_session = AsyncMock()
+        redis, _ = make_redis(pipeline_result=[{}, 0])
+        service = ChargerService(mock_session, redis)
+
+        self.assertEqual(await service.flush_heartbeats(), 0)
+        mock_session.execute.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi import HTTPException
+from app.models.charge_log import TransactionMeterValueRequest
+from app.models.internal import MeterValueEvent
+from app.services.idempotency import run_idempotent, request_fingerprint
+
+def make_redis(acquired=True, stored=None):
+    redis = MagicMock()
+    redis.set = AsyncMock(return_value=acquired)
+    redis.get = AsyncMock(return_value=stored)
+    redis.delete = AsyncMock()
+    return redis
+
+class TestIdempotency(unittest.IsolatedAsyncioTestCase):
+    async def test_first_request_runs_and_stores_response(self):
+        redis = make_redis(acquired=True)
+        handler = AsyncMock(return_value={"transactionId": 42})
+
+        result = await run_idempotent(redis, "transaction:start", "CP1:msg-1", handler)
+
+        self.assertEqual(result, {"transactionId": 42})
+        handler.assert_awaited_once()
+        # Zámek (NX) a pak uložení odpovědi
+        self.assertEqual(redis.set.await_count, 2)
+        key, value = redis.set.await_args_list[1].args
+        self.assertEqual(key, "idempotency:transaction:start:CP1:msg-1")
+        self.assertEqual(json.loads(value), {"fingerprint": "", "response": {"transactionId": 42}})
+
+    async def test_retry_is_answered_from_cache(self):
+        request = TransactionMeterValueRequest(transaction_id=5, meter_value=1500)
+        stored = {"fingerprint": request_fingerprint(request), "response": {"status": "Accepted"}}
+        redis = make_redis(acquired=None, stored=json.dumps(stored))
+        handler = AsyncMock()
+
+        result = await run_idempotent(redis, "transaction:meter-values", "CP1:msg-1", handler, request=request)
+
+        self.assertEqual(result, {"status": "Accepted"})
+        handler.assert_not_called()
+
+    async def test_reused_key_with_different_body_is_new_request(self):
+        # Nabíječka po restartu znovu použila messageId -> jiná zpráva se stejným klíčem
+        old = TransactionMeterValueRequest(transaction_id=5, meter_value=1500)
+        stored = {"fingerprint": request_fingerprint(old), "response": {"status": "Accepted"}}
+        redis = make_redis(acquired=None, stored=json.dumps(stored))
+        handler = AsyncMock(return_value={"status": "Accepted"})
+        new = TransactionMeterValueRequest(transaction_id=9, meter_value=200)
+
+        await run_idempotent(redis, "transaction:meter-values", "CP1:msg-1", handler, request=new)
+
+        handler.assert_awaited_once()
+        value = json.loads(redis.set.await_args_list[-1].args[1])
+        self.assertEqual(value["fingerprint"], request_fingerprint(new))
+
+    def test_batch_event_has_same_fingerprint_as_request(self):
+        request = TransactionMeterValueRequest(transaction_id=5, meter_value=1500)
+        event = MeterValueEvent(type="meter_value", transaction_id=5, meter_value=1500, idempotency_key="CP1:msg-1")
+
+        self.assertEqual(request_fingerprint(event), request_fingerprint(request))
+
+    async def test_retry_while_in_progress_is_conflict(self):
+        redis = make_redis(acquired=None, stored="__in_progress__")
+        handler = AsyncMock()
+
+        with self.assertRaises(HTTPException) as ctx:
+            await run_idempotent(redis, "transaction:start", "CP1:msg-1", handler)
+
+        self.assertEqual(ctx.exception.status_code, 409)
+        handler.assert_not_called()
+
+    async def test_failure_releases_key(self):
+        redis = make_redis(acquired=True)
+        handler = AsyncMock(side_effect=HTTPException(status_code=404, detail="Connector not found"))
+
+        with self.assertRaises(HTTPException):
+            await run_idempotent(redis, "transaction:start", "CP1:msg-1", handler)
+
+        # Retry musí projít znovu
+        redis.delete.assert_awaited_once_with("idempotency:transaction:start:CP1:msg-1")
+
+    async def test_without_key_just_runs(self):
+        redis = make_redis()
+        handler = AsyncMock(return_value={"status": "Accepted"})
+
+        result = await run_idempotent(redis, "transaction:meter-values", None, handler)
+
+        self.assertEqual(result, {"status": "Accepted"})
+        redis.set.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
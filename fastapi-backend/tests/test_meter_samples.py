@@ -0,0 +1,159 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.api.v1.deps import get_transaction_service, get_current_user
+from app.main import app
+from app.db.schema import ChargeLog
+from app.models.charge_log import TransactionMeterValueRequest
+from app.models.enums import ChargeStatus, UserRole
+from app.models.meter_sample import MeterSampleRead
+from app.services.meter_sample_service import MeterSampleService, METER_SAMPLES_PENDING_KEY
+from app.services.transaction_service import TransactionService
+
+def make_redis(pipeline_result=None):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=pipeline_result or [])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    redis.rpush = AsyncMock()
+    return redis
+
+class TestMeterSampleService(unittest.IsolatedAsyncioTestCase):
+    async def test_meter_value_enqueues_sample(self):
+        mock_session = AsyncMock()
+        redis = make_redis()
+        service = TransactionService(mock_session, redis)
+
+        ts = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+        await service.process_meter_value(
+            TransactionMeterValueRequest(transaction_id=5, meter_value=1500, timestamp=ts)
+        )
+
+        redis.rpush.assert_awaited_once_with(METER_SAMPLES_PENDING_KEY, f"5|{ts.isoformat()}|1500")
+
+    async def test_meter_value_is_recorded_even_if_not_applied(self):
+        # Menší / přeházená hodnota nebo už ukončená transakce: UPDATE nic nezmění,
+        # ale vzorek do auditní časové řady patří
+        mock_session = AsyncMock()
+        redis = make_redis()
+        service = TransactionService(mock_session, redis)
+
+        await service.process_meter_value(TransactionMeterValueRequest(transaction_id=5, meter_value=1500))
+
+        mock_session.execute.assert_awaited_once()
+        redis.rpush.assert_awaited_once()
+
+    async def test_flush_is_one_multi_row_insert(self):
+        mock_session = AsyncMock()
+        raw = [
+            "5|2026-01-01T10:00:00+00:00|1000",
+            "5|2026-01-01T10:00:10+00:00|1100",
+            "6|2026-01-01T10:00:10+00:00|50",
+        ]
+        redis = make_redis(pipeline_result=[raw, True])
+        service = MeterSampleService(mock_session, redis)
+
+        written = await service.flush(batch_size=100)
+
+        self.assertEqual(written, 3)
+        mock_session.execute.assert_awaited_once()
+        mock_session.commit.assert_awaited_once()
+        # Vzorky neexistujících transakcí se odfiltrují JOINem na charge_logs
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        self.assertIn("JOIN charge_logs ON charge_logs.id = samples.transaction_id", sql)
+        self.assertIn("ON CONFLICT DO NOTHING", sql)
+
+    async def test_flush_failure_requeues_samples(self):
+        mock_session = AsyncMock()
+        mock_session.execute.side_effect = RuntimeError("db down")
+        raw = ["5|2026-01-01T10:00:00+00:00|1000"]
+        redis = make_redis(pipeline_result=[raw, True])
+        service = MeterSampleService(mock_session, redis)
+
+        with self.assertRaises(RuntimeError):
+            await service.flush()
+
+        redis.rpush.assert_awaited_once_with(METER_SAMPLES_PENDING_KEY, *raw)
+
+    async def test_ensure_partitions_current_and_next_month(self):
+        mock_session = AsyncMock()
+        mock_session.scalar.return_value = None  # Partitions zatím neexistují
+        service = MeterSampleService(mock_session, make_redis())
+
+        await service.ensure_partitions(datetime(2026, 12, 15, tzinfo=timezone.utc))
+
+        sql = [str(c.args[0]) for c in mock_session.execute.call_args_list]
+        attached = [q for q in sql if "ATTACH PARTITION" in q]
+        self.assertEqual(len(attached), 2)
+        self.assertIn("meter_samples_2026_12", attached[0])
+        self.assertIn("meter_samples_2027_01", attached[1])
+        mock_session.commit.assert_awaited_once()
+
+    async def test_new_partition_takes_over_default_rows(self):
+        # Vzorky s časem nabíječky mimo existující partitions leží v DEFAULT -
+        # před připojením nové partition se musí přesunout, jinak ATTACH selže
+        mock_session = AsyncMock()
+        mock_session.scalar.side_effect = [None, "meter_samples_2027_01"]
+        service = MeterSampleService(mock_session, make_redis())
+
+        await service.ensure_partitions(datetime(2026, 12, 15, tzinfo=timezone.utc))
+
+        sql = [str(c.args[0]) for c in mock_session.execute.call_args_list]
+        self.assertEqual(len(sql), 4)  # Existující partition na leden se přeskočí
+        self.assertIn("LOCK TABLE meter_samples_default", sql[0])
+        self.assertIn("CREATE TABLE meter_samples_2026_12 (LIKE meter_samples)", sql[1])
+        self.assertIn("DELETE FROM meter_samples_default", sql[2])
+        self.assertIn("INSERT INTO meter_samples_2026_12", sql[2])
+        self.assertIn("ATTACH PARTITION meter_samples_2026_12", sql[3])
+        self.assertNotIn("PARTITION OF", " ".join(sql))
+
+class TestMeterSamplesApi(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.mock_service = AsyncMock(spec=TransactionService)
+        app.dependency_overrides[get_transaction_service] = lambda: self.mock_service
+
+        self.mock_user = MagicMock()
+        self.mock_user.id = 1
+        self.mock_user.role = UserRole.user
+        app.dependency_overrides[get_current_user] = lambda: self.mock_user
+
+    def tearDown(self):
+        app.dependency_overrides = {}
+
+    def test_get_meter_samples(self):
+        self.mock_service.get_transaction.return_value = MagicMock(id=1, user_id=1)
+        self.mock_service.get_meter_samples.return_value = [
+            MeterSampleRead(sampled_at="2026-01-01T10:00:00Z", meter_wh=1000, energy_wh=0),
+            MeterSampleRead(sampled_at="2026-01-01T10:00:10Z", meter_wh=1100, energy_wh=100),
+        ]
+
+        response = self.client.get("/api/v1/transactions/1/meter-samples")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s["energy_wh"] for s in response.json()], [0, 100])
+
+    def test_get_meter_samples_forbidden(self):
+        self.mock_service.get_transaction.return_value = MagicMock(id=1, user_id=999)
+
+        response = self.client.get("/api/v1/transactions/1/meter-samples")
+        self.assertEqual(response.status_code, 403)
+
+if __name__ == "__main__":
+    unittest.main()
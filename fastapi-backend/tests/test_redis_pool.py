@@ -0,0 +1,45 @@
+import os
+import unittest
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.db import redis_pool
+from app.api.v1.deps import get_redis
+
+class TestRedisPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await redis_pool.close_redis_pool()
+
+    async def test_client_is_shared(self):
+        c1 = redis_pool.get_redis_client()
+        c2 = redis_pool.get_redis_client()
+        self.assertIs(c1, c2)
+
+    async def test_get_redis_dependency_reuses_pool(self):
+        gen1 = get_redis()
+        gen2 = get_redis()
+        r1 = await gen1.__anext__()
+        r2 = await gen2.__anext__()
+        self.assertIs(r1, r2)
+        self.assertIs(r1.connection_pool, redis_pool.get_redis_client().connection_pool)
+
+    async def test_pool_stats(self):
+        stats = redis_pool.get_pool_stats()
+        self.assertFalse(stats["initialized"])
+
+        redis_pool.get_redis_client()
+        stats = redis_pool.get_pool_stats()
+        self.assertTrue(stats["initialized"])
+        self.assertEqual(stats["in_use_connections"], 0)
+        self.assertEqual(stats["max_connections"], redis_pool.config.redis_max_connections)
+
+if __name__ == "__main__":
+    unittest.main()
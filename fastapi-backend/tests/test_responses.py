@@ -0,0 +1,33 @@
+import os
+import json
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.core.responses import ModelListResponse
+from app.models.meter_sample import MeterSampleRead
+
+class TestModelListResponse(unittest.TestCase):
+    def test_orm_objects_serialized_straight_to_bytes(self):
+        samples = [SimpleNamespace(sampled_at=datetime(2026, 1, 1, tzinfo=timezone.utc), meter_wh=1500, energy_wh=500, extra="x")]
+
+        response = ModelListResponse(MeterSampleRead, samples, headers={"X-Next-Cursor": "abc"})
+
+        self.assertEqual(response.media_type, "application/json")
+        self.assertEqual(response.headers["x-next-cursor"], "abc")
+        self.assertEqual(json.loads(response.body), [
+            {"sampled_at": "2026-01-01T00:00:00Z", "meter_wh": 1500, "energy_wh": 500}
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
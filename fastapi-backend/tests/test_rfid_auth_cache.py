@@ -0,0 +1,118 @@
+import os
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.db.schema import RFIDCard
+from app.models.rfid import RFIDCardCreate, RFIDCardUpdate
+from app.services.rfid_auth_cache import get_card_auth, CardAuth
+from app.services.rfid_service import RFIDService
+from app.services.charger_service import ChargerService
+from app.services.charger_lookup import ChargerLookup
+
+def make_redis(cached=None):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    redis.hgetall = AsyncMock(return_value=cached or {})
+    redis.delete = AsyncMock()
+    redis.set = AsyncMock()
+    return redis, pipe
+
+def card_result(card):
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = card
+    return result
+
+class TestRFIDAuthCache(unittest.IsolatedAsyncioTestCase):
+    async def test_cache_hit_skips_db(self):
+        mock_session = AsyncMock()
+        redis, _ = make_redis(cached={"status": "Accepted", "owner_id": "7", "card_id": "3"})
+
+        auth = await get_card_auth(mock_session, redis, "AABBCC")
+
+        self.assertEqual(auth, CardAuth(status="Accepted", owner_id=7, card_id=3))
+        mock_session.execute.assert_not_called()
+
+    async def test_cache_miss_stores_status(self):
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = card_result(
+            RFIDCard(id=3, card_uid="AABBCC", owner_id=7, is_active=True, is_enabled=False)
+        )
+        redis, pipe = make_redis()
+
+        auth = await get_card_auth(mock_session, redis, "AABBCC")
+
+        self.assertEqual(auth.status, "Blocked")
+        pipe.hset.assert_called_once()
+        pipe.expire.assert_called_once_with("rfid:auth:AABBCC", 300)
+
+    async def test_unknown_card_is_negatively_cached(self):
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = card_result(None)
+        redis, pipe = make_redis()
+
+        auth = await get_card_auth(mock_session, redis, "UNKNOWN")
+
+        self.assertEqual(auth.status, "Invalid")
+        pipe.expire.assert_called_once_with("rfid:auth:UNKNOWN", 60)
+
+    async def test_authorize_tag_uses_cache(self):
+        mock_session = AsyncMock()
+        redis, pipe = make_redis(cached={"status": "Accepted", "owner_id": "7", "card_id": "3"})
+        service = ChargerService(mock_session, redis)
+
+        with patch("app.services.charger_service.get_charger_lookup",
+                   AsyncMock(return_value=ChargerLookup(id=1, owner_id=2, is_active=True, is_enabled=True))):
+            result = await service.authorize_tag("CP1", "AABBCC")
+
+        self.assertEqual(result, {"status": "Accepted"})
+        mock_session.execute.assert_not_called()
+        # Autorizovaný tag jde do hashe živého stavu nabíječky
+        self.assertEqual(pipe.hset.call_args.args[0], "charger:CP1:state")
+        self.assertEqual(pipe.hset.call_args.kwargs["mapping"]["authorized_tag"], "AABBCC")
+
+class TestRFIDAuthInvalidation(unittest.IsolatedAsyncioTestCase):
+    async def test_create_card_invalidates(self):
+        mock_session = AsyncMock()
+        redis, _ = make_redis()
+        service = RFIDService(mock_session, redis)
+        service.get_card_by_uid = AsyncMock(return_value=None)
+
+        await service.create_card(RFIDCardCreate(card_uid="AABBCC"), owner_id=1)
+        redis.delete.assert_awaited_once_with("rfid:auth:AABBCC")
+
+    async def test_update_card_invalidates_old_and_new_uid(self):
+        mock_session = AsyncMock()
+        redis, _ = make_redis()
+        service = RFIDService(mock_session, redis)
+        service.get_card = AsyncMock(return_value=RFIDCard(id=1, card_uid="OLD1", is_active=True, is_enabled=True))
+        service.get_card_by_uid = AsyncMock(return_value=None)
+
+        await service.update_card(1, RFIDCardUpdate(card_uid="NEW1"))
+        redis.delete.assert_awaited_once_with("rfid:auth:OLD1", "rfid:auth:NEW1")
+
+    async def test_delete_card_invalidates(self):
+        mock_session = AsyncMock()
+        redis, _ = make_redis()
+        service = RFIDService(mock_session, redis)
+        service.get_card = AsyncMock(return_value=RFIDCard(id=1, card_uid="AABBCC", is_active=True, is_enabled=True))
+
+        await service.delete_card(1)
+        redis.delete.assert_awaited_once_with("rfid:auth:AABBCC")
+
+if __name__ == "__main__":
+    unittest.main()
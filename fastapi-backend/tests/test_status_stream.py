@@ -0,0 +1,111 @@
+import os
+import json
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from app.models.connector import ConnectorStatusUpdate
+from app.services.charger_lookup import ChargerLookup
+from app.services.connector_service import ConnectorService
+from app.services.status_stream import StatusBroadcaster, StreamFilter, STATUS_CHANNEL
+
+CHARGER = ChargerLookup(id=1, owner_id=2, is_active=True, is_enabled=True, latitude=50.08, longitude=14.42)
+
+def event(charger_id=1, lat=50.08, lon=14.42, status="Available"):
+    return json.dumps({"type": "connector_status", "charger_id": charger_id, "latitude": lat, "longitude": lon, "status": status})
+
+class TestStreamFilter(unittest.TestCase):
+    def test_charger_ids(self):
+        stream_filter = StreamFilter(charger_ids={1, 2})
+        self.assertTrue(stream_filter.matches(json.loads(event(charger_id=2))))
+        self.assertFalse(stream_filter.matches(json.loads(event(charger_id=3))))
+
+    def test_bbox(self):
+        stream_filter = StreamFilter(bbox=(12.0, 48.5, 19.0, 51.1))  # Česko
+        self.assertTrue(stream_filter.matches(json.loads(event())))
+        self.assertFalse(stream_filter.matches(json.loads(event(lat=48.2, lon=16.37))))  # Vídeň
+
+class TestStatusBroadcaster(unittest.IsolatedAsyncioTestCase):
+    async def test_dispatch_to_matching_subscribers(self):
+        broadcaster = StatusBroadcaster()
+        everyone = broadcaster.subscribe(StreamFilter())
+        only_two = broadcaster.subscribe(StreamFilter(charger_ids={2}))
+
+        broadcaster.dispatch(event(charger_id=1))
+
+        self.assertEqual(everyone.queue.qsize(), 1)
+        self.assertEqual(only_two.queue.qsize(), 0)
+
+        broadcaster.unsubscribe(everyone)
+        broadcaster.unsubscribe(only_two)
+        self.assertEqual(len(broadcaster), 0)
+
+    @patch("app.services.status_stream.config.status_stream_queue_size", 2)
+    async def test_slow_client_drops_oldest(self):
+        broadcaster = StatusBroadcaster()
+        subscription = broadcaster.subscribe(StreamFilter())
+
+        for status in ("Available", "Preparing", "Charging"):
+            broadcaster.dispatch(event(status=status))
+
+        received = [json.loads(subscription.queue.get_nowait())["status"] for _ in range(2)]
+        self.assertEqual(received, ["Preparing", "Charging"])
+
+class TestStatusPublishing(unittest.IsolatedAsyncioTestCase):
+    def make_service(self, previous_status):
+        # HGET předchozího statusu, HSET, EXPIRE
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[previous_status, 0, True])
+        pipe.__aenter__ = AsyncMock(return_value=pipe)
+        pipe.__aexit__ = AsyncMock(return_value=False)
+        redis = MagicMock()
+        redis.pipeline.return_value = pipe
+        redis.incr = AsyncMock()
+        redis.publish = AsyncMock()
+        redis.delete = AsyncMock()
+        mock_session = AsyncMock()
+        result = MagicMock()
+        result.scalars.return_value.first.return_value = MagicMock(id=7)
+        mock_session.execute.return_value = result
+        return ConnectorService(mock_session, redis), redis
+
+    @patch("app.services.connector_service.get_charger_lookup", AsyncMock(return_value=CHARGER))
+    async def test_status_change_is_published(self):
+        service, redis = self.make_service(previous_status="Available")
+
+        await service.process_status_notification(
+            ConnectorStatusUpdate(ocpp_id="CP1", connector_number=1, status="Charging")
+        )
+
+        channel, data = redis.publish.await_args.args
+        self.assertEqual(channel, STATUS_CHANNEL)
+        payload = json.loads(data)
+        self.assertEqual((payload["charger_id"], payload["connector_number"], payload["status"]), (1, 1, "Charging"))
+        self.assertEqual(payload["latitude"], 50.08)
+        # Počty dostupných ve shlucích mapy (jen cache počtů, složení dlaždic zůstává)
+        deleted = redis.delete.await_args.args
+        self.assertIn("clusters:available:0:0:0", deleted)
+        self.assertNotIn("clusters:0:0:0", deleted)
+
+    @patch("app.services.connector_service.get_charger_lookup", AsyncMock(return_value=CHARGER))
+    async def test_repeated_status_is_not_published(self):
+        service, redis = self.make_service(previous_status="Charging")
+
+        await service.process_status_notification(
+            ConnectorStatusUpdate(ocpp_id="CP1", connector_number=1, status="Charging")
+        )
+
+        redis.publish.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Set env vars
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("DEBUG", "True")
+
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.core.leader import acquire_leadership, WORKER_ID
+from app.models.charge_log import ChargeLogFilter, TransactionMeterValueRequest, TransactionStartRequest
+from app.models.enums import ChargeStatus
+from app.services.charger_lookup import ChargerLookup
+from app.services.meter_sample_service import METER_SAMPLES_PENDING_KEY
+from app.services.transaction_service import TransactionService, METER_VALUES_PENDING_KEY
+
+CHARGER = ChargerLookup(id=1, owner_id=2, is_active=True, is_enabled=True)
+
+def start_request() -> TransactionStartRequest:
+    return TransactionStartRequest(
+        ocpp_id="CP1", connector_id=1, id_tag="AABBCC",
+        meter_start=100, timestamp=datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+    )
+
+class TestStartTransaction(unittest.IsolatedAsyncioTestCase):
+    @patch("app.services.transaction_service.get_charger_lookup", AsyncMock(return_value=CHARGER))
+    async def test_start_is_single_insert_returning(self):
+        mock_session = AsyncMock()
+        result = MagicMock()
+        result.scalar.return_value = 42
+        mock_session.execute.return_value = result
+        service = TransactionService(mock_session)
+
+        response = await service.start_transaction(start_request())
+
+        self.assertEqual(response["transaction_id"], 42)
+        mock_session.execute.assert_awaited_once()
+        sql = str(mock_session.execute.call_args.args[0])
+        self.assertIn("INSERT INTO charge_logs", sql)
+        self.assertIn("LEFT OUTER JOIN rfid_cards", sql)
+        self.assertIn("RETURNING", sql)
+        mock_session.flush.assert_not_called()
+        mock_session.commit.assert_awaited_once()
+
+    @patch("app.services.transaction_service.get_charger_lookup", AsyncMock(return_value=CHARGER))
+    async def test_start_unknown_connector(self):
+        mock_session = AsyncMock()
+        result = MagicMock()
+        result.scalar.return_value = None
+        mock_session.execute.return_value = result
+        service = TransactionService(mock_session)
+
+        with self.assertRaises(HTTPException) as ctx:
+            await service.start_transaction(start_request())
+
+        self.assertEqual(ctx.exception.detail, "Connector not found")
+        mock_session.commit.assert_not_called()
+
+    @patch("app.services.transaction_service.get_charger_lookup", AsyncMock(return_value=None))
+    async def test_start_unknown_charger(self):
+        mock_session = AsyncMock()
+        service = TransactionService(mock_session)
+
+        with self.assertRaises(HTTPException) as ctx:
+            await service.start_transaction(start_request())
+
+        self.assertEqual(ctx.exception.status_code, 404)
+        mock_session.execute.assert_not_called()
+
+def returning_ids(ids):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = ids
+    return result
+
+class TestTransactionHistory(unittest.IsolatedAsyncioTestCase):
+    async def test_keyset_and_filters(self):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = result
+        service = TransactionService(mock_session)
+
+        await service.get_transactions(
+            user_id=1, limit=20,
+            after=(datetime(2026, 3, 1, tzinfo=timezone.utc), 7),
+            filters=ChargeLogFilter(status=ChargeStatus.completed, start_to=datetime(2026, 4, 1, tzinfo=timezone.utc)),
+        )
+
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        self.assertIn("(charge_logs.start_time, charge_logs.id) <", sql)
+        self.assertIn("charge_logs.status =", sql)
+        self.assertIn("charge_logs.start_time <", sql)
+        self.assertIn("ORDER BY charge_logs.start_time DESC, charge_logs.id DESC", sql)
+
+class TestCloseStaleTransactions(unittest.IsolatedAsyncioTestCase):
+    async def test_single_bulk_update_skip_locked(self):
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = returning_ids([1, 2, 3])
+        service = TransactionService(mock_session)
+
+        count = await service.close_stale_transactions(max_age_minutes=15, batch_size=100)
+
+        self.assertEqual(count, 3)
+        mock_session.execute.assert_awaited_once()
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        self.assertTrue(sql.startswith("UPDATE charge_logs"))
+        self.assertIn("end_time=charge_logs.last_update", sql)
+        self.assertIn("FOR UPDATE SKIP LOCKED", sql)
+        self.assertIn("RETURNING charge_logs.id", sql)
+
+    async def test_large_backlog_in_batches(self):
+        mock_session = AsyncMock()
+        mock_session.execute.side_effect = [returning_ids([1, 2]), returning_ids([3, 4]), returning_ids([5])]
+        service = TransactionService(mock_session)
+
+        count = await service.close_stale_transactions(batch_size=2)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(mock_session.commit.await_count, 3)
+
+def make_redis(pipeline_result=None):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=pipeline_result or [])
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=False)
+
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    return redis, pipe
+
+class TestMeterValues(unittest.IsolatedAsyncioTestCase):
+    async def test_meter_value_is_single_conditional_update(self):
+        mock_session = AsyncMock()
+        service = TransactionService(mock_session)
+
+        await service.process_meter_value(TransactionMeterValueRequest(transaction_id=5, meter_value=1500))
+
+        mock_session.execute.assert_awaited_once()
+        mock_session.commit.assert_awaited_once()
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        self.assertTrue(sql.startswith("UPDATE charge_logs"))
+        self.assertIn("charge_logs.status = ", sql)
+        # Monotónní elektroměr: starší (menší) hodnota nepřepíše novější
+        self.assertIn("coalesce(charge_logs.meter_stop, charge_logs.meter_start) <= ", sql)
+
+    @patch("app.services.transaction_service.config.meter_value_coalesce_seconds", 5)
+    async def test_coalesced_meter_value_skips_db(self):
+        mock_session = AsyncMock()
+        redis, pipe = make_redis()
+        service = TransactionService(mock_session, redis)
+
+        ts = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+        await service.process_meter_value(
+            TransactionMeterValueRequest(transaction_id=5, meter_value=1500, timestamp=ts)
+        )
+
+        mock_session.execute.assert_not_called()
+        # Nejvyšší hodnota za okno (Lua), ne poslední příchozí
+        pipe.eval.assert_called_once()
+        self.assertEqual(pipe.eval.call_args.args[1:], (1, METER_VALUES_PENDING_KEY, "5", 1500))
+        pipe.hset.assert_not_called()
+        pipe.rpush.assert_called_once_with(METER_SAMPLES_PENDING_KEY, f"5|{ts.isoformat()}|1500")
+
+    async def test_flush_meter_values_is_one_bulk_update(self):
+        mock_session = AsyncMock()
+        redis, _ = make_redis(pipeline_result=[{"5": "1500", "6": "200"}, 1])
+        service = TransactionService(mock_session, redis)
+
+        flushed = await service.flush_meter_values()
+
+        self.assertEqual(flushed, 2)
+        mock_session.execute.assert_awaited_once()
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+        self.assertIn("FROM (VALUES", sql)
+        self.assertIn("charge_logs.id = mv.transaction_id", sql)
+
+    async def test_flush_meter_values_failure_requeues(self):
+        mock_session = AsyncMock()
+        mock_session.execute.side_effect = RuntimeError("db down")
+        redis, pipe = make_redis(pipeline_result=[{"5": "1500"}, 1])
+        service = TransactionService(mock_session, redis)
+
+        with self.assertRaises(RuntimeError):
+            await service.flush_meter_values()
+
+        mock_session.rollback.assert_awaited_once()
+        pipe.eval.assert_called_once()
+        self.assertEqual(pipe.eval.call_args.args[1:], (1, METER_VALUES_PENDING_KEY, "5", "1500"))
+
+class TestLeaderElection(unittest.IsolatedAsyncioTestCase):
+    async def test_first_worker_becomes_leader(self):
+        redis = MagicMock()
+        redis.set = AsyncMock(return_value=True)
+        redis.eval = AsyncMock()
+
+        self.assertTrue(await acquire_leadership(redis, "prune", 180))
+        redis.set.assert_awaited_once_with("leader:prune", WORKER_ID, nx=True, ex=180)
+        redis.eval.assert_not_called()
+
+    async def test_other_worker_is_not_leader(self):
+        redis = MagicMock()
+        redis.set = AsyncMock(return_value=None)
+        redis.eval = AsyncMock(return_value=0)   # Zámek drží někdo jiný
+
+        self.assertFalse(await acquire_leadership(redis, "prune", 180))
+
+if __name__ == "__main__":
+    unittest.main()
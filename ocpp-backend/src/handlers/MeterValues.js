@@ -1,6 +1,7 @@
 import apiClient from "../utils/apiClient.js";
+import { idempotencyHeaders } from "../utils/idempotency.js";
 
-export default async function handleMeterValues({ client, payload }) {
+export default async function handleMeterValues({ client, payload, messageId }) {
   const { transactionId, connectorId, meterValue } = payload;
 
   // Log pro debug
@@ -36,8 +37,9 @@ export default async function handleMeterValues({ client, payload }) {
       // Voláme API: POST /transactions/meter-values
       await apiClient.post("/transaction/meter-values", {
         transaction_id: transactionId,
-        meter_value: valueInt
-      });
+        meter_value: valueInt,
+        timestamp: lastSample.timestamp // Čas vzorku pro časovou řadu (meter_samples)
+      }, idempotencyHeaders(client, messageId));
 
       client.log.debug({ val: valueInt }, "💾 Meter value saved to DB");
 
@@ -1,10 +1,11 @@
 import apiClient from "../utils/apiClient.js";
 import { kwToAmps } from "../utils/profileBuilder.js";
+import { idempotencyHeaders } from "../utils/idempotency.js";
 
 // Pomocná funkce pro čekání
 const sleep = (ms) => new Promise(r => setTimeout(r, ms));
 
-export default async function handleStartTransaction({ client, payload }) {
+export default async function handleStartTransaction({ client, payload, messageId }) {
   const ocppId = client.identity;
   const { connectorId, idTag, meterStart, timestamp } = payload;
 
@@ -17,7 +18,7 @@ export default async function handleStartTransaction({ client, payload }) {
       id_tag: idTag,
       meter_start: meterStart,
       timestamp: timestamp,
-    });
+    }, idempotencyHeaders(client, messageId));
 
     const { transactionId, max_power } = response.data;
 
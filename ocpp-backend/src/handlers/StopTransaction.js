@@ -1,6 +1,7 @@
 import apiClient from "../utils/apiClient.js";
+import { idempotencyHeaders } from "../utils/idempotency.js";
 
-export default async function handleStopTransaction({ client, payload }) {
+export default async function handleStopTransaction({ client, payload, messageId }) {
   // StopTransaction v OCPP 1.6 nemá connectorId v hlavním těle,
   // ale transactionId je unikátní.
   const { transactionId, meterStop, timestamp, idTag, reason } = payload;
@@ -15,7 +16,7 @@ export default async function handleStopTransaction({ client, payload }) {
       timestamp: timestamp,
       id_tag: idTag, 
       reason: reason
-    });
+    }, idempotencyHeaders(client, messageId));
 
     client.log.info("✅ Transaction stopped in DB");
 
@@ -0,0 +1,9 @@
+// Idempotency-Key pro transakční endpointy backendu.
+// Nabíječka při opakování zprávy posílá stejné OCPP messageId,
+// takže ocppId + messageId určuje jednu zprávu. Po restartu nabíječky se ale
+// messageId může opakovat - backend proto odpověď vrátí jen při shodném těle
+// requestu, jinak zprávu zpracuje jako novou.
+export function idempotencyHeaders(client, messageId) {
+  if (!messageId) return {};
+  return { headers: { "Idempotency-Key": `${client.identity}:${messageId}` } };
+}